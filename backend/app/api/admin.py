@@ -0,0 +1,140 @@
+import hmac
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from ..models.database import consultas_lentas, respaldos
+from ..models.respaldos import RespaldoEnCurso
+from ..monitoreo.perfilador import perfilador, PerfiladorOcupado
+from ..models.schemas import ResponseDTO
+from ..components.auth_manager import ADMIN_TOKEN
+
+# Los volcados se escriben siempre dentro de este directorio
+DIRECTORIO_VOLCADOS = os.environ.get("POLIMARKET_DIRECTORIO_VOLCADOS", "./logs")
+
+def verificar_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependencia que exige el token de administración en el encabezado X-Admin-Token
+
+    Si POLIMARKET_ADMIN_TOKEN no está configurado, /admin no existe (404):
+    no hay un token por defecto que alguien pueda adivinar.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    # Comparación en tiempo constante: la respuesta no revela cuántos caracteres coinciden
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token de administración inválido"
+        )
+
+router = APIRouter(prefix="/admin", tags=["Administración"], dependencies=[Depends(verificar_admin)])
+
+# ==================== CONSULTAS LENTAS ====================
+
+@router.get("/consultas-lentas", response_model=ResponseDTO)
+def listar_consultas_lentas(limite: int = Query(50, ge=1, le=1000)):
+    """Endpoint para consultar las consultas SQL lentas registradas"""
+    return ResponseDTO(
+        success=True,
+        message="Consultas lentas consultadas",
+        data={
+            "umbral_ms": consultas_lentas.umbral_ms,
+            "consultas": consultas_lentas.entradas(limite)
+        }
+    )
+
+@router.put("/consultas-lentas/umbral", response_model=ResponseDTO)
+def configurar_umbral_consultas_lentas(umbral_ms: float = Query(..., ge=0), capturar_plan: bool = True):
+    """Endpoint para cambiar el umbral del registro de consultas lentas"""
+    consultas_lentas.umbral_ms = umbral_ms
+    consultas_lentas.capturar_plan = capturar_plan
+    return ResponseDTO(
+        success=True,
+        message=f"Umbral de consultas lentas actualizado a {umbral_ms} ms",
+        data={"umbral_ms": umbral_ms, "capturar_plan": capturar_plan}
+    )
+
+@router.post("/consultas-lentas/volcar", response_model=ResponseDTO)
+def volcar_consultas_lentas(archivo: str = "consultas_lentas.jsonl"):
+    """Endpoint para volcar las consultas lentas a un archivo JSON Lines"""
+    ruta = os.path.join(DIRECTORIO_VOLCADOS, os.path.basename(archivo))
+    cantidad = consultas_lentas.volcar(ruta)
+    return ResponseDTO(
+        success=True,
+        message=f"{cantidad} consultas lentas volcadas",
+        data={"archivo": ruta, "consultas": cantidad}
+    )
+
+@router.delete("/consultas-lentas", response_model=ResponseDTO)
+def limpiar_consultas_lentas():
+    """Endpoint para vaciar el registro de consultas lentas"""
+    consultas_lentas.limpiar()
+    return ResponseDTO(
+        success=True,
+        message="Registro de consultas lentas vaciado"
+    )
+
+# ==================== PERFILADO EN VIVO ====================
+
+@router.get("/perfil", response_class=PlainTextResponse)
+async def perfilar_worker(
+    segundos: float = Query(10, gt=0, le=60),
+    intervalo_ms: float = Query(10, ge=1, le=1000),
+    incluir_inactivos: bool = False
+):
+    """Endpoint para perfilar por muestreo este worker durante N segundos
+    
+    Retorna las pilas en formato collapsed (flamegraph.pl / speedscope). El
+    muestreo corre en un hilo aparte, por lo que no bloquea el event loop.
+    """
+    try:
+        pilas, muestras = await run_in_threadpool(
+            perfilador.perfilar, segundos, intervalo_ms / 1000, incluir_inactivos
+        )
+    except PerfiladorOcupado:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ya hay un perfilado en curso en este worker"
+        )
+    
+    return PlainTextResponse(
+        perfilador.collapsed(pilas),
+        headers={"X-Profile-Samples": str(muestras), "X-Profile-Worker-Pid": str(os.getpid())}
+    )
+
+
+# ==================== RESPALDOS Y CHECKPOINTS ====================
+
+@router.get("/respaldos", response_model=ResponseDTO)
+def estado_respaldos():
+    """Endpoint para consultar el respaldo en curso, el último respaldo y el tamaño del WAL"""
+    return ResponseDTO(
+        success=True,
+        message="Estado de respaldos consultado",
+        data=respaldos.estado()
+    )
+
+@router.post("/respaldos", response_model=ResponseDTO, status_code=status.HTTP_202_ACCEPTED)
+def crear_respaldo():
+    """Endpoint para lanzar un respaldo en línea en segundo plano"""
+    try:
+        respaldos.respaldar_en_segundo_plano()
+    except RespaldoEnCurso:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ya hay un respaldo en curso"
+        )
+    return ResponseDTO(
+        success=True,
+        message="Respaldo iniciado; consulte GET /admin/respaldos para ver el avance"
+    )
+
+@router.post("/checkpoint", response_model=ResponseDTO)
+def ejecutar_checkpoint(modo: str = Query("PASSIVE", pattern="^(PASSIVE|FULL|RESTART|TRUNCATE)$")):
+    """Endpoint para forzar un checkpoint del WAL"""
+    return ResponseDTO(
+        success=True,
+        message=f"Checkpoint {modo} ejecutado",
+        data=respaldos.checkpoint(modo)
+    )
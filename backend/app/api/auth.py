@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from ..models.database import get_db
 from ..models.schemas import VendedorCreate, LoginRequest, ResponseDTO
 from ..components.auth_manager import AutorizacionManager
+from .cache_http import CACHE_PRIVADO, validar_cache
 
 router = APIRouter(prefix="/auth", tags=["Autenticación"])
 
@@ -88,8 +89,12 @@ def consultar_vendedores_no_autorizados(db: Session = Depends(get_db)):
     )
 
 @router.get("/vendedores", response_model=ResponseDTO)
-def listar_vendedores(db: Session = Depends(get_db)):
+def listar_vendedores(request: Request, response: Response, db: Session = Depends(get_db)):
     """Endpoint para listar todos los vendedores (RF01)"""
+    no_modificado = validar_cache(request, response, db, "vendedores", CACHE_PRIVADO)
+    if no_modificado:
+        return no_modificado
+    
     auth_manager = AutorizacionManager(db)
     vendedores = auth_manager.listar_vendedores()
     
@@ -0,0 +1,56 @@
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+from sqlalchemy.orm import Session
+from ..models.versiones import leer_version
+
+# Políticas de Cache-Control de los listados de datos maestros
+CACHE_PUBLICO = "public, max-age=30, stale-while-revalidate=60"  # catálogo sin datos personales
+CACHE_PRIVADO = "private, no-cache"  # datos personales: solo el navegador guarda la copia y revalida siempre
+
+def _sin_debil(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+def _etag_coincide(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (ignora W/), como indica RFC 9110 para GET"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(_sin_debil(candidato) == _sin_debil(etag) for candidato in if_none_match.split(","))
+
+def _no_modificado_desde(if_modified_since: str, modificado) -> bool:
+    try:
+        fecha = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if fecha is None or fecha.tzinfo is None:
+        return False
+    return modificado.replace(microsecond=0, tzinfo=timezone.utc) <= fecha
+
+def validar_cache(request: Request, response: Response, db: Session, tabla: str,
+                  cache_control: str) -> Optional[Response]:
+    """Pone ETag, Last-Modified y Cache-Control; retorna un 304 si la copia del cliente sigue vigente
+
+    Solo lee el contador de cambios de la tabla (una fila por clave primaria),
+    así que responder 304 no carga ningún registro del listado. Si el cliente
+    envía If-None-Match, If-Modified-Since se ignora.
+    """
+    version, modificado = leer_version(db, tabla)
+    if modificado is None:
+        return None
+    encabezados = {
+        "ETag": f'W/"{tabla}-{version}"',
+        "Last-Modified": format_datetime(modificado.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": cache_control,
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        vigente = _etag_coincide(if_none_match, encabezados["ETag"])
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        vigente = if_modified_since is not None and _no_modificado_desde(if_modified_since, modificado)
+    if vigente:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=encabezados)
+    response.headers.update(encabezados)
+    return None
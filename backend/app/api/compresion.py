@@ -0,0 +1,200 @@
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from ..monitoreo.metricas import registro
+
+try:
+    import brotli
+except ImportError:  # opcional: sin él solo se negocian zstd y gzip
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # opcional: sin él solo se negocian br y gzip
+    zstandard = None
+
+# Respuestas más chicas que esto se envían sin comprimir (el encabezado gzip y la CPU no compensan)
+COMPRESION_MIN_BYTES = int(os.environ.get("POLIMARKET_COMPRESION_MIN_BYTES", "1024"))
+# Niveles pensados para respuestas dinámicas: casi la misma razón que el máximo con una fracción de la CPU
+NIVEL_GZIP = int(os.environ.get("POLIMARKET_COMPRESION_NIVEL_GZIP", "5"))
+NIVEL_BROTLI = int(os.environ.get("POLIMARKET_COMPRESION_NIVEL_BROTLI", "4"))
+NIVEL_ZSTD = int(os.environ.get("POLIMARKET_COMPRESION_NIVEL_ZSTD", "3"))
+# Memoria máxima (MB) de cuerpos ya comprimidos de respuestas con ETag; 0 la desactiva
+CACHE_COMPRESION_MB = float(os.environ.get("POLIMARKET_COMPRESION_CACHE_MB", "32"))
+
+# Cuerpos más grandes que esto se comprimen en el threadpool para no frenar el event loop
+UMBRAL_HILO_BYTES = 64 * 1024
+
+TIPOS_COMPRIMIBLES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+def _comprimir_gzip(cuerpo: bytes) -> bytes:
+    # mtime=0: la misma entrada da los mismos bytes (sin fecha en el encabezado gzip)
+    return gzip.compress(cuerpo, NIVEL_GZIP, mtime=0)
+
+# Un ZstdCompressor no es seguro entre hilos y el threadpool comprime varias respuestas a la vez:
+# cada hilo crea el suyo la primera vez y lo reutiliza
+_zstd_por_hilo = threading.local()
+
+def _comprimir_zstd(cuerpo: bytes) -> bytes:
+    compresor = getattr(_zstd_por_hilo, "compresor", None)
+    if compresor is None:
+        compresor = _zstd_por_hilo.compresor = zstandard.ZstdCompressor(level=NIVEL_ZSTD)
+    return compresor.compress(cuerpo)
+
+_COMPRESORES = {"gzip": _comprimir_gzip}
+if zstandard is not None:
+    _COMPRESORES["zstd"] = _comprimir_zstd
+if brotli is not None:
+    _COMPRESORES["br"] = lambda cuerpo: brotli.compress(cuerpo, quality=NIVEL_BROTLI)
+
+# Preferencia del servidor cuando el cliente acepta varias con el mismo q
+PREFERENCIA = tuple(c for c in ("zstd", "br", "gzip") if c in _COMPRESORES)
+
+def elegir_codificacion(accept_encoding: str) -> Optional[str]:
+    """Codificación disponible con mayor q en Accept-Encoding; None si ninguna es aceptable"""
+    calidades: Dict[str, float] = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.partition(";")
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros[:2].lower() == "q=":
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+        calidades[nombre] = calidad
+    comodin = calidades.get("*", 0.0)
+    mejor, mejor_calidad = None, 0.0
+    for codificacion in PREFERENCIA:
+        calidad = calidades.get(codificacion, comodin)
+        if calidad > mejor_calidad:
+            mejor, mejor_calidad = codificacion, calidad
+    return mejor
+
+class CacheComprimidos:
+    """LRU de cuerpos comprimidos por (ruta, ETag, codificación), acotado en bytes.
+
+    Una respuesta con ETag de versión (ver cache_http) tiene el mismo cuerpo
+    mientras la tabla no cambie, así que un listado caliente se comprime una
+    vez por versión y codificación en lugar de una vez por petición. Al
+    cambiar la tabla cambia el ETag y las entradas viejas salen por LRU.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entradas: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+
+    def obtener(self, clave: Tuple[str, str, str]) -> Optional[bytes]:
+        cuerpo = self._entradas.get(clave)
+        if cuerpo is not None:
+            self._entradas.move_to_end(clave)
+        return cuerpo
+
+    def guardar(self, clave: Tuple[str, str, str], cuerpo: bytes):
+        if len(cuerpo) > self.max_bytes or clave in self._entradas:
+            return
+        self._entradas[clave] = cuerpo
+        self.bytes += len(cuerpo)
+        while self.bytes > self.max_bytes:
+            _, viejo = self._entradas.popitem(last=False)
+            self.bytes -= len(viejo)
+        registro.fijar("polimarket_compresion_cache_bytes", self.bytes)
+
+cache_comprimidos = CacheComprimidos(int(CACHE_COMPRESION_MB * 1024 * 1024))
+
+def _comprimible(encabezados: Headers) -> bool:
+    if "content-encoding" in encabezados:
+        return False
+    if "no-transform" in encabezados.get("cache-control", ""):
+        return False
+    tipo = encabezados.get("content-type", "")
+    # text/event-stream queda fuera: cada evento debe salir en cuanto se escribe
+    return tipo.startswith(TIPOS_COMPRIMIBLES) and not tipo.startswith("text/event-stream")
+
+class CompresionMiddleware:
+    """Middleware ASGI que comprime las respuestas según Accept-Encoding (zstd, br o gzip).
+
+    Solo toma respuestas de un solo bloque (las de FastAPI/JSONResponse) de
+    tipo texto o JSON con al menos COMPRESION_MIN_BYTES; los streams (SSE) y
+    los 304 pasan intactos. Si la respuesta trae ETag, el cuerpo comprimido
+    se guarda en `cache_comprimidos` y las siguientes peticiones de la misma
+    versión lo reutilizan.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        inicio = None
+
+        async def enviar(mensaje):
+            nonlocal inicio
+            if mensaje["type"] == "http.response.start":
+                encabezados = Headers(raw=mensaje["headers"])
+                if mensaje["status"] < 200 or mensaje["status"] in (204, 304) or not _comprimible(encabezados):
+                    await send(mensaje)
+                    return
+                # La representación depende de Accept-Encoding aunque esta vez no se comprima
+                MutableHeaders(scope=mensaje).add_vary_header("Accept-Encoding")
+                if codificacion is None:
+                    await send(mensaje)
+                    return
+                inicio = mensaje
+                return
+            if mensaje["type"] != "http.response.body" or inicio is None:
+                await send(mensaje)
+                return
+
+            mensaje_inicio, inicio = inicio, None
+            cuerpo = mensaje.get("body", b"")
+            if mensaje.get("more_body", False) or len(cuerpo) < COMPRESION_MIN_BYTES:
+                await send(mensaje_inicio)
+                await send(mensaje)
+                return
+
+            comprimido = await self._comprimir(scope, mensaje_inicio, codificacion, cuerpo)
+            encabezados = MutableHeaders(scope=mensaje_inicio)
+            encabezados["Content-Encoding"] = codificacion
+            encabezados["Content-Length"] = str(len(comprimido))
+            registro.incrementar("polimarket_compresion_bytes_total", len(cuerpo),
+                                 codificacion=codificacion, sentido="entrada")
+            registro.incrementar("polimarket_compresion_bytes_total", len(comprimido),
+                                 codificacion=codificacion, sentido="salida")
+            await send(mensaje_inicio)
+            await send({"type": "http.response.body", "body": comprimido})
+
+        await self.app(scope, receive, enviar)
+
+    async def _comprimir(self, scope, mensaje_inicio, codificacion: str, cuerpo: bytes) -> bytes:
+        etag = Headers(raw=mensaje_inicio["headers"]).get("etag")
+        clave = None
+        if etag is not None and cache_comprimidos.max_bytes > 0:
+            clave = (scope["path"] + "?" + scope.get("query_string", b"").decode("latin-1"), etag, codificacion)
+            comprimido = cache_comprimidos.obtener(clave)
+            if comprimido is not None:
+                registro.incrementar("polimarket_compresion_cache_total", resultado="acierto")
+                return comprimido
+
+        compresor = _COMPRESORES[codificacion]
+        if len(cuerpo) >= UMBRAL_HILO_BYTES:
+            # zlib, brotli y zstd liberan el GIL: otro hilo comprime sin bloquear a las demás peticiones
+            comprimido = await run_in_threadpool(compresor, cuerpo)
+        else:
+            comprimido = compresor(cuerpo)
+        if clave is not None:
+            registro.incrementar("polimarket_compresion_cache_total", resultado="fallo")
+            cache_comprimidos.guardar(clave, comprimido)
+        return comprimido
@@ -1,12 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from datetime import date
+from typing import List, Optional
 from ..models.database import get_db
-from ..models.schemas import EntregaCreate, ResponseDTO
+from ..models.schemas import EntregaCreate, EntregaEstadoLote, ProgramacionRequest, ResponseDTO
 from ..components.entrega_manager import EntregaManager, LogisticaManager
+from ..components.programacion_manager import ProgramacionManager
+from .proyeccion import parsear_fields, recortar
 
 router = APIRouter(prefix="/entregas", tags=["Entregas"])
 
+# Campos que se pueden pedir con ?fields= en las consultas de entregas
+CAMPOS_ENTREGA = ("id", "venta_id", "fecha_entrega", "direccion", "estado", "transportista")
+
+@router.post("/programacion", response_model=ResponseDTO)
+def programar_entregas(programacion: ProgramacionRequest, db: Session = Depends(get_db)):
+    """Endpoint para asignar transportista y día a las entregas pendientes (RF05)"""
+    if programacion.desde > programacion.hasta:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Rango de fechas inválido: 'desde' debe ser anterior a 'hasta'"
+        )
+    
+    programacion_manager = ProgramacionManager(db)
+    resumen = programacion_manager.programar_entregas(
+        programacion.desde, programacion.hasta, programacion.transportistas
+    )
+    
+    if resumen is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Error programando entregas"
+        )
+    
+    return ResponseDTO(
+        success=True,
+        message=f"{resumen['asignadas']} entregas programadas",
+        data=resumen
+    )
+
 @router.post("/{venta_id}", response_model=ResponseDTO)
 def programar_entrega(venta_id: int, entrega_data: EntregaCreate, db: Session = Depends(get_db)):
     """Endpoint para programar entrega (RF05)"""
@@ -31,8 +63,12 @@ def programar_entrega(venta_id: int, entrega_data: EntregaCreate, db: Session =
     )
 
 @router.get("/pendientes", response_model=ResponseDTO)
-def listar_entregas_pendientes(db: Session = Depends(get_db)):
+def listar_entregas_pendientes(
+    fields: Optional[str] = Query(None, description="Campos a devolver, p. ej. id,direccion"),
+    db: Session = Depends(get_db)
+):
     """Endpoint para listar entregas pendientes (RF05)"""
+    campos = parsear_fields(fields, CAMPOS_ENTREGA)
     entrega_manager = EntregaManager(db)
     entregas = entrega_manager.listar_entregas_pendientes()
     
@@ -40,19 +76,81 @@ def listar_entregas_pendientes(db: Session = Depends(get_db)):
         success=True,
         message="Entregas pendientes consultadas",
         data={"entregas": [
-            {
+            recortar({
                 "id": e.id,
                 "venta_id": e.venta_id,
                 "fecha_entrega": e.fecha_entrega.isoformat(),
                 "direccion": e.direccion,
                 "estado": e.estado
-            } for e in entregas
+            }, campos) for e in entregas
+        ]}
+    )
+
+@router.get("/rango", response_model=ResponseDTO)
+def consultar_entregas_por_rango(
+    desde: date,
+    hasta: date,
+    estado: Optional[List[str]] = Query(None),
+    transportista: Optional[str] = None,
+    pagina: int = Query(1, ge=1),
+    tamano_pagina: int = Query(50, ge=1, le=500),
+    fields: Optional[str] = Query(None, description="Campos a devolver, p. ej. id,estado"),
+    db: Session = Depends(get_db)
+):
+    """Endpoint para consultar entregas por rango de fechas, estado y transportista (RF05)"""
+    campos = parsear_fields(fields, CAMPOS_ENTREGA)
+    logistica_manager = LogisticaManager(db)
+    entregas, total = logistica_manager.consultar_entregas_por_rango(
+        desde, hasta, estado, transportista, pagina, tamano_pagina
+    )
+    
+    return ResponseDTO(
+        success=True,
+        message=f"Entregas del {desde} al {hasta} consultadas",
+        data={
+            "total": total,
+            "pagina": pagina,
+            "tamano_pagina": tamano_pagina,
+            "entregas": [
+                recortar({
+                    "id": e.id,
+                    "venta_id": e.venta_id,
+                    "fecha_entrega": e.fecha_entrega.isoformat(),
+                    "direccion": e.direccion,
+                    "estado": e.estado,
+                    "transportista": e.transportista
+                }, campos) for e in entregas
+            ]
+        }
+    )
+
+@router.get("/resumen", response_model=ResponseDTO)
+def resumen_entregas_por_dia(desde: date, hasta: date, transportista: Optional[str] = None,
+                             db: Session = Depends(get_db)):
+    """Endpoint para contar entregas por día y estado en un rango (RF05)"""
+    logistica_manager = LogisticaManager(db)
+    conteos = logistica_manager.contar_entregas_por_dia_y_estado(desde, hasta, transportista)
+    
+    dias = {}
+    for fecha_entrega, estado, cantidad in conteos:
+        dias.setdefault(fecha_entrega.isoformat(), {})[estado] = cantidad
+    
+    return ResponseDTO(
+        success=True,
+        message=f"Resumen de entregas del {desde} al {hasta} consultado",
+        data={"dias": [
+            {"fecha": fecha, "estados": estados} for fecha, estados in dias.items()
         ]}
     )
 
 @router.get("/{entrega_id}", response_model=ResponseDTO)
-def consultar_entrega(entrega_id: int, db: Session = Depends(get_db)):
+def consultar_entrega(
+    entrega_id: int,
+    fields: Optional[str] = Query(None, description="Campos a devolver, p. ej. id,estado"),
+    db: Session = Depends(get_db)
+):
     """Endpoint para consultar entrega (RF05)"""
+    campos = parsear_fields(fields, CAMPOS_ENTREGA)
     entrega_manager = EntregaManager(db)
     entrega = entrega_manager.consultar_entrega(entrega_id)
     
@@ -65,13 +163,37 @@ def consultar_entrega(entrega_id: int, db: Session = Depends(get_db)):
     return ResponseDTO(
         success=True,
         message="Entrega consultada",
-        data={
+        data=recortar({
             "id": entrega.id,
             "venta_id": entrega.venta_id,
             "fecha_entrega": entrega.fecha_entrega.isoformat(),
             "direccion": entrega.direccion,
             "estado": entrega.estado,
             "transportista": entrega.transportista
+        }, campos)
+    )
+
+@router.put("/estado/batch", response_model=ResponseDTO)
+def actualizar_estados_entregas(lote: EntregaEstadoLote, db: Session = Depends(get_db)):
+    """Endpoint para actualizar en lote el estado de varias entregas (RF05)"""
+    entrega_manager = EntregaManager(db)
+    resultados = entrega_manager.actualizar_estados_entregas(
+        [(cambio.entrega_id, cambio.estado) for cambio in lote.cambios]
+    )
+    
+    if resultados is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Error actualizando estados de entregas"
+        )
+    
+    actualizadas = sum(1 for r in resultados if r["resultado"] == "ACTUALIZADA")
+    return ResponseDTO(
+        success=True,
+        message=f"{actualizadas} de {len(resultados)} cambios de estado aplicados",
+        data={
+            "actualizadas": actualizadas,
+            "resultados": resultados
         }
     )
 
@@ -118,7 +240,7 @@ def confirmar_entrega(entrega_id: int, db: Session = Depends(get_db)):
 def consultar_entregas_por_fecha(fecha: date, db: Session = Depends(get_db)):
     """Endpoint para consultar entregas por fecha (RF05)"""
     logistica_manager = LogisticaManager(db)
-    entregas = logistica_manager.consultar_entregas_por_fecha(fecha)
+    entregas = logistica_manager.consultar_entregas_por_fecha_resumen(fecha)
     
     return ResponseDTO(
         success=True,
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from ..models.database import get_sessionmaker
+from ..models.schemas import ResponseDTO
+from ..components.evento_manager import EventoManager, aviso_eventos, INTERVALO_SONDEO_EVENTOS_S
+from ..components.difusion import CANALES_SSE, centro_difusion
+
+router = APIRouter(prefix="/eventos", tags=["Eventos"])
+
+def _leer_eventos(fabrica_sesiones, despues: int, limite: int, tipos: Optional[List[str]]):
+    # Sesión propia por consulta: entre consultas el long-poll no retiene una conexión del pool
+    db = fabrica_sesiones()
+    try:
+        return [
+            {
+                "id": e.id,
+                "tipo": e.tipo,
+                "entidad_id": e.entidad_id,
+                "datos": json.loads(e.datos),
+                "creado": e.creado.isoformat()
+            } for e in EventoManager(db).listar_eventos(despues, limite, tipos)
+        ]
+    finally:
+        db.close()
+
+@router.get("", response_model=ResponseDTO)
+async def consultar_eventos(
+    after: int = Query(0, ge=0),
+    limite: int = Query(100, ge=1, le=1000),
+    tipo: Optional[List[str]] = Query(None),
+    espera: float = Query(25, ge=0, le=30),
+    fabrica_sesiones=Depends(get_sessionmaker)
+):
+    """Endpoint para leer los cambios de inventario, ventas y entregas posteriores al cursor `after`
+
+    Si no hay eventos nuevos, la petición queda abierta hasta `espera`
+    segundos (long-poll) y responde en cuanto se confirma uno. El siguiente
+    `after` es el `cursor` de la respuesta. La espera no ocupa un hilo: solo
+    las consultas corren en el threadpool.
+    """
+    limite_espera = time.monotonic() + espera
+    while True:
+        secuencia = aviso_eventos.secuencia
+        eventos = await run_in_threadpool(_leer_eventos, fabrica_sesiones, after, limite, tipo)
+        restante = limite_espera - time.monotonic()
+        if eventos or restante <= 0:
+            break
+        await aviso_eventos.esperar(secuencia, min(restante, INTERVALO_SONDEO_EVENTOS_S))
+
+    return ResponseDTO(
+        success=True,
+        message=f"{len(eventos)} eventos consultados",
+        data={
+            "eventos": eventos,
+            "cursor": eventos[-1]["id"] if eventos else after
+        }
+    )
+
+class RespuestaSSE(Response):
+    """Respuesta text/event-stream alimentada por una suscripción del hub de difusión.
+
+    A diferencia de StreamingResponse (un task group de anyio con dos tareas
+    por conexión), usa la corrutina de la petición para escribir y una sola
+    tarea que espera el `http.disconnect`: con miles de clientes ociosos la
+    diferencia se nota en la memoria del worker.
+    """
+    media_type = "text/event-stream"
+
+    def __init__(self, canales: List[str], productos: Optional[List[int]], desde: Optional[int]):
+        self.canales = canales
+        self.productos = productos
+        self.desde = desde
+        self.status_code = 200
+        self.background = None
+        self.init_headers({"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def __call__(self, scope, receive, send):
+        suscripcion = centro_difusion.suscribir(self.canales, self.productos)
+
+        async def escuchar_desconexion():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        def cerrar(_):
+            suscripcion.cerrada = True
+            suscripcion.avisar()
+
+        escucha = asyncio.ensure_future(escuchar_desconexion())
+        escucha.add_done_callback(cerrar)
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if self.desde is not None:
+                await centro_difusion.ponerse_al_dia(suscripcion, self.desde)
+            await send({"type": "http.response.body", "body": b"retry: 3000\n\n", "more_body": True})
+            while True:
+                # Sin timers por conexión: el latido y el vencimiento los marca el hub
+                await suscripcion.esperar()
+                if suscripcion.cerrada:
+                    break
+                bloque = suscripcion.tomar(centro_difusion.ultimo_id)
+                if bloque:
+                    await send({"type": "http.response.body", "body": bloque, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            escucha.cancel()
+            centro_difusion.desuscribir(suscripcion)
+
+@router.get("/stream", response_class=RespuestaSSE)
+async def stream_eventos(
+    canal: Optional[List[str]] = Query(None),
+    producto_id: Optional[List[int]] = Query(None),
+    after: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[int] = Header(None)
+):
+    """Endpoint SSE (EventSource) con los cambios de stock y de estado de entregas
+
+    Eventos `stock` (por `producto_id`) y `entrega` (por entrega), con el
+    estado más reciente de cada uno: las ráfagas sobre una misma clave se
+    coalescen. Si el cliente se atrasa demasiado recibe `resync` y debe
+    volver a consultar sus listas. Al reconectar, el navegador envía
+    Last-Event-ID y recibe lo que se perdió.
+    """
+    canales = [c for c in (canal or CANALES_SSE) if c in CANALES_SSE]
+    return RespuestaSSE(canales, producto_id, last_event_id if last_event_id is not None else after)
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from ..models.database import get_db
 from ..models.schemas import ProductoCreate, InventarioCreate, ResponseDTO
 from ..components.inventario_manager import InventarioManager, ProductoManager
+from .cache_http import CACHE_PUBLICO, validar_cache
 
 router = APIRouter(prefix="/inventario", tags=["Inventario"])
 
 @router.get("/productos", response_model=ResponseDTO)
-def listar_productos(db: Session = Depends(get_db)):
+def listar_productos(request: Request, response: Response, db: Session = Depends(get_db)):
     """Endpoint para listar productos disponibles (RF03)"""
+    no_modificado = validar_cache(request, response, db, "productos", CACHE_PUBLICO)
+    if no_modificado:
+        return no_modificado
+    
     producto_manager = ProductoManager(db)
-    productos = producto_manager.listar_productos()
+    productos = producto_manager.listar_productos_resumen()
     
     return ResponseDTO(
         success=True,
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from ..models.database import get_db
 from ..models.schemas import ProveedorCreate, CompraCreate, ResponseDTO
 from ..components.proveedor_manager import ProveedorManager, CompraManager
+from .cache_http import CACHE_PUBLICO, validar_cache
 
 router = APIRouter(prefix="/proveedores", tags=["Proveedores"])
 
@@ -54,8 +55,12 @@ def consultar_proveedor(proveedor_id: int, db: Session = Depends(get_db)):
     )
 
 @router.get("/", response_model=ResponseDTO)
-def listar_proveedores(db: Session = Depends(get_db)):
+def listar_proveedores(request: Request, response: Response, db: Session = Depends(get_db)):
     """Endpoint para listar proveedores (RF04)"""
+    no_modificado = validar_cache(request, response, db, "proveedores", CACHE_PUBLICO)
+    if no_modificado:
+        return no_modificado
+    
     proveedor_manager = ProveedorManager(db)
     proveedores = proveedor_manager.listar_proveedores()
     
@@ -171,7 +176,7 @@ def listar_compras_pendientes(db: Session = Depends(get_db)):
 def listar_compras_por_proveedor(proveedor_id: int, db: Session = Depends(get_db)):
     """Endpoint para listar compras por proveedor (RF04)"""
     compra_manager = CompraManager(db)
-    compras = compra_manager.listar_compras_por_proveedor(proveedor_id)
+    compras = compra_manager.listar_compras_por_proveedor_resumen(proveedor_id)
     
     return ResponseDTO(
         success=True,
@@ -214,6 +219,43 @@ def consultar_compra(compra_id: int, db: Session = Depends(get_db)):
         }
     )
 
+@router.get("/compras/{compra_id}/detalle", response_model=ResponseDTO)
+def consultar_compra_detalle(compra_id: int, db: Session = Depends(get_db)):
+    """Endpoint para consultar una compra con sus líneas y productos (RF04)"""
+    compra_manager = CompraManager(db)
+    compra = compra_manager.consultar_compra_detalle(compra_id)
+    
+    if not compra:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Compra no encontrada"
+        )
+    
+    return ResponseDTO(
+        success=True,
+        message="Detalle de compra consultado",
+        data={
+            "id": compra.id,
+            "proveedor_id": compra.proveedor_id,
+            "proveedor_nombre": compra.proveedor.nombre if compra.proveedor else None,
+            "fecha_compra": compra.fecha_compra,
+            "fecha_entrega": compra.fecha_entrega,
+            "total": float(compra.total),
+            "estado": compra.estado,
+            "numero_orden": compra.numero_orden,
+            "detalles": [
+                {
+                    "id": d.id,
+                    "producto_id": d.producto_id,
+                    "producto_nombre": d.producto.nombre if d.producto else None,
+                    "cantidad": d.cantidad,
+                    "precio_compra": float(d.precio_compra),
+                    "subtotal": float(d.precio_compra * d.cantidad)
+                } for d in compra.detalles
+            ]
+        }
+    )
+
 @router.put("/compras/{compra_id}/estado", response_model=ResponseDTO)
 def actualizar_estado_compra(compra_id: int, estado: str, db: Session = Depends(get_db)):
     """Endpoint para actualizar estado de compra (RF04)"""
@@ -0,0 +1,63 @@
+from typing import Dict, Iterable, List, Optional, Set
+from fastapi import HTTPException, status
+
+# Campos pedidos con ?fields=: los de la raíz bajo None y los de cada relación incluida bajo su nombre
+Campos = Dict[Optional[str], Set[str]]
+
+def _separar(valor: Optional[str]) -> List[str]:
+    return [parte.strip() for parte in (valor or "").split(",") if parte.strip()]
+
+def _rechazar(parametro: str, invalidos: Iterable[str], permitidos: Iterable[str]):
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Valores no válidos en {parametro}: {', '.join(sorted(invalidos))}. "
+               f"Permitidos: {', '.join(sorted(permitidos))}"
+    )
+
+def parsear_include(include: Optional[str], relaciones: Iterable[str]) -> Set[str]:
+    """Relaciones pedidas con ?include=cliente,entrega; 400 si alguna no existe"""
+    pedidas = set(_separar(include))
+    invalidas = pedidas - set(relaciones)
+    if invalidas:
+        _rechazar("include", invalidas, relaciones)
+    return pedidas
+
+def parsear_fields(fields: Optional[str], permitidos: Iterable[str],
+                   relaciones: Optional[Dict[str, Iterable[str]]] = None) -> Optional[Campos]:
+    """Campos pedidos con ?fields=id,total,cliente.nombre; None si no se pidió recortar
+
+    Un nombre con punto recorta el objeto de una relación incluida (o cada
+    elemento, si es una lista). Las relaciones pedidas en include siempre se
+    conservan en la raíz.
+    """
+    nombres = _separar(fields)
+    if not nombres:
+        return None
+    relaciones = relaciones or {}
+    campos: Campos = {None: set()}
+    invalidos = []
+    for nombre in nombres:
+        relacion, _, campo = nombre.rpartition(".")
+        if not relacion:
+            if campo in permitidos or campo in relaciones:
+                campos[None].add(campo)
+            else:
+                invalidos.append(nombre)
+        elif campo in relaciones.get(relacion, ()):
+            campos.setdefault(relacion, set()).add(campo)
+        else:
+            invalidos.append(nombre)
+    if invalidos:
+        validos = list(permitidos) + [f"{r}.{c}" for r, cs in relaciones.items() for c in cs]
+        _rechazar("fields", invalidos, validos)
+    if not campos[None]:
+        del campos[None]  # solo se recortaron relaciones: la raíz va completa
+    return campos
+
+def recortar(fila: Optional[dict], campos: Optional[Campos], relacion: Optional[str] = None,
+             incluidas: Iterable[str] = ()) -> Optional[dict]:
+    """Deja en `fila` solo los campos pedidos (y las relaciones incluidas, si es la raíz)"""
+    if fila is None or campos is None or relacion not in campos:
+        return fila
+    conservar = campos[relacion] | set(incluidas)
+    return {clave: valor for clave, valor in fila.items() if clave in conservar}
@@ -0,0 +1,147 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Optional
+from ..models.database import get_db
+from ..models.schemas import ResponseDTO
+from ..components.reporte_manager import ReporteManager
+
+router = APIRouter(prefix="/reportes", tags=["Reportes"])
+
+def _analitica_manager(db: Session):
+    """Importa la analítica (NumPy) recién en la primera consulta, no al arrancar el worker"""
+    from ..components.analitica_manager import AnaliticaManager
+    return AnaliticaManager(db)
+
+def _validar_rango(desde: date, hasta: date):
+    if desde > hasta:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Rango de fechas inválido: 'desde' debe ser anterior a 'hasta'"
+        )
+
+@router.get("/ventas/diario", response_model=ResponseDTO)
+def ventas_por_dia(desde: date, hasta: date, db: Session = Depends(get_db)):
+    """Endpoint para consultar ventas por día en un rango (RF02)"""
+    _validar_rango(desde, hasta)
+    reporte_manager = ReporteManager(db)
+    filas = reporte_manager.ventas_por_dia(desde, hasta)
+
+    return ResponseDTO(
+        success=True,
+        message=f"Ventas diarias del {desde} al {hasta} consultadas",
+        data={"dias": [
+            {
+                "fecha": f.fecha.isoformat(),
+                "numero_ventas": f.numero_ventas,
+                "unidades": f.unidades,
+                "total": float(f.total)
+            } for f in filas
+        ]}
+    )
+
+@router.get("/ventas/vendedores", response_model=ResponseDTO)
+def ventas_por_vendedor(desde: date, hasta: date, db: Session = Depends(get_db)):
+    """Endpoint para consultar ventas por vendedor en un rango (RF02)"""
+    _validar_rango(desde, hasta)
+    reporte_manager = ReporteManager(db)
+    filas = reporte_manager.ventas_por_vendedor(desde, hasta)
+
+    return ResponseDTO(
+        success=True,
+        message=f"Ventas por vendedor del {desde} al {hasta} consultadas",
+        data={"vendedores": [
+            {
+                "vendedor_id": f.vendedor_id,
+                "nombre": f.nombre,
+                "numero_ventas": f.numero_ventas,
+                "unidades": f.unidades,
+                "total": float(f.total)
+            } for f in filas
+        ]}
+    )
+
+@router.get("/ventas/categorias", response_model=ResponseDTO)
+def ventas_por_categoria(desde: date, hasta: date, db: Session = Depends(get_db)):
+    """Endpoint para consultar ventas por categoría en un rango (RF02)"""
+    _validar_rango(desde, hasta)
+    reporte_manager = ReporteManager(db)
+    filas = reporte_manager.ventas_por_categoria(desde, hasta)
+
+    return ResponseDTO(
+        success=True,
+        message=f"Ventas por categoría del {desde} al {hasta} consultadas",
+        data={"categorias": [
+            {
+                "categoria": f.categoria,
+                "numero_ventas": f.numero_ventas,
+                "unidades": f.unidades,
+                "total": float(f.total)
+            } for f in filas
+        ]}
+    )
+
+@router.get("/ventas/productos", response_model=ResponseDTO)
+def ventas_por_producto(desde: date, hasta: date, limite: int = 50, db: Session = Depends(get_db)):
+    """Endpoint para consultar productos más vendidos en un rango (RF02)"""
+    _validar_rango(desde, hasta)
+    reporte_manager = ReporteManager(db)
+    filas = reporte_manager.ventas_por_producto(desde, hasta, limite)
+
+    return ResponseDTO(
+        success=True,
+        message=f"Ventas por producto del {desde} al {hasta} consultadas",
+        data={"productos": [
+            {
+                "producto_id": f.producto_id,
+                "nombre": f.nombre,
+                "numero_ventas": f.numero_ventas,
+                "unidades": f.unidades,
+                "total": float(f.total)
+            } for f in filas
+        ]}
+    )
+
+# ==================== ANALÍTICA AD-HOC (CACHÉ COLUMNAR) ====================
+
+@router.get("/analitica/top-productos", response_model=ResponseDTO)
+def top_productos_por_vendedor(n: int = 5, desde: Optional[date] = None, hasta: Optional[date] = None,
+                               db: Session = Depends(get_db)):
+    """Endpoint para consultar los N productos con más ingresos por vendedor (RF02)"""
+    analitica_manager = _analitica_manager(db)
+    top = analitica_manager.top_productos_por_vendedor(n, desde, hasta)
+
+    return ResponseDTO(
+        success=True,
+        message=f"Top {n} productos por vendedor consultados",
+        data={"vendedores": [
+            {"vendedor_id": vendedor_id, "productos": productos}
+            for vendedor_id, productos in top.items()
+        ]}
+    )
+
+@router.get("/analitica/canasta", response_model=ResponseDTO)
+def analisis_canasta(limite: int = 20, min_ventas: int = 2, desde: Optional[date] = None,
+                     hasta: Optional[date] = None, db: Session = Depends(get_db)):
+    """Endpoint para consultar los pares de productos vendidos juntos (RF02)"""
+    analitica_manager = _analitica_manager(db)
+    pares = analitica_manager.canasta(limite, min_ventas, desde, hasta)
+
+    return ResponseDTO(
+        success=True,
+        message="Análisis de canasta consultado",
+        data={"pares": pares}
+    )
+
+@router.get("/analitica/elasticidad", response_model=ResponseDTO)
+def elasticidad_precio(desde: Optional[date] = None, hasta: Optional[date] = None,
+                       db: Session = Depends(get_db)):
+    """Endpoint para consultar la elasticidad precio-demanda por producto (RF02)"""
+    analitica_manager = _analitica_manager(db)
+    elasticidades = analitica_manager.elasticidad_precio(desde, hasta)
+
+    return ResponseDTO(
+        success=True,
+        message="Elasticidad de precios consultada",
+        data={"productos": elasticidades}
+    )
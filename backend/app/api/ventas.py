@@ -1,12 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from datetime import date
+from typing import List, Optional, Set, Tuple
 from ..models.database import get_db
 from ..models.schemas import VentaCreate, ClienteCreate, ResponseDTO
 from ..components.venta_manager import VentaManager, ClienteManager
+from .cache_http import CACHE_PRIVADO, validar_cache
+from .proyeccion import Campos, parsear_fields, parsear_include, recortar
 
 router = APIRouter(prefix="/ventas", tags=["Ventas"])
 
+# Campos de una venta y de cada relación que se puede embeber con ?include=
+CAMPOS_VENTA = ("id", "vendedor_id", "cliente_id", "fecha", "total", "estado")
+RELACIONES_VENTA = {
+    "cliente": ("id", "nombre", "email", "tipo_cliente"),
+    "entrega": ("id", "fecha_entrega", "direccion", "estado", "transportista"),
+    "detalles": ("id", "producto_id", "producto_nombre", "cantidad", "precio_unitario", "subtotal"),
+}
+
+def _cliente_dict(c) -> dict:
+    return {"id": c.id, "nombre": c.nombre, "email": c.email, "tipo_cliente": c.tipo_cliente}
+
+def _entrega_dict(e) -> dict:
+    return {
+        "id": e.id,
+        "fecha_entrega": e.fecha_entrega.isoformat(),
+        "direccion": e.direccion,
+        "estado": e.estado,
+        "transportista": e.transportista
+    }
+
+def _detalle_dict(d) -> dict:
+    return {
+        "id": d.id,
+        "producto_id": d.producto_id,
+        "producto_nombre": d.producto_nombre,
+        "cantidad": d.cantidad,
+        "precio_unitario": float(str(d.precio_unitario)),
+        "subtotal": float(str(d.precio_unitario * d.cantidad))
+    }
+
+def _parsear_proyeccion(fields: Optional[str], include: Optional[str]) -> Tuple[Optional[Campos], Set[str]]:
+    incluidas = parsear_include(include, RELACIONES_VENTA)
+    return parsear_fields(fields, CAMPOS_VENTA, {r: RELACIONES_VENTA[r] for r in incluidas}), incluidas
+
+def _ventas_con_relaciones(venta_manager: VentaManager, ventas, campos: Optional[Campos],
+                           incluidas: Set[str]) -> List[dict]:
+    """Serializa las ventas con las relaciones incluidas, recortadas según fields
+
+    Cada relación incluida cuesta una consulta IN para todas las ventas (no
+    una por venta): la respuesta usa 1 + len(include) consultas.
+    """
+    venta_ids = [v.id for v in ventas]
+    clientes = venta_manager.clientes_por_id(v.cliente_id for v in ventas) if "cliente" in incluidas else {}
+    entregas = venta_manager.entregas_por_venta(venta_ids) if "entrega" in incluidas else {}
+    detalles = venta_manager.detalles_por_venta(venta_ids) if "detalles" in incluidas else {}
+
+    resultado = []
+    for v in ventas:
+        fila = {
+            "id": v.id,
+            "vendedor_id": v.vendedor_id,
+            "cliente_id": v.cliente_id,
+            "fecha": v.fecha.isoformat(),
+            "total": float(str(v.total)),
+            "estado": v.estado
+        }
+        if "cliente" in incluidas:
+            cliente = clientes.get(v.cliente_id)
+            fila["cliente"] = recortar(_cliente_dict(cliente) if cliente else None, campos, "cliente")
+        if "entrega" in incluidas:
+            entrega = entregas.get(v.id)
+            fila["entrega"] = recortar(_entrega_dict(entrega) if entrega else None, campos, "entrega")
+        if "detalles" in incluidas:
+            fila["detalles"] = [recortar(_detalle_dict(d), campos, "detalles") for d in detalles.get(v.id, [])]
+        resultado.append(recortar(fila, campos, incluidas=incluidas))
+    return resultado
+
 @router.post("/", response_model=ResponseDTO)
 def crear_venta(venta_data: VentaCreate, db: Session = Depends(get_db)):
     """Endpoint para crear venta (RF02)"""
@@ -30,31 +100,38 @@ def crear_venta(venta_data: VentaCreate, db: Session = Depends(get_db)):
     )
 
 @router.get("/vendedor/{vendedor_id}", response_model=ResponseDTO)
-def listar_ventas_por_vendedor(vendedor_id: int, db: Session = Depends(get_db)):
-    """Endpoint para listar ventas por vendedor (RF02)"""
+def listar_ventas_por_vendedor(
+    vendedor_id: int,
+    fields: Optional[str] = Query(None, description="Campos a devolver, p. ej. id,total,cliente.nombre"),
+    include: Optional[str] = Query(None, description="Relaciones a embeber: cliente, entrega, detalles"),
+    db: Session = Depends(get_db)
+):
+    """Endpoint para listar ventas por vendedor (RF02)
+
+    Con `include=cliente,entrega,detalles` el tablero del vendedor sale en una
+    sola petición (en lugar de consultar cada cliente y cada entrega) y con
+    un número fijo de consultas. `fields` recorta la respuesta.
+    """
+    campos, incluidas = _parsear_proyeccion(fields, include)
     venta_manager = VentaManager(db)
     ventas = venta_manager.listar_ventas_por_vendedor(vendedor_id)
     
     return ResponseDTO(
         success=True,
         message="Ventas del vendedor consultadas",
-        data={"ventas": [
-            {
-                "id": v.id,
-                "cliente_id": v.cliente_id,
-                "fecha": v.fecha.isoformat(),
-                "total": float(str(v.total)),
-                "estado": v.estado
-            } for v in ventas
-        ]}
+        data={"ventas": _ventas_con_relaciones(venta_manager, ventas, campos, incluidas)}
     )
 
 # Endpoints para clientes
 @router.get("/clientes", response_model=ResponseDTO)
-def listar_clientes(db: Session = Depends(get_db)):
+def listar_clientes(request: Request, response: Response, db: Session = Depends(get_db)):
     """Endpoint para listar clientes (RF02)"""
+    no_modificado = validar_cache(request, response, db, "clientes", CACHE_PRIVADO)
+    if no_modificado:
+        return no_modificado
+    
     cliente_manager = ClienteManager(db)
-    clientes = cliente_manager.listar_clientes()
+    clientes = cliente_manager.listar_clientes_resumen()
     
     return ResponseDTO(
         success=True,
@@ -81,11 +158,11 @@ def calcular_total_venta(venta_id: int, db: Session = Depends(get_db)):
         data={"total": float(str(total))}
     )
 
-@router.get("/{venta_id}", response_model=ResponseDTO)
-def consultar_venta(venta_id: int, db: Session = Depends(get_db)):
-    """Endpoint para consultar venta (RF02)"""
+@router.get("/{venta_id}/detalle", response_model=ResponseDTO)
+def consultar_venta_detalle(venta_id: int, db: Session = Depends(get_db)):
+    """Endpoint para consultar una venta con sus líneas y productos (RF02)"""
     venta_manager = VentaManager(db)
-    venta = venta_manager.consultar_venta(venta_id)
+    venta = venta_manager.consultar_venta_detalle(venta_id)
     
     if not venta:
         raise HTTPException(
@@ -95,17 +172,52 @@ def consultar_venta(venta_id: int, db: Session = Depends(get_db)):
     
     return ResponseDTO(
         success=True,
-        message="Venta consultada",
+        message="Detalle de venta consultado",
         data={
             "id": venta.id,
             "vendedor_id": venta.vendedor_id,
             "cliente_id": venta.cliente_id,
+            "cliente_nombre": venta.cliente.nombre if venta.cliente else None,
             "fecha": venta.fecha.isoformat(),
             "total": float(str(venta.total)),
-            "estado": venta.estado
+            "estado": venta.estado,
+            "detalles": [
+                {
+                    "id": d.id,
+                    "producto_id": d.producto_id,
+                    "producto_nombre": d.producto.nombre if d.producto else None,
+                    "cantidad": d.cantidad,
+                    "precio_unitario": float(str(d.precio_unitario)),
+                    "subtotal": float(str(d.precio_unitario * d.cantidad))
+                } for d in venta.detalles
+            ]
         }
     )
 
+@router.get("/{venta_id}", response_model=ResponseDTO)
+def consultar_venta(
+    venta_id: int,
+    fields: Optional[str] = Query(None, description="Campos a devolver, p. ej. id,total,cliente.nombre"),
+    include: Optional[str] = Query(None, description="Relaciones a embeber: cliente, entrega, detalles"),
+    db: Session = Depends(get_db)
+):
+    """Endpoint para consultar venta (RF02)"""
+    campos, incluidas = _parsear_proyeccion(fields, include)
+    venta_manager = VentaManager(db)
+    venta = venta_manager.consultar_venta(venta_id)
+    
+    if not venta:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Venta no encontrada"
+        )
+    
+    return ResponseDTO(
+        success=True,
+        message="Venta consultada",
+        data=_ventas_con_relaciones(venta_manager, [venta], campos, incluidas)[0]
+    )
+
 @router.get("/clientes/{cliente_id}", response_model=ResponseDTO)
 def consultar_cliente(cliente_id: int, db: Session = Depends(get_db)):
     """Endpoint para consultar cliente (RF02)"""
@@ -0,0 +1,295 @@
+import threading
+from datetime import date
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import select, cast, Float, String
+from sqlalchemy.orm import Session
+from ..models.entities import Venta, DetalleVenta
+
+TAMANO_BLOQUE = 100_000
+MAX_CLAVES_DENSAS = 1 << 24
+
+COLUMNAS = {
+    "venta_id": np.int64,
+    "fecha": np.int32,        # días desde 1970-01-01
+    "vendedor_id": np.int32,
+    "cliente_id": np.int32,
+    "producto_id": np.int32,
+    "cantidad": np.int32,
+    "precio": np.float64,
+}
+
+def _dia(fecha: date) -> int:
+    return int(np.datetime64(fecha, "D").astype(np.int64))
+
+def _denso(claves: np.ndarray) -> bool:
+    """Indica si el espacio de claves es lo bastante pequeño para un bincount directo"""
+    return len(claves) > 0 and int(claves.max()) < max(2 * len(claves), MAX_CLAVES_DENSAS)
+
+def _unicos(claves: np.ndarray, inversa: bool = False, conteos: bool = False):
+    """Equivalente a np.unique para claves 1-D (bincount o sort según el caso).
+
+    np.unique delega en algoritmos distintos según la versión de NumPy; un
+    sort estable más una máscara es predecible y rápido con datos casi
+    ordenados (las líneas llegan agrupadas por venta).
+    """
+    if np.issubdtype(claves.dtype, np.integer) and _denso(claves):
+        presentes = np.bincount(claves)
+        unicas = np.flatnonzero(presentes)
+        resultado = [unicas]
+        if inversa:
+            resultado.append((np.cumsum(presentes > 0) - 1)[claves])
+        if conteos:
+            resultado.append(presentes[unicas])
+        return resultado[0] if len(resultado) == 1 else tuple(resultado)
+
+    orden = np.argsort(claves, kind="stable")
+    ordenadas = claves[orden]
+    nuevo = np.empty(len(ordenadas), dtype=bool)
+    nuevo[:1] = True
+    np.not_equal(ordenadas[1:], ordenadas[:-1], out=nuevo[1:])
+    resultado = [ordenadas[nuevo]]
+    if inversa:
+        grupos = np.empty(len(claves), dtype=np.int64)
+        grupos[orden] = np.cumsum(nuevo) - 1
+        resultado.append(grupos)
+    if conteos:
+        resultado.append(np.diff(np.append(np.flatnonzero(nuevo), len(claves))))
+    return resultado[0] if len(resultado) == 1 else tuple(resultado)
+
+def _sumar_por_clave(claves: np.ndarray, pesos: np.ndarray = None):
+    """Agrupa por clave entera y suma los pesos (group-by vectorizado).
+
+    Sin pesos cuenta las filas de cada clave.
+    """
+    if _denso(claves):
+        conteos = np.bincount(claves)
+        unicas = np.flatnonzero(conteos)
+        sumas = conteos if pesos is None else np.bincount(claves, weights=pesos)
+        return unicas, sumas[unicas]
+    unicas, inversa = _unicos(claves, inversa=True)
+    return unicas, np.bincount(inversa, weights=pesos, minlength=len(unicas))
+
+class CacheColumnar:
+    """Copia columnar en memoria de las líneas de venta, cargada por bloques.
+
+    Se refresca incrementalmente usando `Venta.id` como marca de agua: solo
+    se leen las ventas con id mayor al último cargado.
+    """
+
+    def __init__(self):
+        self.marca_agua = 0
+        self._bloques: List[Dict[str, np.ndarray]] = []
+        self._columnas: Optional[Dict[str, np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(b["venta_id"]) for b in self._bloques)
+
+    def refrescar(self, db: Session, tamano_bloque: int = TAMANO_BLOQUE) -> int:
+        """Carga las líneas de ventas nuevas; retorna el número de filas leídas"""
+        with self._lock:
+            consulta = (
+                select(
+                    DetalleVenta.venta_id,
+                    cast(Venta.fecha, String),
+                    Venta.vendedor_id,
+                    Venta.cliente_id,
+                    DetalleVenta.producto_id,
+                    DetalleVenta.cantidad,
+                    cast(DetalleVenta.precio_unitario, Float)
+                )
+                .join(Venta, Venta.id == DetalleVenta.venta_id)
+                .execution_options(yield_per=tamano_bloque)
+            )
+            if self.marca_agua:
+                consulta = consulta.where(DetalleVenta.venta_id > self.marca_agua)
+            leidas = 0
+            for filas in db.execute(consulta).partitions():
+                venta_id, fecha, vendedor, cliente, producto, cantidad, precio = zip(*filas)
+                bloque = {
+                    "venta_id": np.array(venta_id, dtype=COLUMNAS["venta_id"]),
+                    "fecha": np.array(fecha, dtype="datetime64[D]").astype(COLUMNAS["fecha"]),
+                    "vendedor_id": np.array([v or 0 for v in vendedor], dtype=COLUMNAS["vendedor_id"]),
+                    "cliente_id": np.array([c or 0 for c in cliente], dtype=COLUMNAS["cliente_id"]),
+                    "producto_id": np.array(producto, dtype=COLUMNAS["producto_id"]),
+                    "cantidad": np.array(cantidad, dtype=COLUMNAS["cantidad"]),
+                    "precio": np.array(precio, dtype=COLUMNAS["precio"]),
+                }
+                self._bloques.append(bloque)
+                self.marca_agua = max(self.marca_agua, int(bloque["venta_id"].max()))
+                leidas += len(filas)
+
+            if leidas:
+                self._columnas = None
+            return leidas
+
+    def columnas(self) -> Dict[str, np.ndarray]:
+        """Retorna las columnas consolidadas (concatenando los bloques una sola vez)"""
+        with self._lock:
+            if self._columnas is None:
+                if self._bloques:
+                    columnas = {
+                        nombre: np.concatenate([b[nombre] for b in self._bloques])
+                        for nombre in COLUMNAS
+                    }
+                    # Los reportes asumen las líneas agrupadas por venta
+                    venta_id = columnas["venta_id"]
+                    if len(venta_id) > 1 and (np.diff(venta_id) < 0).any():
+                        orden = np.argsort(venta_id, kind="stable")
+                        columnas = {nombre: valores[orden] for nombre, valores in columnas.items()}
+                    self._columnas = columnas
+                    self._bloques = [columnas]
+                else:
+                    self._columnas = {
+                        nombre: np.empty(0, dtype=tipo) for nombre, tipo in COLUMNAS.items()
+                    }
+            return self._columnas
+
+    def reiniciar(self):
+        with self._lock:
+            self.marca_agua = 0
+            self._bloques = []
+            self._columnas = None
+
+# Una caché por proceso, compartida entre peticiones
+cache_ventas = CacheColumnar()
+
+class AnaliticaManager:
+    """Componente de analítica ad-hoc sobre ventas en formato columnar (RF02)"""
+
+    def __init__(self, db: Session, cache: CacheColumnar = None):
+        self.db = db
+        self.cache = cache or cache_ventas
+
+    def _columnas(self, desde: date = None, hasta: date = None) -> Dict[str, np.ndarray]:
+        """Refresca la caché y filtra las líneas por rango de fechas"""
+        self.cache.refrescar(self.db)
+        col = self.cache.columnas()
+        if desde is None and hasta is None:
+            return col
+
+        mascara = np.ones(len(col["fecha"]), dtype=bool)
+        if desde is not None:
+            mascara &= col["fecha"] >= _dia(desde)
+        if hasta is not None:
+            mascara &= col["fecha"] <= _dia(hasta)
+        return {nombre: valores[mascara] for nombre, valores in col.items()}
+
+    def top_productos_por_vendedor(self, n: int = 5, desde: date = None, hasta: date = None):
+        """Los N productos con más ingresos de cada vendedor"""
+        col = self._columnas(desde, hasta)
+        if not len(col["venta_id"]):
+            return {}
+
+        vendedor = col["vendedor_id"].astype(np.int64)
+        producto = col["producto_id"].astype(np.int64)
+        base = int(producto.max()) + 1
+        ingreso = col["cantidad"] * col["precio"]
+
+        # Un solo agrupamiento para las dos sumas: los arreglos quedan alineados por clave
+        claves, grupo = _unicos(vendedor * base + producto, inversa=True)
+        totales = np.bincount(grupo, weights=ingreso, minlength=len(claves))
+        unidades = np.bincount(grupo, weights=col["cantidad"], minlength=len(claves))
+
+        vendedores = claves // base
+        # Ordenar por vendedor y, dentro de cada vendedor, por ingreso descendente
+        orden = np.lexsort((-totales, vendedores))
+        vendedores, claves, totales, unidades = (
+            vendedores[orden], claves[orden], totales[orden], unidades[orden]
+        )
+        inicios = np.flatnonzero(np.diff(vendedores, prepend=-1))
+        posicion = np.arange(len(vendedores)) - np.repeat(inicios, np.diff(np.append(inicios, len(vendedores))))
+        seleccion = posicion < n
+
+        resultado = {}
+        for vendedor_id, producto_id, total, cantidad in zip(
+            vendedores[seleccion], claves[seleccion] % base, totales[seleccion], unidades[seleccion]
+        ):
+            resultado.setdefault(int(vendedor_id), []).append({
+                "producto_id": int(producto_id),
+                "unidades": int(cantidad),
+                "total": float(total)
+            })
+        return resultado
+
+    def canasta(self, limite: int = 20, min_ventas: int = 2, desde: date = None, hasta: date = None):
+        """Pares de productos comprados juntos con más frecuencia (análisis de canasta)"""
+        col = self._columnas(desde, hasta)
+        venta = col["venta_id"]
+        producto = col["producto_id"].astype(np.int64)
+        total_ventas = len(_unicos(venta))
+        if total_ventas == 0:
+            return []
+
+        # Una línea por (venta, producto): un par cuenta una sola vez por venta
+        base = int(producto.max()) + 1
+        lineas = _unicos(venta * base + producto)
+        venta, producto = lineas // base, lineas % base
+
+        # Las líneas quedan ordenadas por venta: se comparan desplazamientos 1..k,
+        # reduciendo en cada paso los candidatos a las posiciones aún en la misma venta
+        a_pares, b_pares = [], []
+        candidatos = np.arange(len(venta) - 1)
+        desplazamiento = 1
+        while len(candidatos):
+            misma_venta = venta[candidatos] == venta[candidatos + desplazamiento]
+            candidatos = candidatos[misma_venta]
+            a_pares.append(producto[candidatos])
+            b_pares.append(producto[candidatos + desplazamiento])
+            desplazamiento += 1
+            candidatos = candidatos[candidatos + desplazamiento < len(venta)]
+
+        if not a_pares:
+            return []
+        a, b = np.concatenate(a_pares), np.concatenate(b_pares)
+        claves, conteos = _sumar_por_clave(a * base + b)
+        ventas_producto_claves, ventas_producto = _sumar_por_clave(producto)
+        filtro = conteos >= min_ventas
+        claves, conteos = claves[filtro], conteos[filtro]
+        orden = np.argsort(-conteos, kind="stable")[:limite]
+
+        resultado = []
+        for clave, conteo in zip(claves[orden], conteos[orden]):
+            producto_a, producto_b = int(clave // base), int(clave % base)
+            soporte_a = ventas_producto[np.searchsorted(ventas_producto_claves, producto_a)]
+            resultado.append({
+                "producto_a": producto_a,
+                "producto_b": producto_b,
+                "ventas_conjuntas": int(conteo),
+                "soporte": float(conteo) / total_ventas,
+                "confianza": float(conteo) / float(soporte_a)
+            })
+        return resultado
+
+    def elasticidad_precio(self, desde: date = None, hasta: date = None, min_precios: int = 2):
+        """Elasticidad precio-demanda por producto (regresión log-log por puntos de precio)"""
+        col = self._columnas(desde, hasta)
+        if not len(col["venta_id"]):
+            return []
+
+        producto = col["producto_id"].astype(np.int64)
+        precios, precio_idx = _unicos(np.round(col["precio"], 2), inversa=True)
+        # Demanda media por línea en cada punto de precio de cada producto
+        puntos, inversa = _unicos(producto * len(precios) + precio_idx, inversa=True)
+        cantidad = np.bincount(inversa, weights=col["cantidad"])
+        lineas = np.bincount(inversa)
+        x = np.log(precios[puntos % len(precios)])
+        y = np.log(cantidad / lineas)
+
+        # Mínimos cuadrados agrupados por producto: pendiente = cov(x, y) / var(x)
+        productos, grupo, n = _unicos(puntos // len(precios), inversa=True, conteos=True)
+        sx, sy = np.bincount(grupo, weights=x), np.bincount(grupo, weights=y)
+        sxx, sxy = np.bincount(grupo, weights=x * x), np.bincount(grupo, weights=x * y)
+        varianza = n * sxx - sx * sx
+        valido = (n >= min_precios) & (varianza > 1e-12)
+        pendiente = np.divide(n * sxy - sx * sy, varianza, out=np.zeros_like(varianza), where=valido)
+
+        return [
+            {
+                "producto_id": int(producto_id),
+                "puntos_precio": int(puntos_precio),
+                "elasticidad": float(e)
+            }
+            for producto_id, puntos_precio, e in zip(productos[valido], n[valido], pendiente[valido])
+        ]
@@ -1,13 +1,19 @@
 import hashlib
+import os
 import jwt
 from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
 from ..models.entities import Vendedor, Autorizacion
 from ..models.schemas import VendedorCreate, AutorizacionCreate
+from .escritor_grupal import ejecutar_escritura
+from .transacciones import ConflictoConcurrencia, ejecutar_transaccion
 
 SECRET_KEY = "polimarket_secret_key_2024"
 ALGORITHM = "HS256"
 
+# Token para los endpoints de administración (encabezado X-Admin-Token); sin él, /admin responde 404
+ADMIN_TOKEN = os.environ.get("POLIMARKET_ADMIN_TOKEN", "")
+
 class AutorizacionManager:
     """Componente para gestión de autorizaciones (RF01)"""
     
@@ -32,8 +38,8 @@ class AutorizacionManager:
     
     def autorizar_vendedor(self, vendedor_id: int, responsable: str) -> bool:
         """Autoriza un vendedor (RF01)"""
-        try:
-            vendedor = self.db.query(Vendedor).filter(Vendedor.id == vendedor_id).first()
+        def aplicar(db):
+            vendedor = db.query(Vendedor).filter(Vendedor.id == vendedor_id).first()
             if not vendedor:
                 return False
             
@@ -49,9 +55,13 @@ class AutorizacionManager:
             vendedor.estado_autorizacion = True
             vendedor.fecha_autorizacion = date.today()
             
-            self.db.add(autorizacion)
-            self.db.commit()
+            db.add(autorizacion)
             return True
+        
+        try:
+            return ejecutar_escritura(self.db, "autorizar_vendedor", aplicar)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error autorizando vendedor: {e}")
@@ -68,7 +78,7 @@ class AutorizacionManager:
     
     def revocar_autorizacion(self, vendedor_id: int) -> bool:
         """Revoca la autorización de un vendedor (RF01)"""
-        try:
+        def intento():
             vendedor = self.db.query(Vendedor).filter(Vendedor.id == vendedor_id).first()
             if not vendedor:
                 return False
@@ -83,6 +93,11 @@ class AutorizacionManager:
             
             self.db.commit()
             return True
+        
+        try:
+            return ejecutar_transaccion(self.db, "revocar_autorizacion", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error revocando autorización: {e}")
@@ -106,7 +121,7 @@ class AutorizacionManager:
     
     def crear_vendedor(self, vendedor_data: VendedorCreate) -> Vendedor:
         """Crea un nuevo vendedor (RF01)"""
-        try:
+        def intento():
             hashed_password = self._hash_password(vendedor_data.password)
             vendedor = Vendedor(
                 tipo_documento=vendedor_data.tipo_documento,
@@ -121,6 +136,11 @@ class AutorizacionManager:
             self.db.commit()
             self.db.refresh(vendedor)
             return vendedor
+        
+        try:
+            return ejecutar_transaccion(self.db, "crear_vendedor", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error creando vendedor: {e}")
@@ -0,0 +1,274 @@
+import asyncio
+import os
+import time
+from typing import Iterable, List, Optional
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
+from ..models.database import get_sessionmaker
+from ..models.entities import Evento
+from ..monitoreo.metricas import registro
+from .evento_manager import (
+    ENTREGA_CREADA, ENTREGA_ESTADO, INTERVALO_SONDEO_EVENTOS_S, INVENTARIO_ACTUALIZADO, aviso_eventos
+)
+
+# Claves distintas pendientes por conexión; un cliente más lento que esto recibe `resync`
+MAX_PENDIENTES_SSE = int(os.environ.get("POLIMARKET_SSE_MAX_PENDIENTES", "256"))
+# Comentario SSE periódico para que proxies y balanceadores no cierren la conexión ociosa
+INTERVALO_LATIDO_SSE_S = float(os.environ.get("POLIMARKET_SSE_INTERVALO_LATIDO_S", "15"))
+# Vida máxima de un stream; el navegador reconecta solo (con Last-Event-ID) y se reparte entre workers
+DURACION_MAX_SSE_S = float(os.environ.get("POLIMARKET_SSE_DURACION_MAX_S", "300"))
+# Tras un aviso, el hub espera esto antes de leer: los commits de una ráfaga se reparten en una sola ronda
+VENTANA_SSE_MS = float(os.environ.get("POLIMARKET_SSE_VENTANA_MS", "100"))
+
+# Eventos del outbox leídos por consulta, al seguir la tabla y al ponerse al día
+LOTE_DIFUSION = 500
+LIMITE_PONERSE_AL_DIA = 5000
+
+# Canal SSE de cada tipo de evento del outbox; los demás tipos no se difunden
+CANAL_STOCK = "stock"
+CANAL_ENTREGA = "entrega"
+CANALES_SSE = (CANAL_STOCK, CANAL_ENTREGA)
+_CANAL_POR_TIPO = {
+    INVENTARIO_ACTUALIZADO: CANAL_STOCK,
+    ENTREGA_CREADA: CANAL_ENTREGA,
+    ENTREGA_ESTADO: CANAL_ENTREGA,
+}
+
+def _mensaje(evento_id: int, canal: str, datos: str) -> bytes:
+    # `datos` ya es JSON de una sola línea (json.dumps sin indentar): se reenvía sin volver a serializar
+    return f"id: {evento_id}\nevent: {canal}\ndata: {datos}\n\n".encode("utf-8")
+
+class Suscripcion:
+    """Una conexión SSE: filtros y cambios pendientes de enviar, coalescidos por clave.
+
+    `pendientes` guarda solo el último mensaje de cada (canal, entidad): si un
+    producto cambia cien veces mientras el cliente no lee, recibe un solo
+    evento con el stock final. Con más de MAX_PENDIENTES_SSE claves
+    pendientes se descartan todas y el cliente recibe `resync` (debe volver a
+    consultar sus listas), así un cliente lento nunca acumula memoria sin límite.
+    """
+    __slots__ = ("canales", "productos", "pendientes", "desbordada", "latido", "cerrada", "vence",
+                 "senal", "_futuro")
+
+    def __init__(self, canales: Iterable[str], productos: Optional[Iterable[int]] = None):
+        self.canales = frozenset(canales)
+        self.productos = frozenset(productos) if productos else None
+        self.pendientes = {}
+        self.desbordada = False
+        self.latido = False
+        self.cerrada = False
+        self.vence = time.monotonic() + DURACION_MAX_SSE_S
+        # Señal propia en lugar de asyncio.Event (que reserva un deque de ~600 bytes por conexión)
+        self.senal = False
+        self._futuro = None
+
+    def avisar(self):
+        self.senal = True
+        if self._futuro is not None and not self._futuro.done():
+            self._futuro.set_result(None)
+
+    async def esperar(self):
+        """Espera hasta que haya algo que enviar o la suscripción se cierre"""
+        if not self.senal:
+            self._futuro = asyncio.get_running_loop().create_future()
+            try:
+                await self._futuro
+            finally:
+                self._futuro = None
+
+    def interesa(self, canal: str, entidad_id: int) -> bool:
+        if canal not in self.canales:
+            return False
+        return canal != CANAL_STOCK or self.productos is None or entidad_id in self.productos
+
+    def encolar(self, clave: tuple, evento_id: int, mensaje: bytes):
+        if self.desbordada:
+            return
+        actual = self.pendientes.get(clave)
+        if actual is not None:
+            if actual[0] >= evento_id:
+                return
+        elif len(self.pendientes) >= MAX_PENDIENTES_SSE:
+            self.pendientes.clear()
+            self.desbordada = True
+            registro.incrementar("polimarket_sse_desbordes_total")
+        if not self.desbordada:
+            self.pendientes[clave] = (evento_id, mensaje)
+        self.avisar()
+
+    def tomar(self, ultimo_id: int) -> bytes:
+        """Vacía los pendientes en un solo bloque, en orden de id (así Last-Event-ID nunca salta eventos)"""
+        self.senal = False
+        if self.latido and not self.pendientes and not self.desbordada:
+            self.latido = False
+            return b": latido\n\n"
+        self.latido = False
+        if self.desbordada:
+            self.desbordada = False
+            return f"id: {ultimo_id}\nevent: resync\ndata: {{}}\n\n".encode("utf-8")
+        pendientes = sorted(self.pendientes.values())
+        self.pendientes.clear()
+        registro.incrementar("polimarket_sse_mensajes_total", len(pendientes))
+        return b"".join(mensaje for _, mensaje in pendientes)
+
+class CentroDifusion:
+    """Hub por worker que sigue el outbox de eventos y reparte los cambios a las conexiones SSE.
+
+    Una sola tarea por worker lee los eventos nuevos (despertada por los
+    commits del mismo worker, o cada INTERVALO_SONDEO_EVENTOS_S para los de
+    otros workers), coalesce el lote por clave, arma cada mensaje una vez y lo
+    encola en las suscripciones interesadas. Una suscripción ociosa es un
+    objeto pequeño y una corrutina esperando su señal: no hay hilo,
+    conexión a la base ni temporizador por cliente (los latidos y el
+    vencimiento de los streams los marca una sola tarea para todos).
+
+    Al apagar el servidor los streams se cierran en cuanto uvicorn recibe la
+    señal (ver `Servidor` en run.py), no en el lifespan: uvicorn espera
+    a que terminen todas las conexiones antes de correr el lifespan, y un
+    stream abierto haría esperar el apagado hasta la gracia o su vencimiento.
+    """
+
+    def __init__(self, fabrica_sesiones=None):
+        self.fabrica_sesiones = fabrica_sesiones or get_sessionmaker()
+        self.ultimo_id = 0
+        self.cerrando = False
+        self._suscripciones = set()
+        self._tareas = []
+        self._loop = None
+
+    async def iniciar(self, fabrica_sesiones=None):
+        if self._tareas:
+            return
+        if fabrica_sesiones is not None:
+            self.fabrica_sesiones = fabrica_sesiones
+        self.cerrando = False
+        self._loop = asyncio.get_running_loop()
+        self.ultimo_id = await run_in_threadpool(self._leer_ultimo_id)
+        self._tareas = [asyncio.create_task(self._ciclo()), asyncio.create_task(self._latidos())]
+
+    async def detener(self):
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas = []
+        self.cerrar_suscripciones()
+        self._loop = None
+
+    def cerrar_suscripciones(self):
+        """Termina todos los streams (y los que se abran después); el navegador reconecta con Last-Event-ID"""
+        self.cerrando = True
+        for suscripcion in self._suscripciones:
+            suscripcion.cerrada = True
+            suscripcion.avisar()
+
+    def avisar_salida(self):
+        """Llamado desde el manejador de señales del servidor: cierra los streams en el event loop"""
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self.cerrar_suscripciones)
+        except RuntimeError:
+            pass  # El event loop ya se cerró
+
+    def suscribir(self, canales: Iterable[str], productos: Optional[Iterable[int]] = None) -> Suscripcion:
+        suscripcion = Suscripcion(canales, productos)
+        if self.cerrando:
+            # Conexión aceptada mientras el servidor ya se apaga: el stream termina enseguida
+            suscripcion.cerrada = True
+            suscripcion.avisar()
+        self._suscripciones.add(suscripcion)
+        registro.fijar("polimarket_sse_suscriptores", len(self._suscripciones))
+        return suscripcion
+
+    def desuscribir(self, suscripcion: Suscripcion):
+        self._suscripciones.discard(suscripcion)
+        registro.fijar("polimarket_sse_suscriptores", len(self._suscripciones))
+
+    async def ponerse_al_dia(self, suscripcion: Suscripcion, desde: int):
+        """Encola los eventos entre `desde` (Last-Event-ID) y lo ya difundido por el hub.
+
+        Los posteriores llegan por el hub porque la suscripción ya está
+        registrada; `encolar` conserva el de mayor id por clave, así que el
+        orden en que se mezclan ambos caminos no importa.
+        """
+        hasta = self.ultimo_id
+        if desde >= hasta:
+            return
+        filas = await run_in_threadpool(self._leer_eventos, desde, LIMITE_PONERSE_AL_DIA, hasta)
+        if len(filas) == LIMITE_PONERSE_AL_DIA:
+            # Demasiado atrasado: es más barato que el cliente vuelva a consultar sus listas
+            suscripcion.pendientes.clear()
+            suscripcion.desbordada = True
+            suscripcion.avisar()
+            return
+        for clave, canal, evento_id, mensaje in self._coalescer(filas):
+            if suscripcion.interesa(canal, clave[1]):
+                suscripcion.encolar(clave, evento_id, mensaje)
+
+    def _leer_ultimo_id(self) -> int:
+        db = self.fabrica_sesiones()
+        try:
+            return db.execute(select(func.max(Evento.id))).scalar() or 0
+        finally:
+            db.close()
+
+    def _leer_eventos(self, despues: int, limite: int, hasta: Optional[int] = None):
+        db = self.fabrica_sesiones()
+        try:
+            consulta = (
+                select(Evento.id, Evento.tipo, Evento.entidad_id, Evento.datos)
+                .where(Evento.id > despues, Evento.tipo.in_(list(_CANAL_POR_TIPO)))
+                .order_by(Evento.id)
+                .limit(limite)
+            )
+            if hasta is not None:
+                consulta = consulta.where(Evento.id <= hasta)
+            return db.execute(consulta).all()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _coalescer(filas) -> List[tuple]:
+        """Último evento de cada (canal, entidad) del lote, con su mensaje SSE ya armado"""
+        ultimos = {}
+        for fila in filas:
+            canal = _CANAL_POR_TIPO[fila.tipo]
+            ultimos[(canal, fila.entidad_id)] = fila
+        return [(clave, clave[0], fila.id, _mensaje(fila.id, clave[0], fila.datos))
+                for clave, fila in ultimos.items()]
+
+    async def _ciclo(self):
+        while True:
+            secuencia = aviso_eventos.secuencia
+            try:
+                filas = await run_in_threadpool(self._leer_eventos, self.ultimo_id, LOTE_DIFUSION)
+            except Exception as e:
+                print(f"Error leyendo eventos para difundir: {e}")
+                filas = []
+            if filas:
+                self.ultimo_id = filas[-1].id
+                self._difundir(self._coalescer(filas))
+                if len(filas) == LOTE_DIFUSION:
+                    continue
+            await aviso_eventos.esperar(secuencia, INTERVALO_SONDEO_EVENTOS_S)
+            await asyncio.sleep(VENTANA_SSE_MS / 1000)
+
+    async def _latidos(self):
+        """Marca un latido en todas las suscripciones y cierra las que vencieron"""
+        while True:
+            await asyncio.sleep(INTERVALO_LATIDO_SSE_S)
+            ahora = time.monotonic()
+            for suscripcion in self._suscripciones:
+                if suscripcion.vence <= ahora:
+                    suscripcion.cerrada = True
+                else:
+                    suscripcion.latido = True
+                suscripcion.avisar()
+
+    def _difundir(self, mensajes: List[tuple]):
+        for suscripcion in self._suscripciones:
+            for clave, canal, evento_id, mensaje in mensajes:
+                if suscripcion.interesa(canal, clave[1]):
+                    suscripcion.encolar(clave, evento_id, mensaje)
+
+centro_difusion = CentroDifusion()
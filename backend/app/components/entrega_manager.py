@@ -1,7 +1,24 @@
 from datetime import date
+from typing import List, Optional
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 from ..models.entities import Entrega, Venta
 from ..models.schemas import EntregaCreate
+from .escritor_grupal import ejecutar_escritura
+from .evento_manager import ENTREGA_CREADA, EventoManager
+from .transacciones import ConflictoConcurrencia, ejecutar_transaccion
+
+# Transiciones de estado permitidas para una entrega
+TRANSICIONES_ENTREGA = {
+    "PENDIENTE": {"EN_TRANSITO", "ENTREGADO", "CANCELADO"},
+    "EN_TRANSITO": {"ENTREGADO", "DEVUELTO", "PENDIENTE"},
+    "DEVUELTO": {"PENDIENTE", "CANCELADO"},
+    "ENTREGADO": set(),
+    "CANCELADO": set(),
+}
+
+# Máximo de parámetros por cláusula IN (límite de variables de SQLite)
+TAMANO_LOTE_IN = 900
 
 class EntregaManager:
     """Componente para gestión de entregas (RF05)"""
@@ -11,7 +28,7 @@ class EntregaManager:
     
     def programar_entrega(self, venta_id: int, entrega_data: EntregaCreate) -> Entrega:
         """Programa una entrega (RF05)"""
-        try:
+        def intento():
             # Verificar que la venta existe
             venta = self.db.query(Venta).filter(Venta.id == venta_id).first()
             if not venta:
@@ -30,9 +47,19 @@ class EntregaManager:
                 estado=entrega_data.estado
             )
             self.db.add(entrega)
+            self.db.flush()
+            EventoManager(self.db).registrar(ENTREGA_CREADA, entrega.id, {
+                "entrega_id": entrega.id, "venta_id": venta_id, "fecha_entrega": entrega.fecha_entrega,
+                "direccion": entrega.direccion, "estado": entrega.estado, "transportista": entrega.transportista
+            })
             self.db.commit()
             self.db.refresh(entrega)
             return entrega
+        
+        try:
+            return ejecutar_transaccion(self.db, "programar_entrega", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error programando entrega: {e}")
@@ -48,19 +75,105 @@ class EntregaManager:
     
     def actualizar_estado_entrega(self, entrega_id: int, estado: str) -> bool:
         """Actualiza el estado de una entrega (RF05)"""
-        try:
-            entrega = self.db.query(Entrega).filter(Entrega.id == entrega_id).first()
+        def aplicar(db):
+            entrega = db.query(Entrega).filter(Entrega.id == entrega_id).first()
             if not entrega:
                 return False
             
+            if entrega.estado != estado:
+                EventoManager(db).registrar_estado_entrega(entrega.id, estado, entrega.estado)
             entrega.estado = estado
-            self.db.commit()
             return True
+        
+        try:
+            return ejecutar_escritura(self.db, "actualizar_estado_entrega", aplicar)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error actualizando estado de entrega: {e}")
             return False
 
+    def actualizar_estados_entregas(self, cambios: List[tuple]) -> List[dict]:
+        """Aplica en lote transiciones de estado (entrega_id, estado) en una transacción (RF05)
+        
+        Los cambios se validan en orden contra TRANSICIONES_ENTREGA, de modo que
+        un mismo lote puede llevar una entrega de PENDIENTE a EN_TRANSITO y luego
+        a ENTREGADO. Las actualizaciones se agrupan por (estado anterior, estado
+        final) en UPDATEs por conjuntos. Una entrega que otra transacción cambió
+        entre la lectura y el UPDATE se informa como CONFLICTO y no genera
+        evento. Retorna el resultado de cada cambio.
+        """
+        def intento():
+            ids = list({entrega_id for entrega_id, _ in cambios})
+            estados_originales = {}
+            for i in range(0, len(ids), TAMANO_LOTE_IN):
+                filas = self.db.query(Entrega.id, Entrega.estado).filter(
+                    Entrega.id.in_(ids[i:i + TAMANO_LOTE_IN])
+                ).all()
+                estados_originales.update(dict(filas))
+            
+            # Validar las transiciones en memoria, en el orden recibido
+            estados = dict(estados_originales)
+            resultados = []
+            for entrega_id, estado in cambios:
+                resultado = {"entrega_id": entrega_id, "estado": estado}
+                if entrega_id not in estados:
+                    resultado["resultado"] = "NO_ENCONTRADA"
+                elif estados[entrega_id] == estado:
+                    resultado["resultado"] = "SIN_CAMBIO"
+                elif estado not in TRANSICIONES_ENTREGA.get(estados[entrega_id], set()):
+                    resultado["resultado"] = "TRANSICION_INVALIDA"
+                    resultado["estado_actual"] = estados[entrega_id]
+                else:
+                    resultado["resultado"] = "ACTUALIZADA"
+                    resultado["estado_anterior"] = estados[entrega_id]
+                    estados[entrega_id] = estado
+                resultados.append(resultado)
+            
+            # Agrupar por (estado original, estado final) para UPDATEs por conjuntos
+            grupos = {}
+            for entrega_id, estado in estados.items():
+                if estado != estados_originales[entrega_id]:
+                    grupos.setdefault((estados_originales[entrega_id], estado), []).append(entrega_id)
+            
+            conflictos = set()
+            for (estado_anterior, estado_final), grupo in grupos.items():
+                for i in range(0, len(grupo), TAMANO_LOTE_IN):
+                    bloque = grupo[i:i + TAMANO_LOTE_IN]
+                    # La condición sobre el estado anterior detecta cambios concurrentes posteriores a
+                    # la lectura; RETURNING dice exactamente qué filas cambió este UPDATE. Una entrega
+                    # que otra transacción ya llevó al mismo estado final también es un conflicto
+                    aplicadas = set(self.db.execute(
+                        update(Entrega)
+                        .where(Entrega.id.in_(bloque), Entrega.estado == estado_anterior)
+                        .values(estado=estado_final, version=Entrega.version + 1)
+                        .returning(Entrega.id)
+                        .execution_options(synchronize_session=False)
+                    ).scalars())
+                    conflictos.update(set(bloque) - aplicadas)
+            
+            eventos = EventoManager(self.db)
+            for resultado in resultados:
+                if resultado["resultado"] == "ACTUALIZADA":
+                    if resultado["entrega_id"] in conflictos:
+                        resultado["resultado"] = "CONFLICTO"
+                    else:
+                        eventos.registrar_estado_entrega(resultado["entrega_id"], resultado["estado"],
+                                                         resultado["estado_anterior"])
+            
+            self.db.commit()
+            return resultados
+        
+        try:
+            return ejecutar_transaccion(self.db, "actualizar_estados_entregas", intento)
+        except ConflictoConcurrencia:
+            raise
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error actualizando estados de entregas en lote: {e}")
+            return None
+
 class LogisticaManager:
     """Componente para gestión de logística (RF05)"""
     
@@ -83,14 +196,20 @@ class LogisticaManager:
     
     def confirmar_entrega(self, entrega_id: int) -> bool:
         """Confirma una entrega (RF05)"""
-        try:
-            entrega = self.db.query(Entrega).filter(Entrega.id == entrega_id).first()
+        def aplicar(db):
+            entrega = db.query(Entrega).filter(Entrega.id == entrega_id).first()
             if not entrega:
                 return False
             
+            if entrega.estado != "ENTREGADO":
+                EventoManager(db).registrar_estado_entrega(entrega.id, "ENTREGADO", entrega.estado)
             entrega.estado = "ENTREGADO"
-            self.db.commit()
             return True
+        
+        try:
+            return ejecutar_escritura(self.db, "confirmar_entrega", aplicar)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error confirmando entrega: {e}")
@@ -98,4 +217,48 @@ class LogisticaManager:
     
     def consultar_entregas_por_fecha(self, fecha: date):
         """Consulta entregas por fecha (RF05)"""
-        return self.db.query(Entrega).filter(Entrega.fecha_entrega == fecha).all() 
\ No newline at end of file
+        return self.db.query(Entrega).filter(Entrega.fecha_entrega == fecha).all()
+    
+    def consultar_entregas_por_fecha_resumen(self, fecha: date):
+        """Entregas de una fecha como filas de solo lectura, sin dirección (RF05)"""
+        return self.db.execute(
+            select(Entrega.id, Entrega.venta_id, Entrega.fecha_entrega, Entrega.estado)
+            .where(Entrega.fecha_entrega == fecha)
+        ).all()
+    
+    def _filtrar_rango(self, consulta, desde: date, hasta: date,
+                       estados: Optional[List[str]] = None, transportista: Optional[str] = None):
+        """Aplica los filtros de rango, estado y transportista a una consulta de entregas"""
+        consulta = consulta.filter(Entrega.fecha_entrega.between(desde, hasta))
+        if estados:
+            consulta = consulta.filter(Entrega.estado.in_(estados))
+        if transportista:
+            consulta = consulta.filter(Entrega.transportista == transportista)
+        return consulta
+    
+    def consultar_entregas_por_rango(self, desde: date, hasta: date, estados: Optional[List[str]] = None,
+                                     transportista: Optional[str] = None, pagina: int = 1,
+                                     tamano_pagina: int = 50):
+        """Consulta entregas en un rango de fechas, paginadas (RF05)
+        
+        Retorna una tupla (entregas de la página, total de entregas que cumplen el filtro).
+        """
+        consulta = self._filtrar_rango(self.db.query(Entrega), desde, hasta, estados, transportista)
+        total = consulta.order_by(None).count()
+        entregas = (
+            consulta.order_by(Entrega.fecha_entrega, Entrega.id)
+            .offset((pagina - 1) * tamano_pagina)
+            .limit(tamano_pagina)
+            .all()
+        )
+        return entregas, total
+    
+    def contar_entregas_por_dia_y_estado(self, desde: date, hasta: date, transportista: Optional[str] = None):
+        """Cuenta entregas por día y estado en un rango con una sola consulta (RF05)"""
+        consulta = self.db.query(Entrega.fecha_entrega, Entrega.estado, func.count(Entrega.id))
+        consulta = self._filtrar_rango(consulta, desde, hasta, transportista=transportista)
+        return (
+            consulta.group_by(Entrega.fecha_entrega, Entrega.estado)
+            .order_by(Entrega.fecha_entrega, Entrega.estado)
+            .all()
+        )
\ No newline at end of file
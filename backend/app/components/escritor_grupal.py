@@ -0,0 +1,195 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, TypeVar
+from sqlalchemy.orm import Session
+from ..models.database import get_sessionmaker
+from ..monitoreo.metricas import registro
+from .transacciones import (
+    MAX_INTENTOS_TRANSACCION, ConflictoConcurrencia, ejecutar_transaccion, espera_backoff, motivo_reintentable
+)
+
+# Commit agrupado de escrituras pequeñas (desactivado por defecto)
+COMMIT_GRUPAL = os.environ.get("POLIMARKET_COMMIT_GRUPAL", "0") == "1"
+COMMIT_GRUPAL_MAX_LOTE = int(os.environ.get("POLIMARKET_COMMIT_GRUPAL_MAX_LOTE", "64"))
+COMMIT_GRUPAL_MAX_ESPERA_MS = float(os.environ.get("POLIMARKET_COMMIT_GRUPAL_MAX_ESPERA_MS", "2"))
+
+T = TypeVar("T")
+
+class _Pendiente:
+    __slots__ = ("operacion", "unidad", "futuro", "encolada")
+
+    def __init__(self, operacion: str, unidad: Callable[[Session], object]):
+        self.operacion = operacion
+        self.unidad = unidad
+        self.futuro = Future()
+        self.encolada = time.perf_counter()
+
+class _UnidadFallida(Exception):
+    """Una unidad del lote falló sin SAVEPOINT propio; hay que repetir el lote aislando cada unidad"""
+
+class EscritorGrupal:
+    """Hilo escritor que agrupa unidades de trabajo de muchas peticiones en un solo commit.
+
+    Cada petición encola su unidad (una función que recibe la sesión del
+    escritor, lee y modifica sin hacer commit) y espera. El hilo toma la
+    primera unidad de la cola, junta las que lleguen durante `max_espera_ms`
+    (hasta `max_lote`) y las ejecuta en una sola transacción. Si una unidad
+    falla, el lote se repite con un SAVEPOINT por unidad para que solo se
+    deshaga esa. Tras el COMMIT compartido responde a todas las peticiones del
+    lote. Así, N escrituras pagan un solo commit (y un solo fsync) en lugar de N.
+    """
+
+    def __init__(self, fabrica_sesiones=None, max_lote: int = COMMIT_GRUPAL_MAX_LOTE,
+                 max_espera_ms: float = COMMIT_GRUPAL_MAX_ESPERA_MS):
+        self.fabrica_sesiones = fabrica_sesiones or get_sessionmaker()
+        self.max_lote = max_lote
+        self.max_espera_ms = max_espera_ms
+        self._cola = queue.Queue()
+        self._hilo = None
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None
+
+    def iniciar(self, fabrica_sesiones=None):
+        if self._hilo is not None:
+            return
+        if fabrica_sesiones is not None:
+            self.fabrica_sesiones = fabrica_sesiones
+        self._hilo = threading.Thread(target=self._ciclo, name="escritor-grupal", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """Procesa lo que quede en la cola y detiene el hilo"""
+        if self._hilo is None:
+            return
+        hilo, self._hilo = self._hilo, None
+        self._cola.put(None)
+        hilo.join(timeout=30)
+        # Unidades encoladas por peticiones que vieron el escritor activo justo antes de detenerlo
+        restantes = []
+        while True:
+            try:
+                pendiente = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if pendiente is not None:
+                restantes.append(pendiente)
+        if restantes:
+            self._ejecutar(restantes)
+
+    def enviar(self, operacion: str, unidad: Callable[[Session], T]) -> T:
+        """Encola la unidad y bloquea hasta el commit del lote; retorna su resultado o relanza su error"""
+        pendiente = _Pendiente(operacion, unidad)
+        self._cola.put(pendiente)
+        return pendiente.futuro.result()
+
+    def _ciclo(self):
+        terminar = False
+        while not terminar:
+            primera = self._cola.get()
+            if primera is None:
+                break
+            lote = [primera]
+            limite = time.monotonic() + self.max_espera_ms / 1000
+            while len(lote) < self.max_lote:
+                try:
+                    siguiente = self._cola.get(timeout=max(limite - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if siguiente is None:
+                    terminar = True
+                    break
+                lote.append(siguiente)
+            self._ejecutar(lote)
+
+    def _ejecutar(self, lote: list):
+        """Ejecuta el lote en una transacción, repitiéndolo completo ante errores transitorios"""
+        aislar = False
+        intento = 1
+        while True:
+            registro.incrementar("polimarket_transacciones_total", operacion="commit_grupal")
+            db = self.fabrica_sesiones()
+            try:
+                resultados = self._aplicar(db, lote, aislar)
+                db.commit()
+                break
+            except _UnidadFallida:
+                # Alguna unidad falló: se repite el lote con un SAVEPOINT por unidad para aislarla
+                db.rollback()
+                aislar = True
+            except Exception as error:
+                db.rollback()
+                motivo = motivo_reintentable(error)
+                if motivo is None or intento == MAX_INTENTOS_TRANSACCION:
+                    if motivo is not None:
+                        registro.incrementar("polimarket_transacciones_agotadas_total",
+                                             operacion="commit_grupal", motivo=motivo)
+                        error = ConflictoConcurrencia("commit_grupal", intento, motivo)
+                    for pendiente in lote:
+                        pendiente.futuro.set_exception(error)
+                    return
+                registro.incrementar("polimarket_transacciones_reintentos_total",
+                                     operacion="commit_grupal", motivo=motivo)
+                time.sleep(espera_backoff(intento))
+                intento += 1
+            finally:
+                db.close()
+
+        fin = time.perf_counter()
+        registro.observar("polimarket_commit_grupal_tamano_lote", len(lote))
+        for pendiente, valor, error in resultados:
+            registro.observar("polimarket_commit_grupal_espera_seconds", fin - pendiente.encolada,
+                              operacion=pendiente.operacion)
+            if error is None:
+                pendiente.futuro.set_result(valor)
+            else:
+                pendiente.futuro.set_exception(error)
+
+    def _aplicar(self, db: Session, lote: list, aislar: bool) -> list:
+        """Ejecuta las unidades del lote; con `aislar`, cada una en su SAVEPOINT.
+
+        Sin `aislar` (el caso normal) no hay SAVEPOINT por unidad: si una unidad
+        falla se lanza _UnidadFallida y el lote se repite aislado. Los errores
+        transitorios abortan el lote entero en ambos casos.
+        """
+        if db.get_bind().dialect.name == "sqlite":
+            # pysqlite no abre la transacción antes de un SAVEPOINT, y un RELEASE sin transacción
+            # externa haría commit. BEGIN IMMEDIATE la abre y toma el lock de escritura de una vez
+            db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+        resultados = []
+        for pendiente in lote:
+            try:
+                if aislar:
+                    with db.begin_nested():
+                        valor = pendiente.unidad(db)
+                else:
+                    valor = pendiente.unidad(db)
+                    db.flush()
+                resultados.append((pendiente, valor, None))
+            except Exception as error:
+                if motivo_reintentable(error) is not None:
+                    raise
+                if not aislar:
+                    raise _UnidadFallida() from error
+                resultados.append((pendiente, None, error))
+        return resultados
+
+escritor_grupal = EscritorGrupal()
+
+def ejecutar_escritura(db: Session, operacion: str, aplicar: Callable[[Session], T]) -> T:
+    """Ejecuta una escritura pequeña: por el escritor grupal si está activo, si no con su propio commit.
+
+    `aplicar` recibe la sesión en la que debe trabajar y no hace commit.
+    """
+    if escritor_grupal.activo:
+        return escritor_grupal.enviar(operacion, aplicar)
+
+    def intento():
+        resultado = aplicar(db)
+        db.commit()
+        return resultado
+    return ejecutar_transaccion(db, operacion, intento)
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import threading
+from typing import List, Optional
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from ..models.entities import Evento, Inventario
+
+# Cada cuánto un long-poll vuelve a consultar la tabla aunque nadie lo despierte
+# (eventos escritos por otros workers, que no comparten el aviso en memoria)
+INTERVALO_SONDEO_EVENTOS_S = float(os.environ.get("POLIMARKET_INTERVALO_SONDEO_EVENTOS_S", "1"))
+
+# Tipos de evento del outbox
+INVENTARIO_ACTUALIZADO = "inventario_actualizado"
+VENTA_CREADA = "venta_creada"
+ENTREGA_CREADA = "entrega_creada"
+ENTREGA_ESTADO = "entrega_estado"
+
+def _resolver(futuro: asyncio.Future):
+    if not futuro.done():
+        futuro.set_result(None)
+
+class AvisoEventos:
+    """Despierta a los long-polls de este worker cuando se confirma una transacción con eventos.
+
+    `secuencia` aumenta en cada aviso. Un long-poll la lee antes de consultar
+    la tabla y espera con ese valor: si hubo un commit entre la consulta y la
+    espera, `esperar` retorna de inmediato en lugar de perder el aviso.
+    """
+
+    def __init__(self):
+        self.secuencia = 0
+        self._candado = threading.Lock()
+        self._esperas = {}
+
+    def notificar(self):
+        """Llamado desde cualquier hilo tras el commit"""
+        with self._candado:
+            self.secuencia += 1
+            esperas, self._esperas = self._esperas, {}
+        for futuro, loop in esperas.items():
+            try:
+                loop.call_soon_threadsafe(_resolver, futuro)
+            except RuntimeError:
+                pass  # El event loop ya se cerró
+
+    async def esperar(self, secuencia_vista: int, timeout: float) -> bool:
+        """Espera un aviso posterior a `secuencia_vista`; False si se cumplió el timeout"""
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        with self._candado:
+            if self.secuencia != secuencia_vista:
+                return True
+            self._esperas[futuro] = loop
+        try:
+            await asyncio.wait_for(futuro, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._candado:
+                self._esperas.pop(futuro, None)
+
+aviso_eventos = AvisoEventos()
+
+@event.listens_for(Session, "after_commit")
+def _avisar_eventos(sesion):
+    if sesion.info.pop("eventos_pendientes", False):
+        aviso_eventos.notificar()
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_aviso(sesion):
+    sesion.info.pop("eventos_pendientes", None)
+
+class EventoManager:
+    """Componente del outbox de eventos de cambio de inventario, ventas y entregas (RF03, RF05)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def registrar(self, tipo: str, entidad_id: int, datos: dict):
+        """Agrega un evento a la transacción en curso, sin hacer commit.
+
+        El evento se confirma o se deshace junto con el cambio que describe,
+        así que un consumidor nunca ve un evento de un cambio que no ocurrió
+        ni se pierde uno de un cambio confirmado.
+        """
+        self.db.add(Evento(tipo=tipo, entidad_id=entidad_id, datos=json.dumps(datos, default=str)))
+        self.db.info["eventos_pendientes"] = True
+
+    def registrar_inventario(self, inventario: Inventario, cantidad: int, origen: str):
+        """Evento con el stock resultante de un producto tras sumarle `cantidad`"""
+        self.registrar(INVENTARIO_ACTUALIZADO, inventario.producto_id, {
+            "producto_id": inventario.producto_id,
+            "cantidad": cantidad,
+            "cantidad_disponible": inventario.cantidad_disponible,
+            "cantidad_minima": inventario.cantidad_minima,
+            "bajo_stock": inventario.cantidad_disponible <= inventario.cantidad_minima,
+            "origen": origen
+        })
+
+    def registrar_estado_entrega(self, entrega_id: int, estado: str, estado_anterior: Optional[str]):
+        """Evento de cambio de estado de una entrega"""
+        self.registrar(ENTREGA_ESTADO, entrega_id, {
+            "entrega_id": entrega_id,
+            "estado": estado,
+            "estado_anterior": estado_anterior
+        })
+
+    def listar_eventos(self, despues: int, limite: int = 100, tipos: Optional[List[str]] = None):
+        """Eventos con id mayor que el cursor `despues`, en orden de commit (RF03, RF05)
+
+        Los ids los asigna SQLite bajo el lock de escritura, así que crecen en
+        el mismo orden en que se confirman las transacciones: un consumidor que
+        guarda el último id leído no salta ni repite eventos.
+        """
+        consulta = (
+            select(Evento.id, Evento.tipo, Evento.entidad_id, Evento.datos, Evento.creado)
+            .where(Evento.id > despues)
+            .order_by(Evento.id)
+            .limit(limite)
+        )
+        if tipos:
+            consulta = consulta.where(Evento.tipo.in_(tipos))
+        return self.db.execute(consulta).all()
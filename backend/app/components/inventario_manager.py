@@ -1,6 +1,10 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from ..models.entities import Inventario, Producto
 from ..models.schemas import InventarioCreate, ProductoCreate
+from .escritor_grupal import ejecutar_escritura
+from .evento_manager import EventoManager
+from .transacciones import ConflictoConcurrencia, ejecutar_transaccion
 
 class InventarioManager:
     """Componente para gestión de inventario (RF03)"""
@@ -19,14 +23,19 @@ class InventarioManager:
     
     def actualizar_stock(self, producto_id: int, cantidad: int) -> bool:
         """Actualiza el stock de un producto (RF03)"""
-        try:
-            inventario = self.db.query(Inventario).filter(Inventario.producto_id == producto_id).first()
+        def aplicar(db):
+            inventario = db.query(Inventario).filter(Inventario.producto_id == producto_id).first()
             if not inventario:
                 return False
             
             inventario.cantidad_disponible += cantidad
-            self.db.commit()
+            EventoManager(db).registrar_inventario(inventario, cantidad, "ajuste")
             return True
+        
+        try:
+            return ejecutar_escritura(self.db, "actualizar_stock", aplicar)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error actualizando stock: {e}")
@@ -46,7 +55,7 @@ class ProductoManager:
     
     def crear_producto(self, producto_data: ProductoCreate) -> Producto:
         """Crea un nuevo producto (RF03)"""
-        try:
+        def intento():
             producto = Producto(
                 nombre=producto_data.nombre,
                 descripcion=producto_data.descripcion,
@@ -58,6 +67,11 @@ class ProductoManager:
             self.db.commit()
             self.db.refresh(producto)
             return producto
+        
+        try:
+            return ejecutar_transaccion(self.db, "crear_producto", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error creando producto: {e}")
@@ -71,6 +85,12 @@ class ProductoManager:
         """Lista todos los productos (RF03)"""
         return self.db.query(Producto).all()
     
+    def listar_productos_resumen(self):
+        """Lista los productos como filas de solo lectura con los campos del listado (RF03)"""
+        return self.db.execute(
+            select(Producto.id, Producto.nombre, Producto.descripcion, Producto.precio, Producto.categoria)
+        ).all()
+    
     def buscar_productos_por_categoria(self, categoria: str):
         """Busca productos por categoría (RF03)"""
         return self.db.query(Producto).filter(Producto.categoria == categoria).all() 
\ No newline at end of file
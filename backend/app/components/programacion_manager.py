@@ -0,0 +1,197 @@
+import re
+import zlib
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+from ..models.entities import Entrega
+from .transacciones import ConflictoConcurrencia, ejecutar_transaccion
+
+# Capacidad diaria (entregas por día) de cada transportista
+TRANSPORTISTAS = {
+    "Servientrega": 120,
+    "Coordinadora": 100,
+    "Interrapidísimo": 80,
+}
+
+# Días hacia adelante en los que se busca cupo para una entrega nueva
+HORIZONTE_DIAS = 7
+
+# Estados que ocupan cupo de un transportista en su día de entrega
+ESTADOS_CON_CUPO = ("PENDIENTE", "EN_TRANSITO")
+
+_VIA = re.compile(r"\b(calle|cl|carrera|cra|kr|avenida|av|diagonal|dg|transversal|tv)\.?\s*(\d+)", re.IGNORECASE)
+
+def zona_direccion(direccion: Optional[str]):
+    """Retorna (ciudad, zona) de una dirección tipo "Calle 45 #67-89, Bogotá".
+
+    La zona agrupa las vías en bandas de 10 números para que direcciones
+    cercanas queden en el mismo balde.
+    """
+    if not direccion:
+        return ("", "")
+    partes = direccion.rsplit(",", 1)
+    ciudad = partes[1].strip().lower() if len(partes) == 2 else ""
+    via = _VIA.search(partes[0])
+    zona = f"{via.group(1).lower()[:2]} {int(via.group(2)) // 10 * 10}" if via else ""
+    return (ciudad, zona)
+
+class _DiasLibres:
+    """Primer día con cupo a partir de un día dado (union-find con compresión de caminos)"""
+
+    def __init__(self, capacidades: List[int]):
+        self.capacidades = capacidades
+        self.siguiente = list(range(len(capacidades) + 1))
+        for dia, capacidad in enumerate(capacidades):
+            if capacidad <= 0:
+                self.siguiente[dia] = dia + 1
+
+    def buscar(self, dia: int) -> int:
+        raiz = dia
+        while self.siguiente[raiz] != raiz:
+            raiz = self.siguiente[raiz]
+        while self.siguiente[dia] != raiz:
+            self.siguiente[dia], dia = raiz, self.siguiente[dia]
+        return raiz
+
+    def ocupar(self, dia: int):
+        self.capacidades[dia] -= 1
+        if self.capacidades[dia] <= 0:
+            self.siguiente[dia] = dia + 1
+
+def asignar_rutas(entregas: List[tuple], desde: date, dias: int, transportistas: Dict[str, int],
+                  carga: Dict[tuple, int] = None) -> List[dict]:
+    """Asigna entregas a transportistas y días respetando la capacidad diaria.
+
+    `entregas` es una lista de tuplas (id, fecha_lista, direccion), donde
+    fecha_lista es el primer día en que puede entregarse. `carga` indica las
+    entregas ya asignadas por (transportista, fecha). Las entregas se agrupan
+    en baldes por ciudad y zona; cada ciudad tiene un transportista
+    preferido (hash estable) y los baldes se empacan en orden con first-fit
+    sobre los días, pasando al siguiente transportista cuando no hay cupo.
+    Retorna las asignaciones {"id", "transportista", "fecha_entrega"}.
+    """
+    nombres = list(transportistas)
+    if not nombres or dias <= 0:
+        return []
+    carga = carga or {}
+    libres = []
+    for nombre in nombres:
+        capacidades = [
+            transportistas[nombre] - carga.get((nombre, desde + timedelta(days=d)), 0)
+            for d in range(dias)
+        ]
+        libres.append(_DiasLibres(capacidades))
+
+    baldes = {}
+    for entrega_id, fecha_lista, direccion in entregas:
+        dia = max((fecha_lista - desde).days, 0)
+        if dia < dias:
+            baldes.setdefault(zona_direccion(direccion), []).append((dia, entrega_id))
+
+    fechas = [desde + timedelta(days=d) for d in range(dias)]
+    asignaciones = []
+    for (ciudad, zona), balde in sorted(baldes.items()):
+        inicio = zlib.crc32(ciudad.encode()) % len(nombres)
+        preferencia = range(inicio, inicio + len(nombres))
+        balde.sort()
+        for dia, entrega_id in balde:
+            mejor = None
+            for i in preferencia:
+                t = i % len(nombres)
+                libre = libres[t].buscar(dia)
+                # Se prefiere el día más temprano; a igual día, el transportista preferido
+                if libre < dias and (mejor is None or libre < mejor[1]):
+                    mejor = (t, libre)
+                    if libre == dia:
+                        break
+            if mejor is None:
+                continue
+            t, libre = mejor
+            libres[t].ocupar(libre)
+            asignaciones.append({
+                "id": entrega_id,
+                "transportista": nombres[t],
+                "fecha_entrega": fechas[libre]
+            })
+    return asignaciones
+
+class ProgramacionManager:
+    """Componente para programación de entregas por transportista y día (RF05)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _carga_actual(self, desde: date, hasta: date) -> Dict[tuple, int]:
+        """Entregas ya asignadas por (transportista, fecha) en el rango"""
+        filas = self.db.query(Entrega.transportista, Entrega.fecha_entrega, func.count(Entrega.id)).filter(
+            Entrega.estado.in_(ESTADOS_CON_CUPO),
+            Entrega.fecha_entrega.between(desde, hasta),
+            Entrega.transportista.isnot(None)
+        ).group_by(Entrega.transportista, Entrega.fecha_entrega).all()
+        return {(transportista, fecha): cantidad for transportista, fecha, cantidad in filas}
+
+    def programar_entregas(self, desde: date, hasta: date, transportistas: Dict[str, int] = None,
+                           entrega_ids: List[int] = None):
+        """Asigna transportista y día a las entregas pendientes sin asignar (RF05)
+
+        Solo procesa entregas PENDIENTE sin transportista cuya fecha de entrega
+        es anterior o igual a `hasta`, por lo que puede ejecutarse de forma
+        incremental a medida que llegan ventas. Retorna un resumen o None si
+        ocurre un error.
+        """
+        transportistas = transportistas or TRANSPORTISTAS
+
+        def intento():
+            consulta = self.db.query(Entrega.id, Entrega.fecha_entrega, Entrega.direccion).filter(
+                Entrega.estado == "PENDIENTE",
+                Entrega.transportista.is_(None),
+                Entrega.fecha_entrega <= hasta
+            )
+            if entrega_ids is not None:
+                consulta = consulta.filter(Entrega.id.in_(entrega_ids))
+            pendientes = consulta.all()
+            if not pendientes:
+                return {"asignadas": 0, "sin_cupo": 0, "conflictos": 0}
+
+            dias = (hasta - desde).days + 1
+            asignaciones = asignar_rutas(
+                pendientes, desde, dias, transportistas, self._carga_actual(desde, hasta)
+            )
+            asignadas = 0
+            if asignaciones:
+                # UPDATE por clave primaria en lote (executemany). Repite el filtro de la lectura
+                # para no pisar entregas que otra transacción asignó o cambió de estado, e
+                # incrementa la versión como lo haría el ORM
+                tabla = Entrega.__table__
+                asignar = (
+                    update(tabla)
+                    .where(tabla.c.id == bindparam("b_id"), tabla.c.estado == "PENDIENTE",
+                           tabla.c.transportista.is_(None))
+                    .values(transportista=bindparam("b_transportista"),
+                            fecha_entrega=bindparam("b_fecha_entrega"), version=tabla.c.version + 1)
+                )
+                asignadas = self.db.execute(asignar, [
+                    {"b_id": a["id"], "b_transportista": a["transportista"], "b_fecha_entrega": a["fecha_entrega"]}
+                    for a in asignaciones
+                ]).rowcount
+            self.db.commit()
+            return {"asignadas": asignadas, "sin_cupo": len(pendientes) - len(asignaciones),
+                    "conflictos": len(asignaciones) - asignadas}
+
+        try:
+            return ejecutar_transaccion(self.db, "programar_entregas", intento)
+        except ConflictoConcurrencia:
+            raise
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error programando entregas: {e}")
+            return None
+
+    def programar_entrega_nueva(self, entrega: Entrega):
+        """Asigna transportista a una entrega recién creada dentro del horizonte (RF05)"""
+        return self.programar_entregas(
+            entrega.fecha_entrega,
+            entrega.fecha_entrega + timedelta(days=HORIZONTE_DIAS - 1),
+            entrega_ids=[entrega.id]
+        )
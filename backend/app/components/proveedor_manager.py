@@ -1,8 +1,11 @@
 from datetime import date
 from decimal import Decimal
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
 from ..models.entities import Proveedor, Compra, DetalleCompra, Producto, Inventario
 from ..models.schemas import ProveedorCreate, CompraCreate
+from .evento_manager import EventoManager
+from .transacciones import ConflictoConcurrencia, ejecutar_transaccion
 
 class ProveedorManager:
     """Componente para gestión de proveedores (RF04)"""
@@ -12,7 +15,7 @@ class ProveedorManager:
     
     def crear_proveedor(self, proveedor_data: ProveedorCreate) -> Proveedor:
         """Crea un nuevo proveedor (RF04)"""
-        try:
+        def intento():
             proveedor = Proveedor(
                 tipo_documento=proveedor_data.tipo_documento,
                 documento=proveedor_data.documento,
@@ -26,6 +29,11 @@ class ProveedorManager:
             self.db.commit()
             self.db.refresh(proveedor)
             return proveedor
+        
+        try:
+            return ejecutar_transaccion(self.db, "crear_proveedor", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error creando proveedor: {e}")
@@ -41,7 +49,7 @@ class ProveedorManager:
     
     def actualizar_proveedor(self, proveedor_id: int, proveedor_data: ProveedorCreate) -> bool:
         """Actualiza un proveedor (RF04)"""
-        try:
+        def intento():
             proveedor = self.db.query(Proveedor).filter(Proveedor.id == proveedor_id).first()
             if not proveedor:
                 return False
@@ -56,6 +64,11 @@ class ProveedorManager:
             
             self.db.commit()
             return True
+        
+        try:
+            return ejecutar_transaccion(self.db, "actualizar_proveedor", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error actualizando proveedor: {e}")
@@ -63,7 +76,7 @@ class ProveedorManager:
     
     def eliminar_proveedor(self, proveedor_id: int) -> bool:
         """Elimina un proveedor (RF04)"""
-        try:
+        def intento():
             proveedor = self.db.query(Proveedor).filter(Proveedor.id == proveedor_id).first()
             if not proveedor:
                 return False
@@ -76,6 +89,11 @@ class ProveedorManager:
             self.db.delete(proveedor)
             self.db.commit()
             return True
+        
+        try:
+            return ejecutar_transaccion(self.db, "eliminar_proveedor", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error eliminando proveedor: {e}")
@@ -93,7 +111,7 @@ class CompraManager:
     
     def registrar_compra(self, compra_data: CompraCreate) -> Compra:
         """Registra una nueva compra (RF04)"""
-        try:
+        def intento():
             # Verificar que el proveedor existe
             proveedor = self.db.query(Proveedor).filter(Proveedor.id == compra_data.proveedor_id).first()
             if not proveedor:
@@ -144,6 +162,11 @@ class CompraManager:
             self.db.refresh(compra)
             return compra
             
+        
+        try:
+            return ejecutar_transaccion(self.db, "registrar_compra", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error registrando compra: {e}")
@@ -153,69 +176,92 @@ class CompraManager:
         """Consulta una compra por ID (RF04)"""
         return self.db.query(Compra).filter(Compra.id == compra_id).first()
     
+    def consultar_compra_detalle(self, compra_id: int) -> Compra:
+        """Consulta una compra con su proveedor, sus líneas y el producto de cada línea (RF04)
+
+        Siempre emite dos consultas, sin importar cuántas líneas tenga la compra.
+        """
+        return self.db.execute(
+            select(Compra)
+            .options(joinedload(Compra.proveedor),
+                     selectinload(Compra.detalles).joinedload(DetalleCompra.producto))
+            .where(Compra.id == compra_id)
+        ).scalar_one_or_none()
+    
     def listar_compras_por_proveedor(self, proveedor_id: int):
         """Lista compras por proveedor (RF04)"""
         return self.db.query(Compra).filter(Compra.proveedor_id == proveedor_id).all()
     
+    def listar_compras_por_proveedor_resumen(self, proveedor_id: int):
+        """Compras de un proveedor como filas de solo lectura con los campos del listado (RF04)"""
+        return self.db.execute(
+            select(Compra.id, Compra.fecha_compra, Compra.fecha_entrega, Compra.total, Compra.estado,
+                   Compra.numero_orden)
+            .where(Compra.proveedor_id == proveedor_id)
+        ).all()
+    
     def listar_compras_pendientes(self):
         """Lista compras pendientes (RF04)"""
         return self.db.query(Compra).filter(Compra.estado == "PENDIENTE").all()
     
     def actualizar_estado_compra(self, compra_id: int, estado: str) -> bool:
-        """Actualiza el estado de una compra (RF04)"""
-        try:
+        """Actualiza el estado de una compra (RF04)
+        
+        El cambio de estado y el ingreso al inventario van en la misma
+        transacción; si la compra o alguna fila de inventario cambió en otra
+        transacción, se relee todo y se reintenta. Una compra ya RECIBIDA no
+        vuelve a sumar su mercancía al inventario.
+        """
+        def intento():
             compra = self.db.query(Compra).filter(Compra.id == compra_id).first()
             if not compra:
                 return False
             
+            # Si la compra pasa a recibida, actualizar inventario
+            if estado == "RECIBIDA" and compra.estado != "RECIBIDA":
+                self._actualizar_inventario_por_compra(compra)
             compra.estado = estado
             
-            # Si la compra se marca como recibida, actualizar inventario
-            if estado == "RECIBIDA":
-                self._actualizar_inventario_por_compra(compra_id)
-            
             self.db.commit()
             return True
+        
+        try:
+            return ejecutar_transaccion(self.db, "actualizar_estado_compra", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error actualizando estado de compra: {e}")
             return False
     
-    def _actualizar_inventario_por_compra(self, compra_id: int):
-        """Actualiza el inventario cuando se recibe una compra (RF04)"""
-        try:
-            compra = self.db.query(Compra).filter(Compra.id == compra_id).first()
-            if not compra:
-                return
-            
-            for detalle in compra.detalles:
-                # Buscar o crear inventario para el producto
-                inventario = self.db.query(Inventario).filter(Inventario.producto_id == detalle.producto_id).first()
-                if inventario:
-                    inventario.cantidad_disponible += detalle.cantidad
-                else:
-                    # Crear nuevo inventario si no existe
-                    inventario = Inventario(
-                        producto_id=detalle.producto_id,
-                        cantidad_disponible=detalle.cantidad,
-                        cantidad_minima=10,
-                        ubicacion="Bodega Principal"
-                    )
-                    self.db.add(inventario)
-            
-            self.db.commit()
-        except Exception as e:
-            self.db.rollback()
-            print(f"Error actualizando inventario por compra: {e}")
+    def _actualizar_inventario_por_compra(self, compra: Compra):
+        """Suma al inventario las líneas de una compra recibida, sin hacer commit (RF04)"""
+        eventos = EventoManager(self.db)
+        for detalle in compra.detalles:
+            # Buscar o crear inventario para el producto
+            inventario = self.db.query(Inventario).filter(Inventario.producto_id == detalle.producto_id).first()
+            if inventario:
+                inventario.cantidad_disponible += detalle.cantidad
+                eventos.registrar_inventario(inventario, detalle.cantidad, "compra")
+            else:
+                # Crear nuevo inventario si no existe
+                inventario = Inventario(
+                    producto_id=detalle.producto_id,
+                    cantidad_disponible=detalle.cantidad,
+                    cantidad_minima=10,
+                    ubicacion="Bodega Principal"
+                )
+                self.db.add(inventario)
+                eventos.registrar_inventario(inventario, detalle.cantidad, "compra")
     
     def calcular_total_compra(self, compra_id: int) -> Decimal:
         """Calcula el total de una compra (RF04)"""
-        compra = self.db.query(Compra).filter(Compra.id == compra_id).first()
-        if not compra:
-            return Decimal('0.00')
+        lineas = self.db.execute(
+            select(DetalleCompra.precio_compra, DetalleCompra.cantidad).where(DetalleCompra.compra_id == compra_id)
+        ).all()
         
         total = Decimal('0.00')
-        for detalle in compra.detalles:
-            total += detalle.precio_compra * detalle.cantidad
+        for precio_compra, cantidad in lineas:
+            total += precio_compra * cantidad
         
         return total 
\ No newline at end of file
@@ -0,0 +1,213 @@
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import select, delete, func, distinct, literal
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.orm import Session
+from ..models.entities import (
+    Venta, DetalleVenta, Producto, Vendedor,
+    VentaDiariaVendedor, VentaDiariaCategoria, VentaDiariaProducto
+)
+from .transacciones import ConflictoConcurrencia, ejecutar_transaccion
+
+SIN_CATEGORIA = "SIN_CATEGORIA"
+
+def _insert(db: Session, tabla):
+    """Retorna un INSERT con soporte de upsert según el dialecto de la sesión"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(tabla)
+    return sqlite.insert(tabla)
+
+class ReporteManager:
+    """Componente para reportes de ventas basados en agregados diarios (RF02)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _acumular(self, tabla, claves: list, filas: list):
+        """Suma las filas a la tabla de agregados (INSERT ... ON CONFLICT DO UPDATE)"""
+        if not filas:
+            return
+        stmt = _insert(self.db, tabla)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=claves,
+            set_={
+                "numero_ventas": tabla.c.numero_ventas + stmt.excluded.numero_ventas,
+                "unidades": tabla.c.unidades + stmt.excluded.unidades,
+                "total": tabla.c.total + stmt.excluded.total
+            }
+        )
+        self.db.execute(stmt, filas)
+
+    def registrar_venta(self, venta: Venta, lineas: list):
+        """Actualiza los agregados con una venta nueva.
+
+        Debe llamarse antes del commit de la venta para que ambos queden en la
+        misma transacción. `lineas` es una lista de tuplas
+        (producto_id, categoria, cantidad, precio_unitario).
+        """
+        unidades_venta = 0
+        por_producto = {}
+        por_categoria = {}
+        for producto_id, categoria, cantidad, precio in lineas:
+            subtotal = Decimal(precio) * cantidad
+            unidades_venta += cantidad
+
+            unidades, total = por_producto.get(producto_id, (0, Decimal('0.00')))
+            por_producto[producto_id] = (unidades + cantidad, total + subtotal)
+
+            categoria = categoria or SIN_CATEGORIA
+            unidades, total = por_categoria.get(categoria, (0, Decimal('0.00')))
+            por_categoria[categoria] = (unidades + cantidad, total + subtotal)
+
+        self._acumular(VentaDiariaVendedor.__table__, ["fecha", "vendedor_id"], [{
+            "fecha": venta.fecha,
+            "vendedor_id": venta.vendedor_id,
+            "numero_ventas": 1,
+            "unidades": unidades_venta,
+            "total": venta.total
+        }])
+        self._acumular(VentaDiariaCategoria.__table__, ["fecha", "categoria"], [
+            {"fecha": venta.fecha, "categoria": categoria, "numero_ventas": 1,
+             "unidades": unidades, "total": total}
+            for categoria, (unidades, total) in por_categoria.items()
+        ])
+        self._acumular(VentaDiariaProducto.__table__, ["fecha", "producto_id"], [
+            {"fecha": venta.fecha, "producto_id": producto_id, "numero_ventas": 1,
+             "unidades": unidades, "total": total}
+            for producto_id, (unidades, total) in por_producto.items()
+        ])
+
+    def reconstruir_agregados(self, desde: date = None, hasta: date = None) -> bool:
+        """Recalcula los agregados desde ventas y detalles (backfill)"""
+        def intento():
+            subtotal = DetalleVenta.cantidad * DetalleVenta.precio_unitario
+
+            for tabla in (VentaDiariaVendedor, VentaDiariaCategoria, VentaDiariaProducto):
+                borrado = delete(tabla)
+                if desde:
+                    borrado = borrado.where(tabla.fecha >= desde)
+                if hasta:
+                    borrado = borrado.where(tabla.fecha <= hasta)
+                self.db.execute(borrado)
+
+            def _rango(consulta):
+                if desde:
+                    consulta = consulta.where(Venta.fecha >= desde)
+                if hasta:
+                    consulta = consulta.where(Venta.fecha <= hasta)
+                return consulta
+
+            por_vendedor = _rango(
+                select(
+                    Venta.fecha, Venta.vendedor_id,
+                    func.count(distinct(Venta.id)),
+                    func.coalesce(func.sum(DetalleVenta.cantidad), 0),
+                    func.coalesce(func.sum(subtotal), 0)
+                )
+                .select_from(Venta)
+                .outerjoin(DetalleVenta, DetalleVenta.venta_id == Venta.id)
+                .group_by(Venta.fecha, Venta.vendedor_id)
+            )
+            categoria = func.coalesce(Producto.categoria, literal(SIN_CATEGORIA))
+            por_categoria = _rango(
+                select(
+                    Venta.fecha, categoria,
+                    func.count(distinct(Venta.id)),
+                    func.sum(DetalleVenta.cantidad),
+                    func.sum(subtotal)
+                )
+                .select_from(Venta)
+                .join(DetalleVenta, DetalleVenta.venta_id == Venta.id)
+                .join(Producto, Producto.id == DetalleVenta.producto_id)
+                .group_by(Venta.fecha, categoria)
+            )
+            por_producto = _rango(
+                select(
+                    Venta.fecha, DetalleVenta.producto_id,
+                    func.count(distinct(Venta.id)),
+                    func.sum(DetalleVenta.cantidad),
+                    func.sum(subtotal)
+                )
+                .select_from(Venta)
+                .join(DetalleVenta, DetalleVenta.venta_id == Venta.id)
+                .group_by(Venta.fecha, DetalleVenta.producto_id)
+            )
+
+            columnas = ["numero_ventas", "unidades", "total"]
+            self.db.execute(
+                VentaDiariaVendedor.__table__.insert().from_select(
+                    ["fecha", "vendedor_id"] + columnas, por_vendedor
+                )
+            )
+            self.db.execute(
+                VentaDiariaCategoria.__table__.insert().from_select(
+                    ["fecha", "categoria"] + columnas, por_categoria
+                )
+            )
+            self.db.execute(
+                VentaDiariaProducto.__table__.insert().from_select(
+                    ["fecha", "producto_id"] + columnas, por_producto
+                )
+            )
+            self.db.commit()
+            return True
+
+        try:
+            return ejecutar_transaccion(self.db, "reconstruir_agregados", intento)
+        except ConflictoConcurrencia:
+            raise
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error reconstruyendo agregados: {e}")
+            return False
+
+    def _resumen(self, tabla, dimension, desde: date, hasta: date):
+        """Suma los agregados de una tabla en un rango de fechas, por dimensión"""
+        consulta = (
+            select(
+                dimension,
+                func.sum(tabla.numero_ventas).label("numero_ventas"),
+                func.sum(tabla.unidades).label("unidades"),
+                func.sum(tabla.total).label("total")
+            )
+            .where(tabla.fecha >= desde, tabla.fecha <= hasta)
+            .group_by(dimension)
+            .order_by(func.sum(tabla.total).desc())
+        )
+        return consulta
+
+    def ventas_por_dia(self, desde: date, hasta: date):
+        """Ventas totales por día en un rango de fechas (RF02)"""
+        return self.db.execute(
+            self._resumen(VentaDiariaVendedor, VentaDiariaVendedor.fecha, desde, hasta)
+            .order_by(None)
+            .order_by(VentaDiariaVendedor.fecha)
+        ).all()
+
+    def ventas_por_vendedor(self, desde: date, hasta: date):
+        """Ventas por vendedor en un rango de fechas (RF02)"""
+        resumen = self._resumen(
+            VentaDiariaVendedor, VentaDiariaVendedor.vendedor_id, desde, hasta
+        ).subquery()
+        return self.db.execute(
+            select(resumen, Vendedor.nombre)
+            .outerjoin(Vendedor, Vendedor.id == resumen.c.vendedor_id)
+            .order_by(resumen.c.total.desc())
+        ).all()
+
+    def ventas_por_categoria(self, desde: date, hasta: date):
+        """Ventas por categoría en un rango de fechas (RF02)"""
+        return self.db.execute(
+            self._resumen(VentaDiariaCategoria, VentaDiariaCategoria.categoria, desde, hasta)
+        ).all()
+
+    def ventas_por_producto(self, desde: date, hasta: date, limite: int = 50):
+        """Productos más vendidos en un rango de fechas (RF02)"""
+        resumen = self._resumen(
+            VentaDiariaProducto, VentaDiariaProducto.producto_id, desde, hasta
+        ).limit(limite).subquery()
+        return self.db.execute(
+            select(resumen, Producto.nombre)
+            .outerjoin(Producto, Producto.id == resumen.c.producto_id)
+            .order_by(resumen.c.total.desc())
+        ).all()
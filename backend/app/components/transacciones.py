@@ -0,0 +1,80 @@
+import os
+import random
+import time
+from typing import Callable, Optional, TypeVar
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from ..monitoreo.metricas import registro
+
+# Intentos totales de una unidad de trabajo antes de rendirse ante errores transitorios
+MAX_INTENTOS_TRANSACCION = int(os.environ.get("POLIMARKET_MAX_INTENTOS_TRANSACCION", "5"))
+# Backoff exponencial con jitter completo: espera aleatoria en [0, min(max, base * 2^n)]
+BACKOFF_BASE_MS = float(os.environ.get("POLIMARKET_BACKOFF_BASE_MS", "10"))
+BACKOFF_MAX_MS = float(os.environ.get("POLIMARKET_BACKOFF_MAX_MS", "1000"))
+
+# Códigos de SQLite y SQLSTATE de PostgreSQL que se resuelven repitiendo la transacción
+_ERRORES_BLOQUEO_SQLITE = ("SQLITE_BUSY", "SQLITE_LOCKED")
+_MENSAJES_BLOQUEO = ("database is locked", "database is busy", "database table is locked")
+_SQLSTATE_SERIALIZACION = {"40001", "40P01"}  # serialization_failure, deadlock_detected
+
+T = TypeVar("T")
+
+class ConflictoConcurrencia(Exception):
+    """La unidad de trabajo falló por un error transitorio en cada uno de los intentos permitidos"""
+
+    def __init__(self, operacion: str, intentos: int, motivo: str):
+        super().__init__(f"{operacion}: {motivo} persistente tras {intentos} intentos")
+        self.operacion = operacion
+        self.intentos = intentos
+        self.motivo = motivo
+
+def motivo_reintentable(error: BaseException) -> Optional[str]:
+    """Clasifica un error: "version", "bloqueo" o "serializacion" si conviene reintentar, None si no"""
+    if isinstance(error, StaleDataError):
+        return "version"
+    if not isinstance(error, DBAPIError):
+        return None
+    original = error.orig
+    sqlstate = getattr(original, "sqlstate", None) or getattr(original, "pgcode", None)
+    if sqlstate in _SQLSTATE_SERIALIZACION:
+        return "serializacion"
+    # sqlite_errorname existe desde Python 3.11; antes solo queda el mensaje
+    nombre = getattr(original, "sqlite_errorname", "") or ""
+    if nombre.startswith(_ERRORES_BLOQUEO_SQLITE) or any(m in str(original).lower() for m in _MENSAJES_BLOQUEO):
+        return "bloqueo"
+    return None
+
+def espera_backoff(intento: int) -> float:
+    """Segundos a esperar antes del intento número `intento + 1`"""
+    return random.uniform(0, min(BACKOFF_MAX_MS, BACKOFF_BASE_MS * 2 ** (intento - 1))) / 1000
+
+def ejecutar_transaccion(db: Session, operacion: str, unidad: Callable[[], T],
+                         max_intentos: int = None) -> T:
+    """Ejecuta una unidad de trabajo completa (lecturas, escrituras y commit) con reintentos.
+
+    Si falla por un error transitorio (conflicto de versión, base bloqueada u
+    ocupada, fallo de serialización) se hace rollback, que expira la sesión
+    para que el siguiente intento relea el estado actual, se espera un
+    backoff exponencial con jitter y se ejecuta `unidad` de nuevo desde el
+    principio. Cualquier otro error se propaga sin reintentar. Si se agotan
+    los intentos se lanza ConflictoConcurrencia.
+
+    `unidad` debe terminar con su propio commit y no llamar a otras
+    operaciones que hagan commit, para que cada intento sea atómico.
+    """
+    max_intentos = max_intentos or MAX_INTENTOS_TRANSACCION
+    for intento in range(1, max_intentos + 1):
+        registro.incrementar("polimarket_transacciones_total", operacion=operacion)
+        try:
+            return unidad()
+        except Exception as error:
+            motivo = motivo_reintentable(error)
+            if motivo is None:
+                raise
+            db.rollback()
+            if intento == max_intentos:
+                registro.incrementar("polimarket_transacciones_agotadas_total", operacion=operacion, motivo=motivo)
+                raise ConflictoConcurrencia(operacion, max_intentos, motivo) from error
+            registro.incrementar("polimarket_transacciones_reintentos_total", operacion=operacion, motivo=motivo)
+            time.sleep(espera_backoff(intento))
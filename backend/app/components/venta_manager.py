@@ -1,8 +1,21 @@
-from datetime import date
+from collections import defaultdict
+from datetime import date, timedelta
 from decimal import Decimal
-from sqlalchemy.orm import Session
-from ..models.entities import Venta, DetalleVenta, Cliente, Producto, Inventario
+from typing import Dict, Iterable, List
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from ..models.entities import Venta, DetalleVenta, Cliente, Entrega, Producto, Inventario
 from ..models.schemas import VentaCreate, ClienteCreate
+from .reporte_manager import ReporteManager
+from .programacion_manager import ProgramacionManager
+from .evento_manager import ENTREGA_CREADA, VENTA_CREADA, EventoManager
+from .transacciones import ConflictoConcurrencia, ejecutar_transaccion
+from .entrega_manager import TAMANO_LOTE_IN
+
+def _en_bloques(ids: Iterable[int]) -> Iterable[List[int]]:
+    ids = sorted(set(ids))
+    for i in range(0, len(ids), TAMANO_LOTE_IN):
+        yield ids[i:i + TAMANO_LOTE_IN]
 
 class VentaManager:
     """Componente para gestión de ventas (RF02)"""
@@ -11,8 +24,14 @@ class VentaManager:
         self.db = db
     
     def crear_venta(self, venta_data: VentaCreate) -> Venta:
-        """Crea una nueva venta (RF02)"""
-        try:
+        """Crea una nueva venta (RF02)
+        
+        El descuento de inventario usa la versión de cada fila: si otra venta
+        tocó el mismo inventario entre la lectura y el commit, o si la base
+        estaba bloqueada, la transacción completa se deshace y se vuelve a
+        intentar con el stock actual.
+        """
+        def intento():
             # Verificar que el cliente existe
             cliente = self.db.query(Cliente).filter(Cliente.id == venta_data.cliente_id).first()
             if not cliente:
@@ -30,6 +49,8 @@ class VentaManager:
             self.db.flush()  # Para obtener el ID de la venta
             
             total_venta = Decimal('0.00')
+            lineas = []
+            eventos = EventoManager(self.db)
             
             # Procesar detalles de la venta
             for detalle in venta_data.detalles:
@@ -59,19 +80,25 @@ class VentaManager:
                 
                 # Actualizar inventario
                 inventario.cantidad_disponible -= cantidad
+                eventos.registrar_inventario(inventario, -cantidad, "venta")
                 
                 # Calcular total
                 total_venta += producto.precio * cantidad
+                lineas.append((producto_id, producto.categoria, cantidad, producto.precio))
             
             # Actualizar total de la venta
             venta.total = total_venta
             
-            self.db.commit()
-            self.db.refresh(venta)
-
-            # Crear entrega automáticamente
-            from datetime import timedelta
-            from ..models.entities import Entrega
+            # Actualizar agregados de reportes en la misma transacción
+            ReporteManager(self.db).registrar_venta(venta, lineas)
+            eventos.registrar(VENTA_CREADA, venta.id, {
+                "venta_id": venta.id, "vendedor_id": venta.vendedor_id, "cliente_id": venta.cliente_id,
+                "fecha": venta.fecha, "total": float(total_venta), "estado": venta.estado,
+                "lineas": [{"producto_id": producto_id, "cantidad": cantidad}
+                           for producto_id, _, cantidad, _ in lineas]
+            })
+            
+            # La entrega se crea en la misma transacción: una venta confirmada siempre tiene su entrega
             fecha_entrega = venta.fecha + timedelta(days=2)
             entrega = Entrega(
                 venta_id=venta.id,
@@ -81,33 +108,112 @@ class VentaManager:
                 transportista=None
             )
             self.db.add(entrega)
-            self.db.commit()
-            self.db.refresh(entrega)
-
-            return venta
+            self.db.flush()
+            eventos.registrar(ENTREGA_CREADA, entrega.id, {
+                "entrega_id": entrega.id, "venta_id": venta.id, "fecha_entrega": fecha_entrega,
+                "direccion": cliente.direccion, "estado": entrega.estado, "transportista": None
+            })
             
+            self.db.commit()
+            self.db.refresh(venta)
+            return venta, entrega
+        
+        try:
+            resultado = ejecutar_transaccion(self.db, "crear_venta", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error creando venta: {e}")
             return None
+        if resultado is None:
+            return None
+        venta, entrega = resultado
+        
+        # Asignar transportista y día según la capacidad disponible. La venta ya está confirmada:
+        # si la programación falla (aun por un conflicto agotado) la entrega queda sin asignar y la
+        # programación por lotes la retoma; propagar el error haría que el cliente repita la venta
+        try:
+            ProgramacionManager(self.db).programar_entrega_nueva(entrega)
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error programando la entrega de la venta {venta.id}: {e}")
+        
+        return venta
     
     def consultar_venta(self, venta_id: int) -> Venta:
         """Consulta una venta por ID (RF02)"""
         return self.db.query(Venta).filter(Venta.id == venta_id).first()
     
+    def consultar_venta_detalle(self, venta_id: int) -> Venta:
+        """Consulta una venta con su cliente, sus líneas y el producto de cada línea (RF02)
+
+        Siempre emite dos consultas, sin importar cuántas líneas tenga la venta:
+        la venta con su cliente (JOIN) y las líneas con sus productos (IN + JOIN).
+        """
+        return self.db.execute(
+            select(Venta)
+            .options(joinedload(Venta.cliente),
+                     selectinload(Venta.detalles).joinedload(DetalleVenta.producto))
+            .where(Venta.id == venta_id)
+        ).scalar_one_or_none()
+    
     def listar_ventas_por_vendedor(self, vendedor_id: int):
         """Lista ventas por vendedor (RF02)"""
         return self.db.query(Venta).filter(Venta.vendedor_id == vendedor_id).all()
     
+    def clientes_por_id(self, cliente_ids: Iterable[int]) -> Dict[int, tuple]:
+        """Resumen de varios clientes, una consulta IN por cada TAMANO_LOTE_IN ids (RF02)"""
+        clientes = {}
+        for bloque in _en_bloques(i for i in cliente_ids if i is not None):
+            for fila in self.db.execute(
+                select(Cliente.id, Cliente.nombre, Cliente.email, Cliente.tipo_cliente)
+                .where(Cliente.id.in_(bloque))
+            ):
+                clientes[fila.id] = fila
+        return clientes
+    
+    def entregas_por_venta(self, venta_ids: Iterable[int]) -> Dict[int, tuple]:
+        """Entrega de cada venta que la tenga, por venta_id (RF02, RF05)"""
+        entregas = {}
+        for bloque in _en_bloques(venta_ids):
+            for fila in self.db.execute(
+                select(Entrega.id, Entrega.venta_id, Entrega.fecha_entrega, Entrega.direccion,
+                       Entrega.estado, Entrega.transportista)
+                .where(Entrega.venta_id.in_(bloque))
+            ):
+                entregas[fila.venta_id] = fila
+        return entregas
+    
+    def detalles_por_venta(self, venta_ids: Iterable[int]) -> Dict[int, List[tuple]]:
+        """Líneas de varias ventas con el nombre de su producto, agrupadas por venta_id (RF02)
+
+        Una consulta (IN + JOIN) por bloque de ventas, sin importar cuántas
+        líneas tenga cada una.
+        """
+        detalles = defaultdict(list)
+        for bloque in _en_bloques(venta_ids):
+            for fila in self.db.execute(
+                select(DetalleVenta.id, DetalleVenta.venta_id, DetalleVenta.producto_id,
+                       Producto.nombre.label("producto_nombre"), DetalleVenta.cantidad,
+                       DetalleVenta.precio_unitario)
+                .outerjoin(Producto, Producto.id == DetalleVenta.producto_id)
+                .where(DetalleVenta.venta_id.in_(bloque))
+                .order_by(DetalleVenta.venta_id, DetalleVenta.id)
+            ):
+                detalles[fila.venta_id].append(fila)
+        return detalles
+    
     def calcular_total_venta(self, venta_id: int) -> Decimal:
         """Calcula el total de una venta (RF02)"""
-        venta = self.db.query(Venta).filter(Venta.id == venta_id).first()
-        if not venta:
-            return Decimal('0.00')
+        # Una sola consulta sobre las líneas, en lugar de cargar la venta y luego `venta.detalles`
+        lineas = self.db.execute(
+            select(DetalleVenta.precio_unitario, DetalleVenta.cantidad).where(DetalleVenta.venta_id == venta_id)
+        ).all()
         
         total = Decimal('0.00')
-        for detalle in venta.detalles:
-            total += detalle.precio_unitario * detalle.cantidad
+        for precio_unitario, cantidad in lineas:
+            total += precio_unitario * cantidad
         
         return total
 
@@ -119,7 +225,7 @@ class ClienteManager:
     
     def crear_cliente(self, cliente_data: ClienteCreate) -> Cliente:
         """Crea un nuevo cliente (RF02)"""
-        try:
+        def intento():
             cliente = Cliente(
                 tipo_documento=cliente_data.tipo_documento,
                 documento=cliente_data.documento,
@@ -133,6 +239,11 @@ class ClienteManager:
             self.db.commit()
             self.db.refresh(cliente)
             return cliente
+        
+        try:
+            return ejecutar_transaccion(self.db, "crear_cliente", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error creando cliente: {e}")
@@ -146,9 +257,15 @@ class ClienteManager:
         """Lista todos los clientes (RF02)"""
         return self.db.query(Cliente).all()
     
+    def listar_clientes_resumen(self):
+        """Lista los clientes como filas de solo lectura, sin dirección ni documento (RF02)"""
+        return self.db.execute(
+            select(Cliente.id, Cliente.nombre, Cliente.email, Cliente.tipo_cliente)
+        ).all()
+    
     def actualizar_cliente(self, cliente_id: int, cliente_data: ClienteCreate) -> bool:
         """Actualiza un cliente (RF02)"""
-        try:
+        def intento():
             cliente = self.db.query(Cliente).filter(Cliente.id == cliente_id).first()
             if not cliente:
                 return False
@@ -163,6 +280,11 @@ class ClienteManager:
             
             self.db.commit()
             return True
+        
+        try:
+            return ejecutar_transaccion(self.db, "actualizar_cliente", intento)
+        except ConflictoConcurrencia:
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Error actualizando cliente: {e}")
@@ -1,16 +1,69 @@
-from fastapi import FastAPI
+import time
+_inicio_importacion = time.perf_counter()
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from .models.database import engine
+from fastapi.responses import JSONResponse, PlainTextResponse
+from .models.database import (
+    engine, respaldos, calentar_pool, conexiones_en_uso, get_sessionmaker, INTERVALO_CHECKPOINT_S,
+    INTERVALO_RESPALDO_S
+)
 from .models.entities import Base
-from .api import auth, ventas, inventario, entregas, proveedores
+from .models.esquema import asegurar_esquema
+from .models.versiones import asegurar_versiones
+from .components.transacciones import ConflictoConcurrencia
+from .components.escritor_grupal import COMMIT_GRUPAL, escritor_grupal
+from .components.difusion import centro_difusion
+from .api import auth, ventas, inventario, entregas, proveedores, reportes, admin, eventos
+from .api.compresion import CompresionMiddleware
+from .monitoreo.metricas import MetricasMiddleware, registro
+
+registro.fijar("polimarket_arranque_seconds", time.perf_counter() - _inicio_importacion, etapa="importacion")
+
+# Segundos que el apagado espera a que terminen las transacciones en curso (ventas en el threadpool)
+TIMEOUT_DRENADO_S = float(os.environ.get("POLIMARKET_TIMEOUT_DRENADO_S", "30"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranque del worker: esquema (solo si cambió) y mantenimiento de la base en segundo plano"""
+    inicio = time.perf_counter()
+    ddl = asegurar_esquema(engine, Base.metadata)
+    registro.fijar("polimarket_arranque_seconds", time.perf_counter() - inicio, etapa="esquema")
+    if ddl:
+        print("Esquema de la base de datos creado o actualizado")
+    asegurar_versiones(engine)
+
+    inicio = time.perf_counter()
+    calentar_pool()
+    registro.fijar("polimarket_arranque_seconds", time.perf_counter() - inicio, etapa="conexiones")
 
-# Crear tablas
-Base.metadata.create_all(bind=engine)
+    if INTERVALO_CHECKPOINT_S > 0:
+        respaldos.iniciar(INTERVALO_CHECKPOINT_S, INTERVALO_RESPALDO_S)
+    # Misma fábrica que reciben los endpoints (respeta dependency_overrides en las pruebas)
+    fabrica_sesiones = app.dependency_overrides.get(get_sessionmaker, get_sessionmaker)()
+    if COMMIT_GRUPAL:
+        escritor_grupal.iniciar(fabrica_sesiones)
+    await centro_difusion.iniciar(fabrica_sesiones)
+    yield
+
+    # Uvicorn ya dejó de aceptar conexiones; un handler cancelado por timeout puede seguir
+    # en su hilo a mitad de una venta, así que se espera a que el pool quede libre
+    limite = time.monotonic() + TIMEOUT_DRENADO_S
+    while conexiones_en_uso() and time.monotonic() < limite:
+        await asyncio.sleep(0.05)
+    await centro_difusion.detener()
+    escritor_grupal.detener()
+    respaldos.detener()
+    engine.dispose()
 
 app = FastAPI(
     title="PoliMarket API",
     description="API para el sistema de gestión de PoliMarket",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -20,14 +73,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Compresión negociada (zstd, br o gzip) de las respuestas grandes; queda dentro de las métricas,
+# así Server-Timing incluye el tiempo de comprimir
+app.add_middleware(CompresionMiddleware)
+
+# Métricas de latencia y consultas por ruta (expuestas en /metrics)
+app.add_middleware(MetricasMiddleware)
+
+@app.exception_handler(ConflictoConcurrencia)
+async def conflicto_concurrencia(request: Request, exc: ConflictoConcurrencia):
+    """Escritura que siguió fallando tras los reintentos: el cliente puede repetirla.
+
+    409 si la fila cambió en cada intento; 503 con Retry-After si la base
+    seguía bloqueada (contención de escritura, no un error de la petición).
+    """
+    if exc.motivo == "version":
+        return JSONResponse(status_code=status.HTTP_409_CONFLICT, content={"detail": str(exc)})
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": str(exc)},
+                        headers={"Retry-After": "1"})
+
 # Incluir routers
 app.include_router(auth.router)
 app.include_router(ventas.router)
 app.include_router(inventario.router)
 app.include_router(entregas.router)
 app.include_router(proveedores.router)
+app.include_router(reportes.router)
+app.include_router(admin.router)
+app.include_router(eventos.router)
 
 @app.get("/")
 def read_root():
@@ -39,10 +115,17 @@ def read_root():
             "ventas": "/ventas", 
             "inventario": "/inventario",
             "entregas": "/entregas",
-            "proveedores": "/proveedores"
+            "proveedores": "/proveedores",
+            "reportes": "/reportes",
+            "eventos": "/eventos"
         }
     }
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return PlainTextResponse(registro.exportar(), media_type="text/plain; version=0.0.4")
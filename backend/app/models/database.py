@@ -1,19 +1,78 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from ..monitoreo.metricas import ConexionMedida, instrumentar_engine
+from ..monitoreo.consultas_lentas import RegistroConsultasLentas
+from .respaldos import GestorRespaldos
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./polimarket.db"
 
+# Consultas más lentas que este umbral se registran con su plan de ejecución
+UMBRAL_CONSULTA_LENTA_MS = float(os.environ.get("POLIMARKET_UMBRAL_CONSULTA_LENTA_MS", "100"))
+CAPACIDAD_CONSULTAS_LENTAS = int(os.environ.get("POLIMARKET_CAPACIDAD_CONSULTAS_LENTAS", "200"))
+
+# Respaldos en línea y checkpoints del WAL en segundo plano (0 desactiva cada uno)
+DIRECTORIO_RESPALDOS = os.environ.get("POLIMARKET_DIRECTORIO_RESPALDOS", "./respaldos")
+INTERVALO_RESPALDO_S = float(os.environ.get("POLIMARKET_INTERVALO_RESPALDO_S", "0"))
+INTERVALO_CHECKPOINT_S = float(os.environ.get("POLIMARKET_INTERVALO_CHECKPOINT_S", "1"))
+
+# Retención del outbox de eventos (la purga corre en el hilo de mantenimiento; 0 desactiva cada criterio)
+RETENCION_EVENTOS_H = float(os.environ.get("POLIMARKET_RETENCION_EVENTOS_H", "168"))
+MAX_EVENTOS = int(os.environ.get("POLIMARKET_MAX_EVENTOS", "1000000"))
+
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False, "factory": ConexionMedida}
 )
+
+@event.listens_for(engine, "connect")
+def _configurar_conexion(conexion_dbapi, registro_conexion):
+    """WAL: los lectores no bloquean a los escritores ni los escritores a los lectores"""
+    cursor = conexion_dbapi.cursor()
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    if INTERVALO_CHECKPOINT_S > 0:
+        # Los checkpoints los hace GestorRespaldos fuera del COMMIT de las peticiones
+        cursor.execute("PRAGMA wal_autocheckpoint = 0")
+    cursor.close()
+
+# Medición de consultas por petición (ver app/monitoreo/metricas.py)
+instrumentar_engine(engine)
+
+# Registro de consultas lentas (ver app/monitoreo/consultas_lentas.py)
+consultas_lentas = RegistroConsultasLentas(UMBRAL_CONSULTA_LENTA_MS, CAPACIDAD_CONSULTAS_LENTAS)
+consultas_lentas.instalar(engine)
+
+# Respaldos y checkpoints (ver app/models/respaldos.py); el hilo se inicia con la aplicación
+respaldos = GestorRespaldos(engine.url.database, DIRECTORIO_RESPALDOS,
+                            retencion_eventos_s=RETENCION_EVENTOS_H * 3600, max_eventos=MAX_EVENTOS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def calentar_pool() -> int:
+    """Abre de antemano las conexiones del pool para que las primeras peticiones no paguen el connect"""
+    conexiones = [engine.connect() for _ in range(getattr(engine.pool, "size", lambda: 1)())]
+    for conexion in conexiones:
+        conexion.exec_driver_sql("SELECT 1")
+        conexion.close()
+    return len(conexiones)
+
+def conexiones_en_uso() -> int:
+    """Conexiones prestadas por el pool (transacciones todavía en curso)"""
+    return getattr(engine.pool, "checkedout", lambda: 0)()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def get_sessionmaker():
+    """Fábrica de sesiones para quien abre sus propias sesiones (long-poll, hub SSE, escritor grupal).
+
+    Es una dependencia, como get_db, para que las pruebas la reemplacen con
+    `app.dependency_overrides` y todo apunte a la misma base.
+    """
+    return SessionLocal
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, Text
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Text, Index
 from sqlalchemy.types import Numeric
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -73,6 +74,9 @@ class Inventario(Base):
     cantidad_disponible = Column(Integer, default=0)
     cantidad_minima = Column(Integer, default=10)
     ubicacion = Column(String(50))
+    # Control de concurrencia optimista: cada UPDATE exige la versión leída y la incrementa
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     
     # Relaciones
     producto = relationship("Producto", back_populates="inventario")
@@ -97,7 +101,7 @@ class DetalleVenta(Base):
     __tablename__ = "detalles_venta"
     
     id = Column(Integer, primary_key=True, index=True)
-    venta_id = Column(Integer, ForeignKey("ventas.id"))
+    venta_id = Column(Integer, ForeignKey("ventas.id"), index=True)
     producto_id = Column(Integer, ForeignKey("productos.id"))
     cantidad = Column(Integer, nullable=False)
     precio_unitario = Column(Numeric(10, 2), nullable=False)
@@ -108,6 +112,10 @@ class DetalleVenta(Base):
 
 class Entrega(Base):
     __tablename__ = "entregas"
+    __table_args__ = (
+        # Vistas de despacho: filtros por estado y rango de fechas
+        Index("ix_entregas_estado_fecha", "estado", "fecha_entrega"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     venta_id = Column(Integer, ForeignKey("ventas.id"), unique=True)
@@ -115,6 +123,8 @@ class Entrega(Base):
     direccion = Column(Text, nullable=False)
     estado = Column(String(20), default="PENDIENTE")
     transportista = Column(String(100))
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     
     # Relaciones
     venta = relationship("Venta", back_populates="entrega")
@@ -141,6 +151,8 @@ class Compra(Base):
     total = Column(Numeric(10, 2), default=0)
     estado = Column(String(20), default="PENDIENTE")
     numero_orden = Column(String(50), unique=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
     
     # Relaciones
     proveedor = relationship("Proveedor")
@@ -150,11 +162,59 @@ class DetalleCompra(Base):
     __tablename__ = "detalles_compra"
     
     id = Column(Integer, primary_key=True, index=True)
-    compra_id = Column(Integer, ForeignKey("compras.id"))
+    compra_id = Column(Integer, ForeignKey("compras.id"), index=True)
     producto_id = Column(Integer, ForeignKey("productos.id"))
     cantidad = Column(Integer, nullable=False)
     precio_compra = Column(Numeric(10, 2), nullable=False)
     
     # Relaciones
     compra = relationship("Compra", back_populates="detalles")
-    producto = relationship("Producto") 
\ No newline at end of file
+    producto = relationship("Producto") 
+
+# Tablas de agregados para reportes (rollups diarios de ventas)
+class VentaDiariaVendedor(Base):
+    __tablename__ = "ventas_diarias_vendedor"
+    
+    fecha = Column(Date, primary_key=True)
+    vendedor_id = Column(Integer, ForeignKey("vendedores.id"), primary_key=True)
+    numero_ventas = Column(Integer, nullable=False, default=0)
+    unidades = Column(Integer, nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
+
+class VentaDiariaCategoria(Base):
+    __tablename__ = "ventas_diarias_categoria"
+    
+    fecha = Column(Date, primary_key=True)
+    categoria = Column(String(50), primary_key=True)
+    numero_ventas = Column(Integer, nullable=False, default=0)
+    unidades = Column(Integer, nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
+
+class VentaDiariaProducto(Base):
+    __tablename__ = "ventas_diarias_producto"
+    
+    fecha = Column(Date, primary_key=True)
+    producto_id = Column(Integer, ForeignKey("productos.id"), primary_key=True)
+    numero_ventas = Column(Integer, nullable=False, default=0)
+    unidades = Column(Integer, nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
+
+# Outbox de eventos de cambio: se escribe en la misma transacción que el cambio que describe
+class Evento(Base):
+    __tablename__ = "eventos"
+    # AUTOINCREMENT: los ids nunca se reutilizan, así un cursor `after` sigue siendo válido si se purgan eventos
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    id = Column(Integer, primary_key=True)
+    tipo = Column(String(50), nullable=False)
+    entidad_id = Column(Integer, nullable=False)
+    datos = Column(Text, nullable=False)
+    creado = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+# Contador de cambios por tabla: validadores HTTP (ETag / Last-Modified) sin leer las filas
+class VersionTabla(Base):
+    __tablename__ = "versiones_tabla"
+    
+    tabla = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False)
+    modificado = Column(DateTime, nullable=False)
@@ -0,0 +1,69 @@
+import hashlib
+from sqlalchemy import inspect
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+def firma_esquema(metadata) -> str:
+    """Hash del DDL de todas las tablas e índices; cambia cuando cambia el esquema"""
+    dialecto = sqlite.dialect()
+    ddl = []
+    for tabla in metadata.sorted_tables:
+        ddl.append(str(CreateTable(tabla).compile(dialect=dialecto)))
+        ddl.extend(str(CreateIndex(indice).compile(dialect=dialecto))
+                   for indice in sorted(tabla.indexes, key=lambda i: i.name))
+    return hashlib.sha256("\n".join(ddl).encode("utf-8")).hexdigest()[:16]
+
+def version_esquema(metadata) -> int:
+    """Firma del esquema como entero positivo de 31 bits (cabe en PRAGMA user_version)"""
+    return int(firma_esquema(metadata)[:8], 16) & 0x7FFFFFFF
+
+def _agregar_columnas_faltantes(conn, metadata) -> list:
+    """Migración aditiva: ALTER TABLE ADD COLUMN para columnas nuevas en tablas existentes"""
+    inspector = inspect(conn)
+    compilador = conn.dialect.ddl_compiler(conn.dialect, None)
+    agregadas = []
+    for tabla in metadata.sorted_tables:
+        existentes = {columna["name"] for columna in inspector.get_columns(tabla.name)}
+        for columna in tabla.columns:
+            if columna.name not in existentes:
+                especificacion = compilador.get_column_specification(columna)
+                conn.exec_driver_sql(f"ALTER TABLE {tabla.name} ADD COLUMN {especificacion}")
+                agregadas.append(f"{tabla.name}.{columna.name}")
+    return agregadas
+
+def asegurar_esquema(engine, metadata) -> bool:
+    """Crea o migra el esquema solo si la versión guardada en la base no coincide.
+
+    La versión se guarda en `PRAGMA user_version`, así que en el caso normal
+    (esquema al día) el costo es una sola consulta en lugar de inspeccionar
+    cada tabla. Retorna True si se ejecutó DDL.
+    """
+    sqlite_db = engine.dialect.name == "sqlite"
+    version = version_esquema(metadata)
+    if sqlite_db:
+        with engine.connect() as conn:
+            if conn.exec_driver_sql("PRAGMA user_version").scalar() == version:
+                return False
+
+    try:
+        with engine.begin() as conn:
+            metadata.create_all(bind=conn)
+            agregadas = _agregar_columnas_faltantes(conn, metadata)
+            # create_all no agrega índices nuevos a tablas que ya existían
+            for tabla in metadata.sorted_tables:
+                for indice in tabla.indexes:
+                    indice.create(bind=conn, checkfirst=True)
+            if sqlite_db:
+                conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+    except OperationalError:
+        # Otro worker pudo migrar al mismo tiempo; si la versión ya quedó al día no es un error
+        if sqlite_db:
+            with engine.connect() as conn:
+                if conn.exec_driver_sql("PRAGMA user_version").scalar() == version:
+                    return False
+        raise
+
+    if agregadas:
+        print(f"Columnas agregadas al esquema: {', '.join(agregadas)}")
+    return True
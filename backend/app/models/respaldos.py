@@ -0,0 +1,278 @@
+import glob
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from ..monitoreo.metricas import registro
+
+class RespaldoEnCurso(Exception):
+    """Ya hay un respaldo en curso (en este u otro worker)"""
+
+class _BloqueoArchivo:
+    """Bloqueo exclusivo no bloqueante entre procesos (flock); sin efecto fuera de POSIX"""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._archivo = None
+
+    def adquirir(self) -> bool:
+        try:
+            import fcntl
+        except ImportError:
+            return True
+        self._archivo = open(self.ruta, "w")
+        try:
+            fcntl.flock(self._archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._archivo.close()
+            self._archivo = None
+            return False
+
+    def liberar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+class GestorRespaldos:
+    """Respaldos en línea y checkpoints del WAL sin bloquear a los escritores.
+
+    El respaldo usa la API de backup de SQLite por pasos de `paginas_por_paso`
+    páginas con una pausa entre pasos. En modo WAL se copia dentro de una
+    transacción de lectura: la copia corresponde a un único snapshot, no se
+    reinicia cuando otras conexiones escriben y los escritores nunca esperan.
+
+    Los checkpoints los hace un hilo en segundo plano según el tamaño del WAL
+    (PASSIVE a partir de `umbral_pasivo`, TRUNCATE a partir de
+    `umbral_truncar`), en lugar del autocheckpoint que SQLite ejecuta dentro
+    del COMMIT de la petición que cruza el límite.
+
+    El mismo hilo purga el outbox de eventos: borra los más viejos que
+    `retencion_eventos_s` y los que excedan `max_eventos` (0 desactiva cada
+    criterio), cada `intervalo_purga` segundos.
+    """
+
+    def __init__(self, ruta_db: str, directorio: str, paginas_por_paso: int = 256, pausa: float = 0.005,
+                 conservar: int = 7, umbral_pasivo: int = 4 << 20, umbral_truncar: int = 64 << 20,
+                 retencion_eventos_s: float = 0, max_eventos: int = 0, intervalo_purga: float = 60.0):
+        self.ruta_db = ruta_db
+        self.directorio = directorio
+        self.paginas_por_paso = paginas_por_paso
+        self.pausa = pausa
+        self.conservar = conservar
+        self.umbral_pasivo = umbral_pasivo
+        self.umbral_truncar = umbral_truncar
+        self.retencion_eventos_s = retencion_eventos_s
+        self.max_eventos = max_eventos
+        self.intervalo_purga = intervalo_purga
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._estado = {"en_curso": False, "progreso": None, "ultimo": None}
+
+    # ==================== RESPALDOS ====================
+
+    def respaldar(self, destino: str = None) -> dict:
+        """Crea un respaldo consistente de la base; retorna su resumen"""
+        if not self._lock.acquire(blocking=False):
+            raise RespaldoEnCurso()
+        os.makedirs(self.directorio, exist_ok=True)
+        bloqueo = _BloqueoArchivo(os.path.join(self.directorio, ".respaldo.lock"))
+        try:
+            if not bloqueo.adquirir():
+                raise RespaldoEnCurso()
+            destino = destino or os.path.join(
+                self.directorio, f"polimarket-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db")
+            self._estado.update(en_curso=True, progreso=0.0)
+            inicio = time.perf_counter()
+            try:
+                paginas = self._copiar(destino + ".tmp")
+                os.replace(destino + ".tmp", destino)
+            except Exception:
+                registro.incrementar("polimarket_respaldos_total", resultado="error")
+                if os.path.exists(destino + ".tmp"):
+                    os.remove(destino + ".tmp")
+                raise
+            duracion = time.perf_counter() - inicio
+
+            resumen = {
+                "archivo": destino,
+                "paginas": paginas,
+                "bytes": os.path.getsize(destino),
+                "duracion_s": round(duracion, 3),
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._estado["ultimo"] = resumen
+            registro.incrementar("polimarket_respaldos_total", resultado="ok")
+            registro.fijar("polimarket_respaldo_duracion_seconds", duracion)
+            registro.fijar("polimarket_respaldo_ultimo_exito_timestamp_seconds", time.time())
+            self._podar()
+            return resumen
+        finally:
+            self._estado.update(en_curso=False, progreso=None)
+            bloqueo.liberar()
+            self._lock.release()
+
+    def _copiar(self, destino: str) -> int:
+        fuente = sqlite3.connect(self.ruta_db, isolation_level=None, check_same_thread=False)
+        copia = sqlite3.connect(destino)
+        totales = [0]
+
+        def progreso(estado, restantes, total):
+            totales[0] = total
+            avance = (total - restantes) / total if total else 1.0
+            self._estado["progreso"] = round(avance, 4)
+            registro.fijar("polimarket_respaldo_progreso_ratio", avance)
+            registro.fijar("polimarket_respaldo_paginas_restantes", restantes)
+
+        try:
+            wal = fuente.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+            if wal:
+                # Fija el snapshot: los pasos leen siempre la misma versión de la base
+                fuente.execute("BEGIN")
+                fuente.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            fuente.backup(copia, pages=self.paginas_por_paso, progress=progreso, sleep=self.pausa)
+            if wal:
+                fuente.execute("COMMIT")
+            copia.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            copia.close()
+            fuente.close()
+        return totales[0]
+
+    def _podar(self):
+        """Conserva solo los `conservar` respaldos más recientes"""
+        archivos = sorted(glob.glob(os.path.join(self.directorio, "polimarket-*.db")))
+        for archivo in archivos[:-self.conservar] if self.conservar else []:
+            os.remove(archivo)
+
+    def respaldar_en_segundo_plano(self):
+        """Lanza un respaldo en un hilo aparte; RespaldoEnCurso si ya hay uno"""
+        if self._estado["en_curso"]:
+            raise RespaldoEnCurso()
+
+        def ejecutar():
+            try:
+                self.respaldar()
+            except RespaldoEnCurso:
+                pass
+            except Exception as e:
+                print(f"Error creando respaldo: {e}")
+
+        threading.Thread(target=ejecutar, name="respaldo", daemon=True).start()
+
+    def estado(self) -> dict:
+        return {**self._estado, "wal_bytes": self.tamano_wal()}
+
+    # ==================== CHECKPOINTS ====================
+
+    def tamano_wal(self) -> int:
+        try:
+            return os.path.getsize(self.ruta_db + "-wal")
+        except OSError:
+            return 0
+
+    def checkpoint(self, modo: str = "PASSIVE", espera_ms: int = 100) -> dict:
+        """Ejecuta wal_checkpoint(modo); TRUNCATE espera a lo sumo `espera_ms` a los escritores"""
+        conexion = sqlite3.connect(self.ruta_db, isolation_level=None, timeout=espera_ms / 1000)
+        try:
+            ocupado, paginas_wal, copiadas = conexion.execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+        finally:
+            conexion.close()
+
+        retraso = max(paginas_wal - copiadas, 0) if paginas_wal >= 0 else 0
+        registro.incrementar("polimarket_wal_checkpoints_total", modo=modo.lower(),
+                             resultado="parcial" if ocupado or retraso else "completo")
+        registro.fijar("polimarket_wal_checkpoint_lag_frames", retraso)
+        registro.fijar("polimarket_wal_bytes", self.tamano_wal())
+        return {"modo": modo, "ocupado": bool(ocupado), "paginas_wal": paginas_wal,
+                "paginas_copiadas": copiadas, "retraso": retraso}
+
+    def revisar_wal(self):
+        """Decide qué checkpoint hacer según el tamaño actual del WAL"""
+        tamano = self.tamano_wal()
+        registro.fijar("polimarket_wal_bytes", tamano)
+        if tamano < self.umbral_pasivo:
+            return None
+        resultado = self.checkpoint("PASSIVE")
+        if tamano >= self.umbral_truncar and not resultado["retraso"]:
+            resultado = self.checkpoint("TRUNCATE")
+        return resultado
+
+    # ==================== PURGA DEL OUTBOX ====================
+
+    def purgar_eventos(self, lote: int = 5000) -> int:
+        """Borra del outbox los eventos vencidos o sobrantes; retorna cuántos borró
+
+        Los ids crecen con la fecha de creación, así que ambos criterios se
+        reducen a un id de corte y el borrado es por rango de rowid, en lotes
+        cortos para tomar el lock de escritura solo unos milisegundos cada vez.
+        """
+        if not self.retencion_eventos_s and not self.max_eventos:
+            return 0
+        conexion = sqlite3.connect(self.ruta_db, isolation_level=None, timeout=0.1)
+        borrados = 0
+        try:
+            if not conexion.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'eventos'").fetchone():
+                return 0
+            (ultimo,) = conexion.execute("SELECT coalesce(max(id), 0) FROM eventos").fetchone()
+            corte = ultimo - self.max_eventos if self.max_eventos else 0
+            if self.retencion_eventos_s:
+                # Mismo formato de texto con que SQLAlchemy guarda los DateTime en SQLite
+                limite = (datetime.utcnow() - timedelta(seconds=self.retencion_eventos_s)).strftime("%Y-%m-%d %H:%M:%S.%f")
+                vigente = conexion.execute(
+                    "SELECT id FROM eventos WHERE creado >= ? ORDER BY id LIMIT 1", (limite,)
+                ).fetchone()
+                corte = max(corte, vigente[0] - 1 if vigente else ultimo)
+            while corte > 0:
+                cursor = conexion.execute(
+                    "DELETE FROM eventos WHERE id IN (SELECT id FROM eventos WHERE id <= ? ORDER BY id LIMIT ?)",
+                    (corte, lote)
+                )
+                borrados += cursor.rowcount
+                if cursor.rowcount < lote:
+                    break
+        finally:
+            conexion.close()
+        registro.incrementar("polimarket_eventos_purgados_total", borrados)
+        return borrados
+
+    # ==================== HILO EN SEGUNDO PLANO ====================
+
+    def iniciar(self, intervalo_checkpoint: float = 1.0, intervalo_respaldo: float = 0.0):
+        """Arranca el hilo de mantenimiento (checkpoints y, si se pide, respaldos periódicos)"""
+        if self._hilo is not None:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, args=(intervalo_checkpoint, intervalo_respaldo),
+                                      name="mantenimiento-db", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        if self._hilo is None:
+            return
+        self._detener.set()
+        self._hilo.join(timeout=5)
+        self._hilo = None
+
+    def _ciclo(self, intervalo_checkpoint: float, intervalo_respaldo: float):
+        proximo_respaldo = time.monotonic() + intervalo_respaldo if intervalo_respaldo else None
+        proxima_purga = time.monotonic()
+        while not self._detener.wait(intervalo_checkpoint):
+            try:
+                self.revisar_wal()
+            except sqlite3.Error as e:
+                print(f"Error en checkpoint del WAL: {e}")
+            if time.monotonic() >= proxima_purga:
+                proxima_purga = time.monotonic() + self.intervalo_purga
+                try:
+                    self.purgar_eventos()
+                except sqlite3.Error as e:
+                    print(f"Error purgando eventos: {e}")
+            if proximo_respaldo is not None and time.monotonic() >= proximo_respaldo:
+                proximo_respaldo = time.monotonic() + intervalo_respaldo
+                try:
+                    self.respaldar_en_segundo_plano()
+                except RespaldoEnCurso:
+                    pass
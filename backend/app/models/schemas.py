@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import date
 from decimal import Decimal
 
@@ -118,6 +118,18 @@ class Entrega(EntregaBase):
     class Config:
         from_attributes = True
 
+class EntregaEstadoCambio(BaseModel):
+    entrega_id: int
+    estado: str
+
+class EntregaEstadoLote(BaseModel):
+    cambios: List[EntregaEstadoCambio]
+
+class ProgramacionRequest(BaseModel):
+    desde: date
+    hasta: date
+    transportistas: Optional[Dict[str, int]] = None  # Capacidad diaria por transportista
+
 # Esquemas para autenticación
 class LoginRequest(BaseModel):
     email: str
@@ -0,0 +1,98 @@
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import case, event, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from .entities import VersionTabla
+
+# Tablas de datos maestros cuyos listados se sirven con ETag / Last-Modified
+TABLAS_VERSIONADAS = frozenset({"productos", "clientes", "proveedores", "vendedores"})
+
+def _version_inicial() -> int:
+    # Milisegundos actuales en lugar de 1: una base re-sembrada o restaurada no repite ETags ya emitidos
+    return int(time.time() * 1000)
+
+def _siguiente_version(columna):
+    # Nunca por debajo de la hora actual en ms: si la base volvió a un contador viejo
+    # (instantánea restaurada), el siguiente cambio no repite una versión ya servida.
+    # CASE en lugar de max(a, b): el max escalar de dos argumentos solo existe en SQLite
+    inicial = _version_inicial()
+    return case((columna + 1 > inicial, columna + 1), else_=inicial)
+
+def _incrementar(conexion, nombre: str):
+    ahora = datetime.utcnow()
+    tabla = VersionTabla.__table__
+    actualizadas = conexion.execute(
+        update(tabla).where(tabla.c.tabla == nombre)
+        .values(version=_siguiente_version(tabla.c.version), modificado=ahora)
+    ).rowcount
+    if not actualizadas:
+        conexion.execute(insert(tabla).values(tabla=nombre, version=_version_inicial(), modificado=ahora))
+
+@event.listens_for(Engine, "before_execute")
+def _incrementar_versiones(conexion, sentencia, multiparams, params, opciones):
+    """Incrementa el contador de la tabla versionada que la sentencia va a escribir, en la misma transacción
+
+    Escucha las sentencias del Engine y no el flush de la Session, así que
+    cubre también los UPDATE/INSERT/DELETE de Core (por conjuntos o con
+    executemany), que no pasan por la unidad de trabajo del ORM. Cada tabla
+    se incrementa una vez por transacción.
+    """
+    if not isinstance(sentencia, UpdateBase):
+        return
+    nombre = getattr(sentencia.table, "name", None)
+    if nombre not in TABLAS_VERSIONADAS:
+        return
+    incrementadas = conexion.info.setdefault("versiones_incrementadas", set())
+    if nombre in incrementadas:
+        return
+    incrementadas.add(nombre)
+    _incrementar(conexion, nombre)
+
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+@event.listens_for(Engine, "rollback_savepoint")
+def _olvidar_incrementadas(conexion, *args):
+    # Al deshacer un SAVEPOINT también se deshace su incremento: la siguiente escritura vuelve a hacerlo
+    conexion.info.pop("versiones_incrementadas", None)
+
+def asegurar_versiones(engine):
+    """Crea el contador de las tablas versionadas que aún no lo tienen (bases nuevas o sembradas a mano)"""
+    with engine.begin() as conexion:
+        existentes = set(conexion.execute(select(VersionTabla.tabla)).scalars())
+        faltantes = TABLAS_VERSIONADAS - existentes
+        if not faltantes:
+            return
+        ahora = datetime.utcnow()
+        try:
+            conexion.execute(insert(VersionTabla.__table__), [
+                {"tabla": nombre, "version": _version_inicial(), "modificado": ahora}
+                for nombre in sorted(faltantes)
+            ])
+        except IntegrityError:
+            pass  # Otro worker los creó al mismo tiempo
+
+def avanzar_versiones(engine):
+    """Adelanta todos los contadores tras reemplazar el contenido de la base (ver restaurar_en_engine)
+
+    La base restaurada trae los contadores de cuando se tomó la instantánea:
+    sin esto, los clientes con un ETag de ese momento recibirían 304 con datos
+    que ya no son los de la base, y la caché de cuerpos comprimidos serviría
+    cuerpos viejos.
+    """
+    tabla = VersionTabla.__table__
+    tabla.create(engine, checkfirst=True)
+    with engine.begin() as conexion:
+        conexion.execute(update(tabla).values(version=_siguiente_version(tabla.c.version),
+                                              modificado=datetime.utcnow()))
+    asegurar_versiones(engine)
+
+def leer_version(db: Session, tabla: str) -> Tuple[int, Optional[datetime]]:
+    """Versión y fecha del último cambio de una tabla: una lectura por clave primaria"""
+    fila = db.execute(
+        select(VersionTabla.version, VersionTabla.modificado).where(VersionTabla.tabla == tabla)
+    ).first()
+    return (fila.version, fila.modificado) if fila else (0, None)
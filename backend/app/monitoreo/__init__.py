@@ -0,0 +1 @@
+# Monitoreo package
\ No newline at end of file
@@ -0,0 +1,108 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from sqlalchemy import event
+
+# Sentencias a las que se les captura el plan de ejecución
+_CON_PLAN = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+def _forma_parametros(parametros):
+    """Describe los parámetros por tipo (sin valores) para no registrar datos sensibles"""
+    def forma(valor):
+        if isinstance(valor, str):
+            return f"str({len(valor)})"
+        if isinstance(valor, (bytes, bytearray)):
+            return f"bytes({len(valor)})"
+        return type(valor).__name__
+
+    if isinstance(parametros, dict):
+        return {clave: forma(valor) for clave, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        return [forma(valor) for valor in parametros]
+    return forma(parametros)
+
+def _metodo_llamador():
+    """Busca en la pila el método de Manager que originó la consulta"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        instancia = frame.f_locals.get("self")
+        if instancia is not None and type(instancia).__name__.endswith("Manager"):
+            return f"{type(instancia).__name__}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+class RegistroConsultasLentas:
+    """Registra en un buffer circular las consultas que superan un umbral de duración"""
+
+    def __init__(self, umbral_ms: float = 100.0, capacidad: int = 200, capturar_plan: bool = True):
+        self.umbral_ms = umbral_ms
+        self.capturar_plan = capturar_plan
+        self._entradas = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+
+    def instalar(self, engine):
+        """Registra los hooks de medición en el engine"""
+        dialecto = engine.dialect.name
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _antes(conn, cursor, statement, parameters, context, executemany):
+            # Valor único, sobrescrito por la siguiente consulta si esta falla
+            conn.info["inicio_consulta_lenta"] = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _despues(conn, cursor, statement, parameters, context, executemany):
+            duracion_ms = (time.perf_counter() - conn.info.pop("inicio_consulta_lenta")) * 1000
+            if duracion_ms < self.umbral_ms:
+                return
+            muestra = parameters[0] if executemany and parameters else parameters
+            entrada = {
+                "fecha": datetime.now().isoformat(timespec="milliseconds"),
+                "duracion_ms": round(duracion_ms, 3),
+                "sql": statement,
+                "parametros": _forma_parametros(muestra),
+                "executemany": len(parameters) if executemany else None,
+                "llamador": _metodo_llamador(),
+                "plan": self._plan(cursor, dialecto, statement, muestra) if self.capturar_plan else None
+            }
+            with self._lock:
+                self._entradas.append(entrada)
+
+    def _plan(self, cursor, dialecto: str, statement: str, parametros):
+        """Obtiene el plan de ejecución con un cursor DBAPI aparte (sin disparar eventos)"""
+        if not statement.lstrip().upper().startswith(_CON_PLAN):
+            return None
+        try:
+            if dialecto == "sqlite":
+                explicacion = cursor.connection.cursor(sqlite3.Cursor)
+                explicacion.execute("EXPLAIN QUERY PLAN " + statement, parametros or ())
+                return [fila[-1] for fila in explicacion.fetchall()]
+            explicacion = cursor.connection.cursor()
+            explicacion.execute("EXPLAIN " + statement, parametros or None)
+            return [fila[0] for fila in explicacion.fetchall()]
+        except Exception as e:
+            return [f"No fue posible obtener el plan: {e}"]
+
+    def entradas(self, limite: int = None):
+        """Retorna las consultas lentas registradas, de la más reciente a la más antigua"""
+        with self._lock:
+            entradas = list(self._entradas)
+        entradas.reverse()
+        return entradas[:limite] if limite else entradas
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def volcar(self, ruta: str) -> int:
+        """Escribe las consultas registradas en un archivo JSON Lines; retorna cuántas"""
+        entradas = self.entradas()
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with open(ruta, "a", encoding="utf-8") as archivo:
+            for entrada in reversed(entradas):
+                archivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        return len(entradas)
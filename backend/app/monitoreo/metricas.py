@@ -0,0 +1,264 @@
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+# Límites (en segundos) de los histogramas de latencia
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BUCKETS_LOTE = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+class _Histograma:
+    __slots__ = ("buckets", "conteos", "suma", "total")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * len(buckets)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.conteos[i] += 1
+                break
+        self.suma += valor
+        self.total += 1
+
+class RegistroMetricas:
+    """Registro en memoria de contadores, gauges e histogramas con exportación Prometheus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tipos: Dict[str, Tuple[str, str, tuple]] = {}
+        self._valores: Dict[str, Dict[tuple, object]] = {}
+
+    def describir(self, nombre: str, tipo: str, ayuda: str, buckets: tuple = None):
+        """Declara una métrica (counter, gauge o histogram)"""
+        with self._lock:
+            self._tipos[nombre] = (tipo, ayuda, buckets or BUCKETS_LATENCIA)
+            self._valores.setdefault(nombre, {})
+
+    def incrementar(self, nombre: str, valor: float = 1, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            serie = self._valores.setdefault(nombre, {})
+            serie[clave] = serie.get(clave, 0) + valor
+
+    def fijar(self, nombre: str, valor: float, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            self._valores.setdefault(nombre, {})[clave] = valor
+
+    def observar(self, nombre: str, valor: float, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            serie = self._valores.setdefault(nombre, {})
+            histograma = serie.get(clave)
+            if histograma is None:
+                buckets = self._tipos.get(nombre, ("histogram", "", BUCKETS_LATENCIA))[2]
+                histograma = serie[clave] = _Histograma(buckets)
+            histograma.observar(valor)
+
+    def valor(self, nombre: str, **etiquetas):
+        """Valor actual de un contador o gauge (0 si no existe)"""
+        with self._lock:
+            return self._valores.get(nombre, {}).get(tuple(sorted(etiquetas.items())), 0)
+
+    def exportar(self) -> str:
+        """Exporta todas las métricas en el formato de texto de Prometheus"""
+        lineas = []
+        with self._lock:
+            for nombre, serie in self._valores.items():
+                tipo, ayuda, _ = self._tipos.get(nombre, ("untyped", "", None))
+                if ayuda:
+                    lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} {tipo}")
+                for clave, valor in serie.items():
+                    if isinstance(valor, _Histograma):
+                        acumulado = 0
+                        for limite, conteo in zip(valor.buckets, valor.conteos):
+                            acumulado += conteo
+                            lineas.append(f"{nombre}_bucket{_etiquetas(clave, le=limite)} {acumulado}")
+                        lineas.append(f"{nombre}_bucket{_etiquetas(clave, le='+Inf')} {valor.total}")
+                        lineas.append(f"{nombre}_sum{_etiquetas(clave)} {valor.suma}")
+                        lineas.append(f"{nombre}_count{_etiquetas(clave)} {valor.total}")
+                    else:
+                        lineas.append(f"{nombre}{_etiquetas(clave)} {valor}")
+        return "\n".join(lineas) + "\n"
+
+def _etiquetas(clave: tuple, **extra) -> str:
+    pares = list(clave) + list(extra.items())
+    if not pares:
+        return ""
+    texto = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pares
+    )
+    return "{" + texto + "}"
+
+registro = RegistroMetricas()
+registro.describir("polimarket_http_request_duration_seconds", "histogram",
+                   "Latencia de las peticiones HTTP por ruta")
+registro.describir("polimarket_http_requests_total", "counter",
+                   "Peticiones HTTP por ruta, método y código de estado")
+registro.describir("polimarket_db_queries_per_request", "histogram",
+                   "Consultas SQL emitidas por petición", BUCKETS_CONSULTAS)
+registro.describir("polimarket_db_queries_total", "counter", "Consultas SQL emitidas por ruta")
+registro.describir("polimarket_db_time_seconds_total", "counter", "Tiempo total en base de datos por ruta")
+registro.describir("polimarket_db_rows_total", "counter",
+                   "Filas leídas o afectadas por las consultas SQL, por ruta")
+registro.describir("polimarket_arranque_seconds", "gauge",
+                   "Duración de las etapas de arranque del worker (importación, esquema, conexiones)")
+registro.describir("polimarket_respaldo_progreso_ratio", "gauge", "Avance del respaldo en curso (0 a 1)")
+registro.describir("polimarket_respaldo_paginas_restantes", "gauge", "Páginas pendientes del respaldo en curso")
+registro.describir("polimarket_respaldo_duracion_seconds", "gauge", "Duración del último respaldo exitoso")
+registro.describir("polimarket_respaldo_ultimo_exito_timestamp_seconds", "gauge",
+                   "Fecha (epoch) del último respaldo exitoso")
+registro.describir("polimarket_respaldos_total", "counter", "Respaldos ejecutados por resultado")
+registro.describir("polimarket_wal_bytes", "gauge", "Tamaño actual del archivo WAL")
+registro.describir("polimarket_wal_checkpoint_lag_frames", "gauge",
+                   "Páginas del WAL pendientes de copiar a la base tras el último checkpoint")
+registro.describir("polimarket_wal_checkpoints_total", "counter", "Checkpoints del WAL por modo y resultado")
+registro.describir("polimarket_transacciones_total", "counter",
+                   "Intentos de ejecutar una unidad de trabajo de escritura, por operación")
+registro.describir("polimarket_transacciones_reintentos_total", "counter",
+                   "Intentos repetidos por error transitorio, por operación y motivo (version, bloqueo, serializacion)")
+registro.describir("polimarket_transacciones_agotadas_total", "counter",
+                   "Operaciones que fallaron tras agotar los reintentos, por operación y motivo")
+registro.describir("polimarket_commit_grupal_tamano_lote", "histogram",
+                   "Unidades de trabajo confirmadas en cada commit del escritor grupal", BUCKETS_LOTE)
+registro.describir("polimarket_commit_grupal_espera_seconds", "histogram",
+                   "Tiempo desde que una escritura entra a la cola del escritor grupal hasta su commit")
+registro.describir("polimarket_sse_suscriptores", "gauge", "Conexiones SSE abiertas en este worker")
+registro.describir("polimarket_sse_mensajes_total", "counter", "Cambios enviados por SSE, ya coalescidos por clave")
+registro.describir("polimarket_sse_desbordes_total", "counter",
+                   "Conexiones SSE que acumularon demasiados cambios pendientes y recibieron resync")
+registro.describir("polimarket_compresion_bytes_total", "counter",
+                   "Bytes de respuesta antes (entrada) y después (salida) de comprimir, por codificación")
+registro.describir("polimarket_compresion_cache_total", "counter",
+                   "Búsquedas de cuerpos ya comprimidos por ETag, por resultado")
+registro.describir("polimarket_compresion_cache_bytes", "gauge", "Bytes ocupados por la caché de cuerpos comprimidos")
+registro.describir("polimarket_eventos_purgados_total", "counter", "Eventos borrados del outbox por la retención")
+
+# ==================== MEDICIÓN DE CONSULTAS ====================
+
+class EstadisticasPeticion:
+    """Contadores de base de datos acumulados durante una petición"""
+    __slots__ = ("consultas", "tiempo_db", "filas")
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.filas = 0
+
+_peticion_actual: ContextVar[Optional[EstadisticasPeticion]] = ContextVar("peticion_actual", default=None)
+
+def estadisticas_actuales() -> Optional[EstadisticasPeticion]:
+    return _peticion_actual.get()
+
+class CursorMedido(sqlite3.Cursor):
+    """Cursor de sqlite3 que cuenta las filas leídas en la petición actual"""
+
+    def fetchone(self):
+        fila = super().fetchone()
+        if fila is not None:
+            _sumar_filas(1)
+        return fila
+
+    def fetchmany(self, *args, **kwargs):
+        filas = super().fetchmany(*args, **kwargs)
+        _sumar_filas(len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = super().fetchall()
+        _sumar_filas(len(filas))
+        return filas
+
+class ConexionMedida(sqlite3.Connection):
+    """Conexión de sqlite3 cuyos cursores cuentan las filas leídas"""
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+def _sumar_filas(cantidad: int):
+    estadisticas = _peticion_actual.get()
+    if estadisticas is not None:
+        estadisticas.filas += cantidad
+
+def instrumentar_engine(engine):
+    """Registra los hooks before/after_cursor_execute que miden cada consulta"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        # Un solo valor por conexión (no una pila): una consulta que falla no deja restos,
+        # la siguiente lo sobrescribe
+        conn.info["inicio_consulta"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        duracion = time.perf_counter() - conn.info.pop("inicio_consulta")
+        estadisticas = _peticion_actual.get()
+        if estadisticas is not None:
+            estadisticas.consultas += 1
+            estadisticas.tiempo_db += duracion
+            # rowcount solo es válido para INSERT/UPDATE/DELETE; las lecturas se cuentan en el cursor
+            if cursor.rowcount > 0:
+                estadisticas.filas += cursor.rowcount
+
+# ==================== MIDDLEWARE HTTP ====================
+
+class MetricasMiddleware:
+    """Middleware ASGI que mide latencia y uso de base de datos por plantilla de ruta.
+
+    Agrega el encabezado `Server-Timing` a cada respuesta y acumula los
+    histogramas expuestos en `/metrics`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estadisticas = EstadisticasPeticion()
+        token = _peticion_actual.set(estadisticas)
+        inicio = time.perf_counter()
+        codigo = [500]
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                codigo[0] = mensaje["status"]
+                total_ms = (time.perf_counter() - inicio) * 1000
+                encabezados = MutableHeaders(scope=mensaje)
+                encabezados.append(
+                    "Server-Timing",
+                    f'db;dur={estadisticas.tiempo_db * 1000:.2f};desc="{estadisticas.consultas} consultas", '
+                    f'app;dur={total_ms:.2f}'
+                )
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _peticion_actual.reset(token)
+            ruta = scope.get("route")
+            plantilla = getattr(ruta, "path", None) or "sin_ruta"
+            metodo = scope.get("method", "")
+            registro.observar("polimarket_http_request_duration_seconds",
+                              time.perf_counter() - inicio, ruta=plantilla, metodo=metodo)
+            registro.incrementar("polimarket_http_requests_total",
+                                 ruta=plantilla, metodo=metodo, codigo=codigo[0])
+            registro.observar("polimarket_db_queries_per_request", estadisticas.consultas,
+                              ruta=plantilla, metodo=metodo)
+            registro.incrementar("polimarket_db_queries_total", estadisticas.consultas,
+                                 ruta=plantilla, metodo=metodo)
+            registro.incrementar("polimarket_db_time_seconds_total", estadisticas.tiempo_db,
+                                 ruta=plantilla, metodo=metodo)
+            registro.incrementar("polimarket_db_rows_total", estadisticas.filas,
+                                 ruta=plantilla, metodo=metodo)
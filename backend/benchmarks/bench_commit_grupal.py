@@ -0,0 +1,113 @@
+"""Benchmark de escrituras por segundo: commit por petición vs. escritor grupal (SQLite).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_commit_grupal --hilos 32 --duracion 10
+    python -m benchmarks.bench_commit_grupal --synchronous FULL --max-lote 128 --max-espera-ms 5
+
+N hilos (uno por petición concurrente) llaman a InventarioManager.actualizar_stock
+sobre productos al azar durante un tiempo fijo, primero con un commit por
+llamada y luego con el escritor grupal activo. Reporta escrituras por segundo
+y latencias p50/p99 de cada modo.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from .datos import ESCALAS, preparar
+
+def correr(SessionLocal, productos: int, hilos: int, duracion: float, semilla: int) -> dict:
+    from app.components.inventario_manager import InventarioManager
+
+    latencias, fallidas = [], [0]
+    candado = threading.Lock()
+    fin = time.monotonic() + duracion
+
+    def trabajador(numero):
+        rnd = random.Random(semilla + numero)
+        propias, errores = [], 0
+        while time.monotonic() < fin:
+            db = SessionLocal()
+            inicio = time.perf_counter()
+            try:
+                if not InventarioManager(db).actualizar_stock(rnd.randint(1, productos), 1):
+                    errores += 1
+            except Exception:
+                errores += 1
+            propias.append(time.perf_counter() - inicio)
+            db.close()
+        with candado:
+            latencias.extend(propias)
+            fallidas[0] += errores
+
+    inicio = time.perf_counter()
+    corriendo = [threading.Thread(target=trabajador, args=(i,)) for i in range(hilos)]
+    for hilo in corriendo:
+        hilo.start()
+    for hilo in corriendo:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "escrituras": len(latencias),
+        "fallidas": fallidas[0],
+        "por_segundo": len(latencias) / transcurrido,
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p99_ms": latencias[int(0.99 * (len(latencias) - 1))] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena")
+    parser.add_argument("--hilos", type=int, default=32)
+    parser.add_argument("--duracion", type=float, default=10)
+    parser.add_argument("--max-lote", type=int, default=64)
+    parser.add_argument("--max-espera-ms", type=float, default=2)
+    parser.add_argument("--synchronous", choices=["NORMAL", "FULL"], default="NORMAL",
+                        help="FULL hace fsync en cada commit (el caso que más se beneficia)")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        # La aplicación resuelve ./polimarket.db al importarse: todo se ejecuta desde el directorio temporal
+        try:
+            os.chdir(directorio)
+            print(f"Preparando base de datos ({args.escala})...", file=sys.stderr)
+            preparar(os.path.join(directorio, "polimarket.db"), args.escala, args.semilla)
+
+            from sqlalchemy import event
+            from app.models.database import SessionLocal, engine
+            from app.components.escritor_grupal import escritor_grupal
+
+            @event.listens_for(engine, "connect")
+            def _sincronizacion(conexion_dbapi, registro_conexion):
+                conexion_dbapi.execute(f"PRAGMA synchronous = {args.synchronous}")
+            engine.dispose()
+
+            productos = ESCALAS[args.escala]["productos"]
+            resultados = {"por_peticion": correr(SessionLocal, productos, args.hilos, args.duracion, args.semilla)}
+
+            escritor_grupal.max_lote = args.max_lote
+            escritor_grupal.max_espera_ms = args.max_espera_ms
+            escritor_grupal.iniciar()
+            try:
+                resultados["grupal"] = correr(SessionLocal, productos, args.hilos, args.duracion, args.semilla)
+            finally:
+                escritor_grupal.detener()
+            engine.dispose()
+        finally:
+            os.chdir(cwd)
+
+    print(f"synchronous={args.synchronous}, {args.hilos} hilos, lote<={args.max_lote}, "
+          f"espera<={args.max_espera_ms} ms")
+    print(f"{'modo':12} {'escrituras/s':>12} {'p50 ms':>8} {'p99 ms':>8} {'fallidas':>9}")
+    for modo, r in resultados.items():
+        print(f"{modo:12} {r['por_segundo']:12.1f} {r['p50_ms']:8.2f} {r['p99_ms']:8.2f} {r['fallidas']:9}")
+
+if __name__ == "__main__":
+    main()
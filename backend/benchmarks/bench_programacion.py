@@ -0,0 +1,79 @@
+"""Benchmark del motor de programación de entregas con datos sintéticos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_programacion --entregas 100000 --dias 14
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.entities import Base, Entrega
+from app.components.programacion_manager import ProgramacionManager, asignar_rutas
+
+CIUDADES = ["Bogotá", "Medellín", "Cali", "Barranquilla", "Bucaramanga", "Pereira"]
+VIAS = ["Calle", "Carrera", "Avenida", "Diagonal", "Transversal"]
+
+def direccion_sintetica(rnd: random.Random) -> str:
+    return (f"{rnd.choice(VIAS)} {rnd.randint(1, 200)} #{rnd.randint(1, 120)}-{rnd.randint(1, 99)}, "
+            f"{rnd.choice(CIUDADES)}")
+
+def transportistas_sinteticos(entregas: int, dias: int, holgura: float):
+    """Capacidad diaria repartida entre 8 transportistas con holgura sobre la demanda"""
+    capacidad_total = int(entregas / dias * holgura)
+    pesos = [5, 4, 4, 3, 3, 2, 2, 1]
+    return {f"Transportista {i + 1}": max(1, capacidad_total * p // sum(pesos)) for i, p in enumerate(pesos)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entregas", type=int, default=100_000)
+    parser.add_argument("--dias", type=int, default=14)
+    parser.add_argument("--holgura", type=float, default=1.1, help="Capacidad total / demanda")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semilla)
+    desde = date(2024, 1, 1)
+    hasta = desde + timedelta(days=args.dias - 1)
+    transportistas = transportistas_sinteticos(args.entregas, args.dias, args.holgura)
+    filas = [
+        {
+            "id": i + 1,
+            "venta_id": i + 1,
+            "fecha_entrega": desde + timedelta(days=rnd.randrange(args.dias)),
+            "direccion": direccion_sintetica(rnd),
+            "estado": "PENDIENTE",
+            "transportista": None
+        } for i in range(args.entregas)
+    ]
+
+    # Algoritmo puro, sin base de datos
+    inicio = time.perf_counter()
+    asignaciones = asignar_rutas(
+        [(f["id"], f["fecha_entrega"], f["direccion"]) for f in filas], desde, args.dias, transportistas
+    )
+    t_algoritmo = time.perf_counter() - inicio
+
+    # Extremo a extremo contra SQLite (lectura, asignación, UPDATE en lote y commit)
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = create_engine(f"sqlite:///{os.path.join(directorio, 'bench.db')}")
+        Base.metadata.create_all(bind=engine, tables=[Entrega.__table__])
+        with engine.begin() as conn:
+            conn.execute(Entrega.__table__.insert(), filas)
+
+        db = sessionmaker(bind=engine)()
+        inicio = time.perf_counter()
+        resumen = ProgramacionManager(db).programar_entregas(desde, hasta, transportistas)
+        t_total = time.perf_counter() - inicio
+        db.close()
+        engine.dispose()
+
+    print(f"Entregas: {args.entregas}  días: {args.dias}  transportistas: {len(transportistas)}")
+    print(f"asignar_rutas:       {t_algoritmo:8.3f} s  ({len(asignaciones)} asignadas)")
+    print(f"programar_entregas:  {t_total:8.3f} s  {resumen}")
+
+if __name__ == "__main__":
+    main()
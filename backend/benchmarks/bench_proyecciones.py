@@ -0,0 +1,123 @@
+"""Benchmark de los listados: entidades ORM completas vs. proyecciones de solo lectura.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_proyecciones --filas 100000
+
+Para cada listado mide la llamada al Manager más la conversión a dicts que
+hace el endpoint: mediana de tiempo y memoria pico (tracemalloc), normalizadas
+por cada 100.000 filas.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.entities import Base
+from app.components.inventario_manager import ProductoManager
+from app.components.venta_manager import ClienteManager
+from app.components.entrega_manager import LogisticaManager
+from app.components.proveedor_manager import CompraManager
+
+FECHA = date(2024, 3, 1)
+
+def sembrar(engine, filas: int, rnd: random.Random):
+    """Inserta `filas` productos, clientes, entregas (todas en FECHA) y compras (del proveedor 1)"""
+    texto = "Texto de relleno para columnas largas. " * 5
+    conexion = engine.raw_connection()
+    try:
+        cursor = conexion.cursor()
+        cursor.executemany(
+            "INSERT INTO productos (id, nombre, descripcion, precio, categoria, proveedor_id) VALUES (?, ?, ?, ?, ?, 1)",
+            ((i, f"Producto {i}", texto, rnd.randint(10, 5000) * 1000, "Hogar") for i in range(1, filas + 1)))
+        cursor.executemany(
+            "INSERT INTO clientes (id, tipo_documento, documento, nombre, email, telefono, direccion, tipo_cliente) "
+            "VALUES (?, 'CC', ?, ?, ?, '3100000000', ?, 'REGULAR')",
+            ((i, f"C{i:09d}", f"Cliente {i}", f"cliente{i}@email.com", texto) for i in range(1, filas + 1)))
+        cursor.executemany(
+            "INSERT INTO entregas (id, venta_id, fecha_entrega, direccion, estado) VALUES (?, ?, ?, ?, 'PENDIENTE')",
+            ((i, i, FECHA.isoformat(), texto) for i in range(1, filas + 1)))
+        cursor.executemany(
+            "INSERT INTO compras (id, proveedor_id, fecha_compra, fecha_entrega, total, estado, numero_orden) "
+            "VALUES (?, 1, ?, ?, ?, 'RECIBIDA', ?)",
+            ((i, FECHA.isoformat(), FECHA.isoformat(), rnd.randint(1, 900) * 1000, f"OC-{i:08d}")
+             for i in range(1, filas + 1)))
+        conexion.commit()
+    finally:
+        conexion.close()
+
+# Conversión a dicts idéntica a la de cada endpoint
+def _productos(filas):
+    return [{"id": p.id, "nombre": p.nombre, "descripcion": p.descripcion, "precio": float(p.precio),
+             "categoria": p.categoria} for p in filas]
+
+def _clientes(filas):
+    return [{"id": c.id, "nombre": c.nombre, "email": c.email, "tipo_cliente": c.tipo_cliente} for c in filas]
+
+def _entregas(filas):
+    return [{"id": e.id, "venta_id": e.venta_id, "fecha_entrega": e.fecha_entrega.isoformat(),
+             "estado": e.estado} for e in filas]
+
+def _compras(filas):
+    return [{"id": c.id, "fecha_compra": c.fecha_compra, "fecha_entrega": c.fecha_entrega,
+             "total": float(c.total), "estado": c.estado, "numero_orden": c.numero_orden} for c in filas]
+
+LISTADOS = [
+    ("listar_productos", lambda db: ProductoManager(db).listar_productos(),
+     lambda db: ProductoManager(db).listar_productos_resumen(), _productos),
+    ("listar_clientes", lambda db: ClienteManager(db).listar_clientes(),
+     lambda db: ClienteManager(db).listar_clientes_resumen(), _clientes),
+    ("consultar_entregas_por_fecha", lambda db: LogisticaManager(db).consultar_entregas_por_fecha(FECHA),
+     lambda db: LogisticaManager(db).consultar_entregas_por_fecha_resumen(FECHA), _entregas),
+    ("listar_compras_por_proveedor", lambda db: CompraManager(db).listar_compras_por_proveedor(1),
+     lambda db: CompraManager(db).listar_compras_por_proveedor_resumen(1), _compras),
+]
+
+def medir(Sesion, consulta, convertir, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        db = Sesion()
+        inicio = time.perf_counter()
+        convertir(consulta(db))
+        tiempos.append(time.perf_counter() - inicio)
+        db.close()
+
+    db = Sesion()
+    tracemalloc.start()
+    try:
+        filas = consulta(db)
+        convertir(filas)
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        db.close()
+    return statistics.median(tiempos), pico, len(filas)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = create_engine(f"sqlite:///{os.path.join(directorio, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        sembrar(engine, args.filas, random.Random(args.semilla))
+        Sesion = sessionmaker(bind=engine)
+
+        escala = 100_000 / args.filas
+        print(f"{'listado':30} {'variante':10} {'ms/100k':>9} {'MB pico/100k':>13}")
+        for nombre, orm, resumen, convertir in LISTADOS:
+            for variante, consulta in (("orm", orm), ("resumen", resumen)):
+                tiempo, pico, filas = medir(Sesion, consulta, convertir, args.repeticiones)
+                assert filas == args.filas, f"{nombre}: {filas} filas"
+                print(f"{nombre:30} {variante:10} {tiempo * 1000 * escala:9.1f} {pico / 2**20 * escala:13.1f}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Benchmark del canal SSE: memoria por suscriptor ocioso y difusión de ráfagas de stock.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_sse --suscriptores 5000 --rafaga 200
+
+Levanta `run.py --prod --workers 1` sobre una base sembrada, abre N conexiones
+a /eventos/stream y mide el RSS del worker antes y después (KB por suscriptor).
+Luego envía una ráfaga de ajustes de stock sobre un mismo producto y mide
+cuánto tarda el último suscriptor en ver el stock final y cuántos mensajes
+recibe cada uno (la coalescencia por clave los reduce).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from .carga import BACKEND, _puerto_libre
+from .datos import preparar
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as archivo:
+        for linea in archivo:
+            if linea.startswith("VmRSS:"):
+                return int(linea.split()[1])
+    return 0
+
+class Suscriptor:
+    """Conexión SSE cruda (sin cliente HTTP) que registra los eventos de stock recibidos"""
+
+    def __init__(self):
+        self.stock = []
+        self.visto_final = None
+        self.final = None
+
+    async def conectar(self, puerto: int, producto_id: int):
+        self.lector, self.escritor = await asyncio.open_connection("127.0.0.1", puerto)
+        self.escritor.write(
+            f"GET /eventos/stream?canal=stock&producto_id={producto_id} HTTP/1.1\r\n"
+            f"Host: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n".encode()
+        )
+        await self.escritor.drain()
+        await self.lector.readuntil(b"retry: 3000\n\n")
+
+    async def leer(self):
+        bufer = b""
+        while True:
+            bloque = await self.lector.read(65536)
+            if not bloque:
+                return
+            bufer += bloque
+            *mensajes, bufer = bufer.split(b"\n\n")
+            for mensaje in mensajes:
+                for linea in mensaje.split(b"\n"):
+                    if linea.startswith(b"data: ") and b"cantidad_disponible" in linea:
+                        disponible = json.loads(linea[6:])["cantidad_disponible"]
+                        self.stock.append(disponible)
+                        if disponible == self.final and self.visto_final is None:
+                            self.visto_final = time.perf_counter()
+
+    def cerrar(self):
+        self.escritor.close()
+
+async def correr(args, puerto: int, pid: int) -> dict:
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{puerto}", timeout=30) as cliente:
+        for _ in range(300):
+            try:
+                if (await cliente.get("/health")).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+        else:
+            raise RuntimeError("El servidor no respondió a /health")
+
+        inicial = (await cliente.get(f"/inventario/stock/{args.producto}")).json()["data"]["cantidad_disponible"]
+        await asyncio.sleep(1)
+        rss_antes = rss_kb(pid)
+
+        suscriptores = [Suscriptor() for _ in range(args.suscriptores)]
+        for i in range(0, len(suscriptores), 200):
+            await asyncio.gather(*(s.conectar(puerto, args.producto) for s in suscriptores[i:i + 200]))
+        await asyncio.sleep(1)
+        rss_despues = rss_kb(pid)
+
+        lectores = [asyncio.create_task(s.leer()) for s in suscriptores]
+        final = inicial + args.rafaga
+        for s in suscriptores:
+            s.final = final
+
+        inicio = time.perf_counter()
+        limite = asyncio.Semaphore(16)
+
+        async def ajustar():
+            async with limite:
+                respuesta = await cliente.post(f"/inventario/stock/{args.producto}", params={"cantidad": 1})
+                respuesta.raise_for_status()
+
+        await asyncio.gather(*(ajustar() for _ in range(args.rafaga)))
+        escrituras = time.perf_counter() - inicio
+        while any(s.visto_final is None for s in suscriptores) and time.perf_counter() - inicio < 60:
+            await asyncio.sleep(0.01)
+
+        for s in suscriptores:
+            s.cerrar()
+        for lector in lectores:
+            lector.cancel()
+        await asyncio.gather(*lectores, return_exceptions=True)
+
+    entregados = [s.visto_final - inicio for s in suscriptores if s.visto_final is not None]
+    mensajes = [len(s.stock) for s in suscriptores]
+    return {
+        "suscriptores": args.suscriptores,
+        "rss_base_mb": rss_antes / 1024,
+        "kb_por_suscriptor": (rss_despues - rss_antes) / args.suscriptores,
+        "rafaga": args.rafaga,
+        "escrituras_s": escrituras,
+        "vieron_stock_final": len(entregados),
+        "ultimo_en_ver_final_s": max(entregados) if entregados else None,
+        "mensajes_por_suscriptor_mediana": statistics.median(mensajes),
+        "mensajes_por_suscriptor_max": max(mensajes),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escala", default="pequena")
+    parser.add_argument("--suscriptores", type=int, default=2000)
+    parser.add_argument("--rafaga", type=int, default=200, help="Ajustes de stock sobre el mismo producto")
+    parser.add_argument("--producto", type=int, default=1)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        try:
+            os.chdir(directorio)
+            print(f"Preparando base de datos ({args.escala})...", file=sys.stderr)
+            preparar(os.path.join(directorio, "polimarket.db"), args.escala, args.semilla)
+        finally:
+            os.chdir(cwd)
+
+        puerto = _puerto_libre()
+        servidor = subprocess.Popen(
+            [sys.executable, os.path.join(BACKEND, "run.py"), "--prod", "--host", "127.0.0.1",
+             "--port", str(puerto), "--workers", "1"],
+            cwd=directorio, env=dict(os.environ, PYTHONPATH=BACKEND),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            resultado = asyncio.run(correr(args, puerto, servidor.pid))
+        finally:
+            servidor.terminate()
+            servidor.wait(timeout=60)
+
+    print(json.dumps(resultado, indent=2))
+
+if __name__ == "__main__":
+    main()
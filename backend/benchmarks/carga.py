@@ -0,0 +1,311 @@
+"""Pruebas de carga reproducibles de la API REST.
+
+Uso (desde backend/):
+    python -m benchmarks.carga ejecutar --mezcla checkout --escala pequena --duracion 30 --salida base.json
+    python -m benchmarks.carga ejecutar --modo subproceso --workers 4 --mezcla catalogo --salida nuevo.json
+    python -m benchmarks.carga comparar base.json nuevo.json --tolerancia 0.10
+
+El modo `proceso` monta la aplicación en el mismo proceso con httpx.ASGITransport
+(sin red). El modo `subproceso` levanta `run.py --prod` y lo ataca por HTTP. En ambos
+casos se usa una copia recién sembrada de la base de datos en un directorio
+temporal, de modo que las corridas son comparables entre sí.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+import httpx
+from app.models.instantaneas import restaurar_instantanea
+from .datos import ESCALAS, preparar
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ==================== OPERACIONES Y MEZCLAS ====================
+
+def _venta(rnd, ctx):
+    detalles = [
+        {"producto_id": rnd.randint(1, ctx["productos"]), "cantidad": rnd.randint(1, 3)}
+        for _ in range(rnd.randint(1, 4))
+    ]
+    return "POST", "/ventas/", {
+        "vendedor_id": rnd.randint(1, ctx["vendedores"]),
+        "cliente_id": rnd.randint(1, ctx["clientes"]),
+        "fecha": date.today().isoformat(),
+        "detalles": detalles
+    }
+
+def _rango_entregas(rnd, ctx):
+    desde = ctx["fecha_inicio"] + timedelta(days=rnd.randrange(ctx["dias"]))
+    return "GET", f"/entregas/rango?desde={desde}&hasta={desde + timedelta(days=6)}&estado=PENDIENTE", None
+
+def _resumen_entregas(rnd, ctx):
+    desde = ctx["fecha_inicio"] + timedelta(days=rnd.randrange(ctx["dias"]))
+    return "GET", f"/entregas/resumen?desde={desde}&hasta={desde + timedelta(days=6)}", None
+
+OPERACIONES = {
+    "crear_venta": _venta,
+    "verificar_disponibilidad": lambda rnd, ctx: (
+        "GET", f"/inventario/disponibilidad/{rnd.randint(1, ctx['productos'])}/{rnd.randint(1, 5)}", None),
+    "consultar_stock": lambda rnd, ctx: ("GET", f"/inventario/stock/{rnd.randint(1, ctx['productos'])}", None),
+    "listar_productos": lambda rnd, ctx: ("GET", "/inventario/productos", None),
+    "consultar_producto": lambda rnd, ctx: (
+        "GET", f"/inventario/productos/{rnd.randint(1, ctx['productos'])}", None),
+    "productos_por_categoria": lambda rnd, ctx: ("GET", "/inventario/productos/categoria/Hogar", None),
+    "listar_clientes": lambda rnd, ctx: ("GET", "/ventas/clientes", None),
+    "ventas_por_vendedor": lambda rnd, ctx: (
+        "GET", f"/ventas/vendedor/{rnd.randint(1, ctx['vendedores'])}", None),
+    "entregas_pendientes": lambda rnd, ctx: ("GET", "/entregas/pendientes", None),
+    "entregas_por_rango": _rango_entregas,
+    "resumen_entregas": _resumen_entregas,
+    "consultar_entrega": lambda rnd, ctx: ("GET", f"/entregas/{rnd.randint(1, ctx['ventas'])}", None),
+    "actualizar_estado_entrega": lambda rnd, ctx: (
+        "PUT", f"/entregas/{rnd.randint(1, ctx['ventas'])}/estado?estado=EN_TRANSITO", None),
+}
+
+MEZCLAS = {
+    "checkout": {"crear_venta": 50, "verificar_disponibilidad": 30, "consultar_stock": 20},
+    "catalogo": {"listar_productos": 25, "consultar_producto": 35, "productos_por_categoria": 20,
+                 "listar_clientes": 10, "consultar_stock": 10},
+    "despacho": {"entregas_por_rango": 30, "resumen_entregas": 20, "consultar_entrega": 20,
+                 "actualizar_estado_entrega": 20, "entregas_pendientes": 10},
+    "mixta": {"crear_venta": 15, "consultar_producto": 20, "listar_productos": 10, "consultar_stock": 15,
+              "ventas_por_vendedor": 10, "entregas_por_rango": 15, "consultar_entrega": 15},
+}
+
+# ==================== EJECUCIÓN ====================
+
+def percentil(ordenados, p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not ordenados:
+        return 0.0
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+async def generar_carga(cliente: httpx.AsyncClient, mezcla: dict, duracion: float, concurrencia: int,
+                        ctx: dict, semilla: int):
+    """Lanza `concurrencia` usuarios virtuales durante `duracion` segundos"""
+    nombres, pesos = list(mezcla), list(mezcla.values())
+    latencias = defaultdict(list)
+    errores = Counter()
+    fin = time.perf_counter() + duracion
+
+    async def usuario(i: int):
+        rnd = random.Random(semilla + i)
+        while time.perf_counter() < fin:
+            nombre = rnd.choices(nombres, pesos)[0]
+            metodo, url, cuerpo = OPERACIONES[nombre](rnd, ctx)
+            inicio = time.perf_counter()
+            try:
+                respuesta = await cliente.request(metodo, url, json=cuerpo)
+                if respuesta.status_code >= 500:
+                    errores[nombre] += 1
+            except httpx.HTTPError:
+                errores[nombre] += 1
+            latencias[nombre].append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(usuario(i) for i in range(concurrencia)))
+    return latencias, errores, time.perf_counter() - inicio
+
+def resumir(latencias: dict, errores: Counter, transcurrido: float) -> dict:
+    endpoints = {}
+    todas = []
+    for nombre, valores in sorted(latencias.items()):
+        valores.sort()
+        todas.extend(valores)
+        endpoints[nombre] = {
+            "peticiones": len(valores),
+            "errores": errores.get(nombre, 0),
+            "rps": len(valores) / transcurrido,
+            "media_ms": sum(valores) / len(valores) * 1000,
+            "p50_ms": percentil(valores, 50) * 1000,
+            "p95_ms": percentil(valores, 95) * 1000,
+            "p99_ms": percentil(valores, 99) * 1000,
+        }
+    todas.sort()
+    total = {
+        "peticiones": len(todas),
+        "errores": sum(errores.values()),
+        "rps": len(todas) / transcurrido if transcurrido else 0.0,
+        "p50_ms": percentil(todas, 50) * 1000,
+        "p95_ms": percentil(todas, 95) * 1000,
+        "p99_ms": percentil(todas, 99) * 1000,
+    }
+    return {"total": total, "endpoints": endpoints}
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _commit_actual():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+async def _ejecutar_en_proceso(args, ctx):
+    sys.path.insert(0, BACKEND)
+    from app.main import app
+    transporte = httpx.ASGITransport(app=app)
+    # ASGITransport no ejecuta el lifespan; se corre a mano como lo haría uvicorn
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark") as cliente:
+            if args.calentamiento:
+                await generar_carga(cliente, MEZCLAS[args.mezcla], args.calentamiento, args.concurrencia, ctx, 0)
+            return await generar_carga(
+                cliente, MEZCLAS[args.mezcla], args.duracion, args.concurrencia, ctx, args.semilla
+            )
+
+async def _ejecutar_en_subproceso(args, ctx):
+    puerto = _puerto_libre()
+    entorno = dict(os.environ, PYTHONPATH=BACKEND)
+    servidor = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND, "run.py"), "--prod", "--host", "127.0.0.1", "--port", str(puerto),
+         "--workers", str(args.workers)],
+        cwd=args.directorio, env=entorno
+    )
+    try:
+        limites = httpx.Limits(max_connections=args.concurrencia, max_keepalive_connections=args.concurrencia)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{puerto}", limits=limites,
+                                     timeout=30) as cliente:
+            for _ in range(300):
+                try:
+                    if (await cliente.get("/health")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("El servidor no respondió a /health")
+
+            if args.calentamiento:
+                await generar_carga(cliente, MEZCLAS[args.mezcla], args.calentamiento, args.concurrencia, ctx, 0)
+            return await generar_carga(
+                cliente, MEZCLAS[args.mezcla], args.duracion, args.concurrencia, ctx, args.semilla
+            )
+    finally:
+        servidor.terminate()
+        servidor.wait(timeout=30)
+
+def ejecutar(args):
+    escala = ESCALAS[args.escala]
+    fecha_inicio, dias = date(2024, 1, 1), 365
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        args.directorio = directorio
+        ruta_db = os.path.join(directorio, "polimarket.db")
+        # La aplicación resuelve ./polimarket.db al importarse: todo se ejecuta desde el directorio temporal
+        try:
+            if args.base_datos:
+                restaurar_instantanea(args.base_datos, ruta_db)
+            os.chdir(directorio)
+            if not args.base_datos:
+                print(f"Preparando base de datos ({args.escala})...", file=sys.stderr)
+                preparar(ruta_db, args.escala, args.semilla, fecha_inicio, dias)
+            ctx = dict(escala, fecha_inicio=fecha_inicio, dias=dias)
+
+            corrida = _ejecutar_en_proceso if args.modo == "proceso" else _ejecutar_en_subproceso
+            latencias, errores, transcurrido = asyncio.run(corrida(args, ctx))
+        finally:
+            os.chdir(cwd)
+
+    reporte = {
+        "metadatos": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit_actual(),
+            "mezcla": args.mezcla,
+            "escala": args.escala,
+            "modo": args.modo,
+            "workers": args.workers if args.modo == "subproceso" else 1,
+            "concurrencia": args.concurrencia,
+            "duracion_s": args.duracion,
+            "python": sys.version.split()[0],
+        },
+        **resumir(latencias, errores, transcurrido)
+    }
+    texto = json.dumps(reporte, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
+    print(texto)
+
+# ==================== COMPARACIÓN ====================
+
+def comparar(base: dict, nuevo: dict, tolerancia: float):
+    """Compara dos reportes; una regresión es p95 más alto o rps más bajo que la tolerancia"""
+    filas = []
+    for nombre in sorted(set(base["endpoints"]) | set(nuevo["endpoints"])):
+        a, b = base["endpoints"].get(nombre), nuevo["endpoints"].get(nombre)
+        if not a or not b:
+            filas.append({"endpoint": nombre, "estado": "SOLO_BASE" if a else "SOLO_NUEVO"})
+            continue
+        delta_p95 = (b["p95_ms"] - a["p95_ms"]) / a["p95_ms"] if a["p95_ms"] else 0.0
+        delta_rps = (b["rps"] - a["rps"]) / a["rps"] if a["rps"] else 0.0
+        if delta_p95 > tolerancia or delta_rps < -tolerancia:
+            estado = "REGRESION"
+        elif delta_p95 < -tolerancia or delta_rps > tolerancia:
+            estado = "MEJORA"
+        else:
+            estado = "IGUAL"
+        filas.append({
+            "endpoint": nombre, "estado": estado,
+            "p95_base_ms": a["p95_ms"], "p95_nuevo_ms": b["p95_ms"], "delta_p95": delta_p95,
+            "rps_base": a["rps"], "rps_nuevo": b["rps"], "delta_rps": delta_rps,
+        })
+    return filas
+
+def _comparar_archivos(args):
+    with open(args.base, encoding="utf-8") as a, open(args.nuevo, encoding="utf-8") as b:
+        filas = comparar(json.load(a), json.load(b), args.tolerancia)
+
+    print(f"{'endpoint':28} {'p95 base':>10} {'p95 nuevo':>10} {'Δp95':>8} {'rps base':>10} {'rps nuevo':>10} {'Δrps':>8}  estado")
+    for f in filas:
+        if "delta_p95" not in f:
+            print(f"{f['endpoint']:28} {'':>62}  {f['estado']}")
+            continue
+        print(f"{f['endpoint']:28} {f['p95_base_ms']:10.2f} {f['p95_nuevo_ms']:10.2f} {f['delta_p95']:+8.1%} "
+              f"{f['rps_base']:10.1f} {f['rps_nuevo']:10.1f} {f['delta_rps']:+8.1%}  {f['estado']}")
+    regresiones = [f for f in filas if f["estado"] == "REGRESION"]
+    if regresiones:
+        print(f"\n{len(regresiones)} endpoint(s) con regresión (tolerancia {args.tolerancia:.0%})")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_ejecutar = sub.add_parser("ejecutar", help="Ejecuta una prueba de carga")
+    p_ejecutar.add_argument("--mezcla", choices=MEZCLAS, default="mixta")
+    p_ejecutar.add_argument("--escala", choices=ESCALAS, default="pequena")
+    p_ejecutar.add_argument("--base-datos", help="Usar una copia de esta base sembrada en lugar de sembrar")
+    p_ejecutar.add_argument("--modo", choices=["proceso", "subproceso"], default="proceso")
+    p_ejecutar.add_argument("--workers", type=int, default=1, help="Workers de run.py --prod (modo subproceso)")
+    p_ejecutar.add_argument("--concurrencia", type=int, default=20)
+    p_ejecutar.add_argument("--duracion", type=float, default=30.0)
+    p_ejecutar.add_argument("--calentamiento", type=float, default=3.0)
+    p_ejecutar.add_argument("--semilla", type=int, default=42)
+    p_ejecutar.add_argument("--salida", help="Archivo JSON de resultados")
+    p_ejecutar.set_defaults(funcion=ejecutar)
+
+    p_comparar = sub.add_parser("comparar", help="Compara dos reportes y marca regresiones")
+    p_comparar.add_argument("base")
+    p_comparar.add_argument("nuevo")
+    p_comparar.add_argument("--tolerancia", type=float, default=0.10)
+    p_comparar.set_defaults(funcion=_comparar_archivos)
+
+    args = parser.parse_args()
+    args.funcion(args)
+
+if __name__ == "__main__":
+    main()
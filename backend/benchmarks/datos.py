@@ -0,0 +1,50 @@
+"""Siembra de bases de datos de benchmark a escala configurable.
+
+Uso (desde backend/):
+    python -m benchmarks.datos --escala pequena --salida /tmp/bench.db
+
+La generación la hace generar_datos.py; este módulo solo fija los parámetros
+que usan las pruebas de carga (año 2024 completo, una entrega por venta con
+el mismo id) y guarda cada base sembrada como instantánea, de modo que las
+corridas siguientes la restauran en milisegundos en lugar de volver a sembrar.
+"""
+import argparse
+import os
+import tempfile
+from datetime import date
+from generar_datos import ESCALAS, PASSWORD, generar
+
+DIRECTORIO_CACHE = os.environ.get(
+    "POLIMARKET_CACHE_BENCHMARKS", os.path.join(tempfile.gettempdir(), "polimarket-benchmarks")
+)
+
+def sembrar(ruta: str, escala: dict, semilla: int = 42, fecha_inicio: date = date(2024, 1, 1), dias: int = 365):
+    """Crea la base de datos en `ruta` y la llena con datos sintéticos consistentes"""
+    return generar(ruta, escala, semilla, fecha_inicio, dias)
+
+def preparar(ruta: str, nombre_escala: str, semilla: int = 42, fecha_inicio: date = date(2024, 1, 1),
+             dias: int = 365) -> str:
+    """Deja en `ruta` una base sembrada, desde la caché de instantáneas si ya existe; retorna el método"""
+    from app.models.entities import Base
+    from app.models.esquema import firma_esquema
+    from app.models.instantaneas import restaurar_instantanea
+
+    nombre = f"{nombre_escala}-s{semilla}-{fecha_inicio}-{dias}-{firma_esquema(Base.metadata)}.db"
+    instantanea = os.path.join(DIRECTORIO_CACHE, nombre)
+    if not os.path.exists(instantanea):
+        os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+        temporal = f"{instantanea}.{os.getpid()}.tmp"
+        sembrar(temporal, ESCALAS[nombre_escala], semilla, fecha_inicio, dias)
+        os.replace(temporal, instantanea)
+    return restaurar_instantanea(instantanea, ruta)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena")
+    parser.add_argument("--salida", required=True, help="Ruta del archivo SQLite a crear")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+    print(sembrar(args.salida, ESCALAS[args.escala], args.semilla))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Micro-benchmarks de los Managers contra una base de datos sembrada (sin HTTP).
+
+Uso (desde backend/):
+    python -m benchmarks.micro --escala mediana --rondas 500 --salida micro_base.json
+    python -m benchmarks.micro --solo crear_venta login_vendedor --comparar micro_base.json
+
+Cada benchmark llama directamente al método del Manager con una sesión nueva
+por llamada (como lo hace cada petición) y registra el tiempo de pared, el
+número de consultas SQL emitidas y la memoria asignada (tracemalloc). Las
+asignaciones se miden en una pasada aparte para que tracemalloc no distorsione
+los tiempos.
+
+Los benchmarks de CONSULTAS_FIJAS deben emitir siempre el mismo número de
+consultas sin importar cuántas líneas tenga la venta o compra (carga eager en
+lugar de lazy loading); si alguna llamada emite otro número, el proceso
+termina con código 1 aunque no se use --comparar.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.components.auth_manager import AutorizacionManager
+from app.components.inventario_manager import InventarioManager
+from app.components.proveedor_manager import ProveedorManager, CompraManager
+from app.components.venta_manager import VentaManager
+from app.models.instantaneas import restaurar_instantanea
+from app.models.schemas import VentaCreate, CompraCreate
+from generar_datos import VENTAS_POR_COMPRA
+from .datos import ESCALAS, PASSWORD, preparar
+
+# ==================== BENCHMARKS ====================
+
+_ordenes = itertools.count(1)
+
+def _crear_venta(db, rnd, escala):
+    venta = VentaCreate(
+        vendedor_id=rnd.randint(1, escala["vendedores"]),
+        cliente_id=rnd.randint(1, escala["clientes"]),
+        fecha=date.today(),
+        detalles=[{"producto_id": rnd.randint(1, escala["productos"]), "cantidad": rnd.randint(1, 3)}
+                  for _ in range(rnd.randint(1, 4))]
+    )
+    return lambda: VentaManager(db).crear_venta(venta)
+
+def _verificar_disponibilidad(db, rnd, escala):
+    producto_id, cantidad = rnd.randint(1, escala["productos"]), rnd.randint(1, 5)
+    return lambda: InventarioManager(db).verificar_disponibilidad(producto_id, cantidad)
+
+def _buscar_proveedores(db, rnd, escala):
+    nombre = f"Proveedor {rnd.randint(1, escala['proveedores'])}"
+    return lambda: ProveedorManager(db).buscar_proveedores_por_nombre(nombre)
+
+def _registrar_compra(db, rnd, escala):
+    compra = CompraCreate(
+        proveedor_id=rnd.randint(1, escala["proveedores"]),
+        fecha_compra=date.today(),
+        fecha_entrega=date.today() + timedelta(days=5),
+        numero_orden=f"BENCH-{os.getpid()}-{next(_ordenes)}",
+        detalles=[{"producto_id": rnd.randint(1, escala["productos"]), "cantidad": rnd.randint(10, 100),
+                   "precio_compra": rnd.randint(10, 5000) * 1000}
+                  for _ in range(rnd.randint(1, 5))]
+    )
+    return lambda: CompraManager(db).registrar_compra(compra)
+
+def _login_vendedor(db, rnd, escala):
+    email = f"vendedor{rnd.randint(1, escala['vendedores'])}@polimarket.com"
+    return lambda: AutorizacionManager(db).login_vendedor(email, PASSWORD)
+
+def _consultar_venta_detalle(db, rnd, escala):
+    venta_id = rnd.randint(1, escala["ventas"])
+
+    def llamada():
+        # Recorre las relaciones igual que el endpoint: con lazy loading cada acceso sería una consulta
+        venta = VentaManager(db).consultar_venta_detalle(venta_id)
+        return venta.cliente.nombre, [(d.producto.nombre, d.cantidad) for d in venta.detalles]
+    return llamada
+
+def _consultar_compra_detalle(db, rnd, escala):
+    compra_id = rnd.randint(1, escala["ventas"] // VENTAS_POR_COMPRA)
+
+    def llamada():
+        compra = CompraManager(db).consultar_compra_detalle(compra_id)
+        return compra.proveedor.nombre, [(d.producto.nombre, d.cantidad) for d in compra.detalles]
+    return llamada
+
+def _calcular_total_venta(db, rnd, escala):
+    venta_id = rnd.randint(1, escala["ventas"])
+    return lambda: VentaManager(db).calcular_total_venta(venta_id)
+
+# nombre -> función (db, rnd, escala) que prepara los argumentos y retorna la llamada a medir
+BENCHMARKS = {
+    "crear_venta": _crear_venta,
+    "verificar_disponibilidad": _verificar_disponibilidad,
+    "buscar_proveedores_por_nombre": _buscar_proveedores,
+    "registrar_compra": _registrar_compra,
+    "login_vendedor": _login_vendedor,
+    "consultar_venta_detalle": _consultar_venta_detalle,
+    "consultar_compra_detalle": _consultar_compra_detalle,
+    "calcular_total_venta": _calcular_total_venta,
+}
+
+# nombre -> consultas exactas por llamada, independientes del número de líneas
+CONSULTAS_FIJAS = {
+    "consultar_venta_detalle": 2,
+    "consultar_compra_detalle": 2,
+    "calcular_total_venta": 1,
+}
+
+# ==================== MEDICIÓN ====================
+
+class ContadorConsultas:
+    """Cuenta las sentencias SQL ejecutadas en un engine"""
+
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+
+def medir(preparar, Sesion, contador: ContadorConsultas, escala: dict, rondas: int, calentamiento: int,
+          rondas_memoria: int, semilla: int) -> dict:
+    """Ejecuta un benchmark y retorna sus estadísticas"""
+    rnd = random.Random(semilla)
+
+    def llamada():
+        db = Sesion()
+        return db, preparar(db, rnd, escala)
+
+    for _ in range(calentamiento):
+        db, funcion = llamada()
+        funcion()
+        db.close()
+
+    tiempos, consultas = [], []
+    for _ in range(rondas):
+        db, funcion = llamada()
+        antes = contador.total
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+        consultas.append(contador.total - antes)
+        db.close()
+
+    picos, netas = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(rondas_memoria):
+            db, funcion = llamada()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            resultado = funcion()
+            actual, pico = tracemalloc.get_traced_memory()
+            picos.append(pico - base)
+            netas.append(actual - base)
+            del resultado
+            db.close()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rondas": rondas,
+        "min_ms": min(tiempos) * 1000,
+        "max_ms": max(tiempos) * 1000,
+        "media_ms": statistics.mean(tiempos) * 1000,
+        "mediana_ms": statistics.median(tiempos) * 1000,
+        "desviacion_ms": statistics.pstdev(tiempos) * 1000,
+        "ops_por_segundo": len(tiempos) / sum(tiempos),
+        "consultas_por_llamada": statistics.mean(consultas),
+        "consultas_min": min(consultas),
+        "consultas_max": max(consultas),
+        "memoria_pico_kb": statistics.median(picos) / 1024 if picos else None,
+        "memoria_retenida_kb": statistics.median(netas) / 1024 if netas else None,
+    }
+
+def comparar(base: dict, nuevo: dict, tolerancia: float):
+    """Regresión: mediana más lenta que la tolerancia o más consultas por llamada"""
+    filas = []
+    for nombre in sorted(set(base["benchmarks"]) & set(nuevo["benchmarks"])):
+        a, b = base["benchmarks"][nombre], nuevo["benchmarks"][nombre]
+        delta = (b["mediana_ms"] - a["mediana_ms"]) / a["mediana_ms"] if a["mediana_ms"] else 0.0
+        if delta > tolerancia or b["consultas_por_llamada"] > a["consultas_por_llamada"]:
+            estado = "REGRESION"
+        elif delta < -tolerancia or b["consultas_por_llamada"] < a["consultas_por_llamada"]:
+            estado = "MEJORA"
+        else:
+            estado = "IGUAL"
+        filas.append((nombre, a, b, delta, estado))
+    return filas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena")
+    parser.add_argument("--base-datos", help="Usar una copia de esta base sembrada en lugar de sembrar")
+    parser.add_argument("--solo", nargs="+", choices=BENCHMARKS, help="Benchmarks a ejecutar")
+    parser.add_argument("--rondas", type=int, default=200)
+    parser.add_argument("--calentamiento", type=int, default=20)
+    parser.add_argument("--rondas-memoria", type=int, default=50)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", help="Reporte JSON base contra el cual comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10)
+    args = parser.parse_args()
+
+    escala = ESCALAS[args.escala]
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_db = os.path.join(directorio, "polimarket.db")
+        if args.base_datos:
+            restaurar_instantanea(args.base_datos, ruta_db)
+        else:
+            print(f"Preparando base de datos ({args.escala})...", file=sys.stderr)
+            preparar(ruta_db, args.escala, args.semilla)
+
+        engine = create_engine(f"sqlite:///{ruta_db}", connect_args={"check_same_thread": False})
+        Sesion = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        contador = ContadorConsultas(engine)
+        for nombre in args.solo or BENCHMARKS:
+            resultados[nombre] = medir(BENCHMARKS[nombre], Sesion, contador, escala, args.rondas,
+                                       args.calentamiento, args.rondas_memoria, args.semilla)
+        engine.dispose()
+
+    print(f"{'benchmark':30} {'mediana ms':>10} {'media ms':>9} {'desv.':>8} {'ops/s':>9} "
+          f"{'consultas':>9} {'pico KB':>9} {'ret. KB':>8}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:30} {r['mediana_ms']:10.3f} {r['media_ms']:9.3f} {r['desviacion_ms']:8.3f} "
+              f"{r['ops_por_segundo']:9.1f} {r['consultas_por_llamada']:9.1f} "
+              f"{r['memoria_pico_kb'] or 0:9.1f} {r['memoria_retenida_kb'] or 0:8.1f}")
+
+    reporte = {
+        "metadatos": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "escala": args.escala,
+            "rondas": args.rondas,
+            "python": sys.version.split()[0],
+        },
+        "benchmarks": resultados
+    }
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(json.dumps(reporte, indent=2, ensure_ascii=False) + "\n")
+
+    variables = [(nombre, r) for nombre, r in resultados.items() if nombre in CONSULTAS_FIJAS
+                 and not r["consultas_min"] == r["consultas_max"] == CONSULTAS_FIJAS[nombre]]
+    for nombre, r in variables:
+        print(f"REGRESION {nombre}: {r['consultas_min']}-{r['consultas_max']} consultas por llamada, "
+              f"se esperaban {CONSULTAS_FIJAS[nombre]}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            filas = comparar(json.load(archivo), reporte, args.tolerancia)
+        print(f"\n{'benchmark':30} {'base ms':>9} {'nuevo ms':>9} {'Δ':>8} {'consultas':>11}  estado")
+        for nombre, a, b, delta, estado in filas:
+            print(f"{nombre:30} {a['mediana_ms']:9.3f} {b['mediana_ms']:9.3f} {delta:+8.1%} "
+                  f"{a['consultas_por_llamada']:5.1f}→{b['consultas_por_llamada']:<5.1f}  {estado}")
+        if any(estado == "REGRESION" for *_, estado in filas):
+            sys.exit(1)
+    if variables:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Fixtures de pytest con bases de datos sembradas y aisladas por prueba.
+
+La base se siembra una sola vez por sesión (generar_datos.py, escala pequeña)
+y cada prueba recibe su propia copia restaurada desde esa instantánea con
+reflink (copy-on-write) cuando el sistema de archivos lo permite, o con una
+copia normal si no; en ambos casos toma pocos milisegundos.
+"""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from generar_datos import ESCALAS, generar
+from app.models.instantaneas import restaurar_instantanea
+
+@pytest.fixture(scope="session")
+def instantanea_semilla(tmp_path_factory):
+    """Ruta de la base sembrada que sirve de plantilla a todas las pruebas"""
+    ruta = str(tmp_path_factory.mktemp("instantaneas") / "semilla.db")
+    generar(ruta, ESCALAS["pequena"], semilla=42)
+    return ruta
+
+@pytest.fixture
+def engine_prueba(instantanea_semilla, tmp_path):
+    """Engine sobre una copia nueva de la base sembrada, exclusiva de la prueba"""
+    ruta = str(tmp_path / "polimarket.db")
+    restaurar_instantanea(instantanea_semilla, ruta)
+    engine = create_engine(f"sqlite:///{ruta}", connect_args={"check_same_thread": False})
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(engine_prueba):
+    """Sesión de SQLAlchemy sobre la base de la prueba"""
+    sesion = sessionmaker(autocommit=False, autoflush=False, bind=engine_prueba)()
+    yield sesion
+    sesion.close()
+
+@pytest.fixture
+def consultas(engine_prueba):
+    """Lista a la que se agrega cada sentencia SQL ejecutada en la base de la prueba"""
+    sentencias = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(engine_prueba, "before_cursor_execute", contar)
+    yield sentencias
+    event.remove(engine_prueba, "before_cursor_execute", contar)
+
+@pytest.fixture
+def cliente(engine_prueba):
+    """TestClient de la API cuyas dependencias get_db y get_sessionmaker usan la base de la prueba"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.models.database import get_db, get_sessionmaker
+
+    Sesion = sessionmaker(autocommit=False, autoflush=False, bind=engine_prueba)
+
+    def get_db_prueba():
+        sesion = Sesion()
+        try:
+            yield sesion
+        finally:
+            sesion.close()
+
+    app.dependency_overrides[get_db] = get_db_prueba
+    app.dependency_overrides[get_sessionmaker] = lambda: Sesion
+    # Sin `with`: el lifespan (esquema y mantenimiento) actúa sobre la base real, no sobre la de la prueba
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_sessionmaker, None)
@@ -0,0 +1,295 @@
+"""Generador de datos sintéticos a gran escala para pruebas de carga.
+
+Uso (desde backend/):
+    python generar_datos.py --escala masiva --salida /tmp/polimarket_10m.db --procesos 8
+
+A diferencia de init_data.py (unos pocos registros de ejemplo insertados uno a
+uno), genera millones de vendedores, clientes, proveedores, productos,
+inventario, ventas con sus detalles, entregas y compras, consistentes entre sí
+(precios, totales y direcciones de entrega) y deterministas para una semilla.
+
+Las ventas se generan por lotes con NumPy en procesos paralelos; cada lote usa
+su propia semilla derivada (semilla, número de lote), así que el resultado no
+depende del número de procesos. El proceso principal inserta los lotes a
+medida que llegan con executemany sobre una sola transacción, con los índices
+secundarios eliminados y PRAGMAs de carga (sin journal ni fsync), y al final
+reconstruye índices, estadísticas y agregados de reportes.
+"""
+import argparse
+import os
+import time
+from datetime import date, timedelta
+from multiprocessing import Pool
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+ESCALAS = {
+    "pequena": {"vendedores": 10, "clientes": 200, "proveedores": 10, "productos": 200, "ventas": 2_000},
+    "mediana": {"vendedores": 50, "clientes": 10_000, "proveedores": 100, "productos": 2_000, "ventas": 100_000},
+    "grande": {"vendedores": 200, "clientes": 100_000, "proveedores": 500, "productos": 10_000, "ventas": 1_000_000},
+    # ~10 millones de detalles de venta (2.5 líneas por venta en promedio)
+    "masiva": {"vendedores": 500, "clientes": 1_000_000, "proveedores": 2_000, "productos": 50_000,
+               "ventas": 4_000_000},
+}
+
+CATEGORIAS = ["Tecnología", "Hogar", "Oficina", "Deportes", "Juguetes", "Alimentos"]
+CIUDADES = ["Bogotá", "Medellín", "Cali", "Barranquilla", "Bucaramanga", "Pereira"]
+VIAS = ["Calle", "Carrera", "Avenida", "Diagonal", "Transversal"]
+TRANSPORTISTAS = ["Servientrega", "Coordinadora", "Interrapidísimo"]
+ESTADOS_ENTREGA = ["PENDIENTE", "EN_TRANSITO", "ENTREGADO", "DEVUELTO", "CANCELADO"]
+PROBABILIDAD_ESTADOS = [0.15, 0.10, 0.70, 0.03, 0.02]
+PASSWORD = "password123"
+VENTAS_POR_COMPRA = 20
+TAMANO_LOTE = 200_000
+
+PRAGMAS_CARGA = (
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",
+)
+
+# ==================== GENERACIÓN POR LOTES (procesos hijos) ====================
+
+_contexto = {}
+
+def _iniciar_proceso(semilla, escala, dias, precios):
+    _contexto.update(semilla=semilla, escala=escala, dias=dias, precios=precios)
+
+def _generar_lote(lote: int):
+    """Genera las ventas (con detalles y entregas) y las compras del lote `lote` como arreglos"""
+    semilla, escala, dias, precios = (_contexto[k] for k in ("semilla", "escala", "dias", "precios"))
+    rng = np.random.default_rng([semilla, lote])
+
+    primera = lote * TAMANO_LOTE + 1
+    ids = np.arange(primera, min(primera + TAMANO_LOTE, escala["ventas"] + 1), dtype=np.int64)
+    n = len(ids)
+    dia = rng.integers(0, dias, n)
+    lineas = rng.integers(1, 5, n)
+    venta_linea = np.repeat(ids, lineas)
+    producto = rng.integers(1, escala["productos"] + 1, len(venta_linea))
+    cantidad = rng.integers(1, 4, len(venta_linea))
+    precio = precios[producto - 1]
+    total = np.bincount(venta_linea - primera, weights=precio * cantidad, minlength=n)
+
+    ventas = {
+        "id": ids,
+        "vendedor_id": rng.integers(1, escala["vendedores"] + 1, n),
+        "cliente_id": rng.integers(1, escala["clientes"] + 1, n),
+        "dia": dia,
+        "total": total,
+        "estado_entrega": rng.choice(len(ESTADOS_ENTREGA), n, p=PROBABILIDAD_ESTADOS),
+        "transportista": rng.integers(0, len(TRANSPORTISTAS), n),
+    }
+    detalles = {"venta_id": venta_linea, "producto_id": producto, "cantidad": cantidad, "precio": precio}
+
+    total_compras = escala["ventas"] // VENTAS_POR_COMPRA
+    por_lote = TAMANO_LOTE // VENTAS_POR_COMPRA
+    primera_compra = lote * por_lote + 1
+    compra_ids = np.arange(primera_compra, min(primera_compra + por_lote, total_compras + 1), dtype=np.int64)
+    m = len(compra_ids)
+    lineas_compra = rng.integers(1, 6, m)
+    compra_linea = np.repeat(compra_ids, lineas_compra)
+    producto_compra = rng.integers(1, escala["productos"] + 1, len(compra_linea))
+    cantidad_compra = rng.integers(10, 201, len(compra_linea))
+    precio_compra = np.round(precios[producto_compra - 1] * 0.7, -2)
+    compras = {
+        "id": compra_ids,
+        "proveedor_id": rng.integers(1, escala["proveedores"] + 1, m),
+        "dia": rng.integers(0, dias, m),
+        "total": np.bincount(compra_linea - primera_compra, weights=precio_compra * cantidad_compra,
+                             minlength=m),
+    }
+    detalles_compra = {"compra_id": compra_linea, "producto_id": producto_compra,
+                       "cantidad": cantidad_compra, "precio": precio_compra}
+    return ventas, detalles, compras, detalles_compra
+
+# ==================== CARGA (proceso principal) ====================
+
+def _insertar(cursor, tabla: str, columnas, filas) -> int:
+    sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})"
+    cursor.executemany(sql, filas)
+    return cursor.rowcount
+
+def _dimensiones(rng, escala, fecha_inicio, password_hash):
+    """Genera vendedores, clientes, proveedores, productos e inventario"""
+    def direcciones(n):
+        via = rng.integers(0, len(VIAS), n).tolist()
+        numeros = rng.integers(1, 200, (n, 3)).tolist()
+        ciudad = rng.integers(0, len(CIUDADES), n).tolist()
+        return [f"{VIAS[v]} {a} #{b}-{c}, {CIUDADES[k]}" for v, (a, b, c), k in zip(via, numeros, ciudad)]
+
+    inicio = fecha_inicio.isoformat()
+    vendedores = [
+        (i, "CC", f"V{i:08d}", f"Vendedor {i}", f"vendedor{i}@polimarket.com", "3000000000", True, inicio,
+         password_hash)
+        for i in range(1, escala["vendedores"] + 1)
+    ]
+    direcciones_clientes = direcciones(escala["clientes"])
+    vip = (rng.random(escala["clientes"]) < 0.1).tolist()
+    clientes = [
+        (i, "CC", f"C{i:09d}", f"Cliente {i}", f"cliente{i}@email.com", "3100000000", direccion,
+         "VIP" if es_vip else "REGULAR")
+        for i, direccion, es_vip in zip(range(1, escala["clientes"] + 1), direcciones_clientes, vip)
+    ]
+    proveedores = [
+        (i, "NIT", f"9{i:08d}-1", f"Proveedor {i}", f"Contacto {i}", f"proveedor{i}@email.com", "6010000000",
+         direccion)
+        for i, direccion in zip(range(1, escala["proveedores"] + 1), direcciones(escala["proveedores"]))
+    ]
+    precios = rng.integers(10, 5000, escala["productos"]) * 1000
+    categorias = rng.integers(0, len(CATEGORIAS), escala["productos"]).tolist()
+    proveedor_producto = rng.integers(1, escala["proveedores"] + 1, escala["productos"]).tolist()
+    productos = [
+        (i, f"Producto {i}", f"Descripción del producto {i}", precio, CATEGORIAS[c], p)
+        for i, precio, c, p in zip(range(1, escala["productos"] + 1), precios.tolist(), categorias,
+                                   proveedor_producto)
+    ]
+    inventario = [(i, i, 1_000_000, 10, f"Estante {i % 50}") for i in range(1, escala["productos"] + 1)]
+    return vendedores, clientes, direcciones_clientes, proveedores, productos, precios, inventario
+
+def generar(ruta: str, escala: dict, semilla: int = 42, fecha_inicio: date = date(2024, 1, 1),
+            dias: int = 365, procesos: int = None, reportes: bool = True, verbose: bool = False) -> dict:
+    """Crea la base de datos en `ruta` (debe no existir) y la llena; retorna filas por tabla"""
+    # Importación diferida: app.models.database fija la ruta de la base al importarse
+    from app.models.entities import Base
+    from app.models.esquema import asegurar_esquema
+    from app.models.versiones import avanzar_versiones
+    from app.components.auth_manager import AutorizacionManager
+    from app.components.reporte_manager import ReporteManager
+
+    def etapa(mensaje):
+        if verbose:
+            print(f"[{time.perf_counter() - inicio:7.1f}s] {mensaje}", flush=True)
+
+    inicio = time.perf_counter()
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(bind=engine)
+    indices = [indice for tabla in Base.metadata.sorted_tables for indice in tabla.indexes]
+    with engine.begin() as conn:
+        for indice in indices:
+            indice.drop(bind=conn)
+
+    rng = np.random.default_rng(semilla)
+    password_hash = AutorizacionManager(None)._hash_password(PASSWORD)
+    vendedores, clientes, direcciones, proveedores, productos, precios, inventario = _dimensiones(
+        rng, escala, fecha_inicio, password_hash)
+    etapa("Dimensiones generadas")
+
+    fechas = [(fecha_inicio + timedelta(days=d)).isoformat() for d in range(dias + 7)]
+    conteos = dict.fromkeys(["vendedores", "clientes", "proveedores", "productos", "inventario", "ventas",
+                             "detalles_venta", "entregas", "compras", "detalles_compra"], 0)
+
+    conexion = engine.raw_connection()
+    try:
+        cursor = conexion.cursor()
+        for pragma in PRAGMAS_CARGA:
+            cursor.execute(pragma)
+
+        conteos["vendedores"] = _insertar(cursor, "vendedores", (
+            "id", "tipo_documento", "documento", "nombre", "email", "telefono", "estado_autorizacion",
+            "fecha_autorizacion", "password_hash"), vendedores)
+        conteos["clientes"] = _insertar(cursor, "clientes", (
+            "id", "tipo_documento", "documento", "nombre", "email", "telefono", "direccion", "tipo_cliente"),
+            clientes)
+        conteos["proveedores"] = _insertar(cursor, "proveedores", (
+            "id", "tipo_documento", "documento", "nombre", "contacto", "email", "telefono", "direccion"),
+            proveedores)
+        conteos["productos"] = _insertar(cursor, "productos", (
+            "id", "nombre", "descripcion", "precio", "categoria", "proveedor_id"), productos)
+        conteos["inventario"] = _insertar(cursor, "inventario", (
+            "id", "producto_id", "cantidad_disponible", "cantidad_minima", "ubicacion"), inventario)
+        etapa("Dimensiones insertadas")
+
+        lotes = range((escala["ventas"] + TAMANO_LOTE - 1) // TAMANO_LOTE)
+        procesos = procesos or os.cpu_count() or 1
+        with Pool(procesos, initializer=_iniciar_proceso, initargs=(semilla, escala, dias, precios)) as pool:
+            for ventas, detalles, compras, detalles_compra in pool.imap(_generar_lote, lotes):
+                ids = ventas["id"].tolist()
+                dia = ventas["dia"].tolist()
+                clientes_venta = ventas["cliente_id"].tolist()
+                conteos["ventas"] += _insertar(cursor, "ventas", (
+                    "id", "vendedor_id", "cliente_id", "fecha", "total", "estado"), zip(
+                    ids, ventas["vendedor_id"].tolist(), clientes_venta, map(fechas.__getitem__, dia),
+                    ventas["total"].tolist(), ["PENDIENTE"] * len(ids)))
+                conteos["detalles_venta"] += _insertar(cursor, "detalles_venta", (
+                    "venta_id", "producto_id", "cantidad", "precio_unitario"), zip(
+                    detalles["venta_id"].tolist(), detalles["producto_id"].tolist(),
+                    detalles["cantidad"].tolist(), detalles["precio"].tolist()))
+
+                estados = [ESTADOS_ENTREGA[e] for e in ventas["estado_entrega"].tolist()]
+                transportistas = [
+                    None if estado == "PENDIENTE" else TRANSPORTISTAS[t]
+                    for estado, t in zip(estados, ventas["transportista"].tolist())
+                ]
+                conteos["entregas"] += _insertar(cursor, "entregas", (
+                    "id", "venta_id", "fecha_entrega", "direccion", "estado", "transportista"), zip(
+                    ids, ids, [fechas[d + 2] for d in dia],
+                    [direcciones[c - 1] for c in clientes_venta], estados, transportistas))
+
+                compra_ids = compras["id"].tolist()
+                dia_compra = compras["dia"].tolist()
+                conteos["compras"] += _insertar(cursor, "compras", (
+                    "id", "proveedor_id", "fecha_compra", "fecha_entrega", "total", "estado", "numero_orden"), zip(
+                    compra_ids, compras["proveedor_id"].tolist(), map(fechas.__getitem__, dia_compra),
+                    [fechas[d + 5] for d in dia_compra], compras["total"].tolist(),
+                    ["RECIBIDA"] * len(compra_ids), [f"OC-{i:08d}" for i in compra_ids]))
+                conteos["detalles_compra"] += _insertar(cursor, "detalles_compra", (
+                    "compra_id", "producto_id", "cantidad", "precio_compra"), zip(
+                    detalles_compra["compra_id"].tolist(), detalles_compra["producto_id"].tolist(),
+                    detalles_compra["cantidad"].tolist(), detalles_compra["precio"].tolist()))
+                etapa(f"{conteos['ventas']:,} ventas / {conteos['detalles_venta']:,} detalles insertados")
+
+        conexion.commit()
+        etapa("Datos confirmados")
+        cursor.execute("PRAGMA locking_mode = NORMAL")
+        cursor.execute("PRAGMA journal_mode = DELETE")
+        cursor.close()
+    finally:
+        conexion.close()
+
+    with engine.begin() as conn:
+        for indice in indices:
+            indice.create(bind=conn)
+        conn.exec_driver_sql("ANALYZE")
+    etapa("Índices y estadísticas reconstruidos")
+    # Registra la versión del esquema para que la aplicación no repita el DDL al arrancar
+    asegurar_esquema(engine, Base.metadata)
+    # La carga va por el cursor de sqlite3, fuera de los eventos del Engine: los contadores se fijan aquí
+    avanzar_versiones(engine)
+
+    if reportes:
+        db = sessionmaker(bind=engine)()
+        try:
+            ReporteManager(db).reconstruir_agregados()
+        finally:
+            db.close()
+        etapa("Agregados de reportes reconstruidos")
+
+    engine.dispose()
+    return conteos
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera una base de datos sintética a gran escala")
+    parser.add_argument("--escala", choices=ESCALAS, default="grande")
+    parser.add_argument("--ventas", type=int, help="Sobrescribe el número de ventas de la escala")
+    parser.add_argument("--salida", required=True, help="Ruta del archivo SQLite a crear")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--desde", type=date.fromisoformat, default=date(2024, 1, 1),
+                        help="Fecha de la primera venta (YYYY-MM-DD)")
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--procesos", type=int, help="Procesos de generación (por defecto, uno por CPU)")
+    parser.add_argument("--sin-reportes", action="store_true", help="No reconstruir los agregados de reportes")
+    args = parser.parse_args()
+
+    if os.path.exists(args.salida):
+        parser.error(f"{args.salida} ya existe")
+    escala = dict(ESCALAS[args.escala])
+    if args.ventas:
+        escala["ventas"] = args.ventas
+    conteos = generar(args.salida, escala, args.semilla, args.desde, args.dias, args.procesos,
+                      not args.sin_reportes, verbose=True)
+    for tabla, filas in conteos.items():
+        print(f"{tabla:>16}: {filas:,}")
@@ -2,13 +2,14 @@ from datetime import date
 from decimal import Decimal
 from sqlalchemy.orm import Session
 from app.models.database import SessionLocal, engine
+from app.models.esquema import asegurar_esquema
 from app.models.entities import Base, Vendedor, Cliente, Producto, Inventario, Proveedor, Compra, DetalleCompra
 from app.models.schemas import VendedorCreate
 from app.components.auth_manager import AutorizacionManager
 
 def init_db():
     """Inicializa la base de datos con datos de ejemplo"""
-    Base.metadata.create_all(bind=engine)
+    asegurar_esquema(engine, Base.metadata)
     db = SessionLocal()
     
     try:
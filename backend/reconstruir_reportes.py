@@ -0,0 +1,28 @@
+import argparse
+from datetime import date
+from app.models.database import SessionLocal, engine
+from app.models.esquema import asegurar_esquema
+from app.models.entities import Base
+from app.components.reporte_manager import ReporteManager
+
+def reconstruir_reportes(desde: date = None, hasta: date = None):
+    """Recalcula las tablas de agregados de reportes a partir de las ventas"""
+    asegurar_esquema(engine, Base.metadata)
+    db = SessionLocal()
+
+    try:
+        reporte_manager = ReporteManager(db)
+        if reporte_manager.reconstruir_agregados(desde, hasta):
+            rango = f"del {desde or 'inicio'} al {hasta or 'hoy'}"
+            print(f"Agregados de reportes reconstruidos {rango}")
+        else:
+            print("No fue posible reconstruir los agregados de reportes")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruye los agregados de reportes de ventas")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Fecha inicial (YYYY-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Fecha final (YYYY-MM-DD)")
+    args = parser.parse_args()
+    reconstruir_reportes(args.desde, args.hasta)
@@ -1,4 +1,125 @@
+import argparse
+import importlib.util
+import os
+import sys
+import time
 import uvicorn
+from uvicorn.main import STARTUP_FAILURE
+from uvicorn.supervisors import ChangeReload, Multiprocess
+
+# Con SQLite las escrituras se serializan en un solo lock: más workers que esto
+# solo agregan contención (ver "Ejecución en producción" en el README)
+WORKERS_MAX_SQLITE = int(os.environ.get("POLIMARKET_WORKERS_MAX_SQLITE", "4"))
+# Bytes de la base que se leen antes de lanzar los workers para calentar la caché del sistema
+CALENTAR_MB = int(os.environ.get("POLIMARKET_CALENTAR_MB", "512"))
+
+def _disponible(modulo: str) -> bool:
+    return importlib.util.find_spec(modulo) is not None
+
+def workers_recomendados(url_base_datos: str) -> int:
+    nucleos = os.cpu_count() or 1
+    if url_base_datos.startswith("sqlite"):
+        return max(1, min(nucleos, WORKERS_MAX_SQLITE))
+    return nucleos
+
+class Servidor(uvicorn.Server):
+    """Servidor de uvicorn que cierra los streams SSE en cuanto recibe la señal de salida.
+
+    Al apagarse, uvicorn espera a que terminen todas las conexiones (hasta
+    --gracia, o sin límite) y recién después corre el lifespan; a un stream
+    en curso solo le quita el keep-alive. Cerrando las suscripciones con la
+    señal, los streams terminan y el drenaje espera solo a las peticiones
+    normales. Se engancha aquí, donde se crea el servidor, y no al importar
+    la aplicación, para no cambiar otros servidores del mismo proceso.
+    """
+
+    def handle_exit(self, sig, frame):
+        from app.components.difusion import centro_difusion
+        centro_difusion.avisar_salida()
+        super().handle_exit(sig, frame)
+
+def servir(**opciones):
+    """Como uvicorn.run("app.main:app", ...), pero cada worker corre un `Servidor`"""
+    config = uvicorn.Config("app.main:app", **opciones)
+    servidor = Servidor(config)
+    if config.should_reload:
+        ChangeReload(config, target=servidor.run, sockets=[config.bind_socket()]).run()
+    elif config.workers > 1:
+        Multiprocess(config, target=servidor.run, sockets=[config.bind_socket()]).run()
+    else:
+        servidor.run()
+    if not servidor.started and not config.should_reload and config.workers == 1:
+        sys.exit(STARTUP_FAILURE)
+
+def preparar_arranque():
+    """Pasos previos a lanzar los workers, ejecutados una sola vez en el proceso padre.
+
+    Migra el esquema (así los workers no compiten por el DDL) y lee el archivo
+    de la base para dejarlo en la caché de páginas del sistema operativo, que
+    comparten todos los workers.
+    """
+    from app.models.database import engine
+    from app.models.entities import Base
+    from app.models.esquema import asegurar_esquema
+
+    inicio = time.perf_counter()
+    asegurar_esquema(engine, Base.metadata)
+    ruta = engine.url.database
+    leidos = 0
+    if engine.dialect.name == "sqlite" and ruta and os.path.exists(ruta):
+        with open(ruta, "rb") as archivo:
+            while leidos < CALENTAR_MB << 20:
+                bloque = archivo.read(1 << 20)
+                if not bloque:
+                    break
+                leidos += len(bloque)
+    engine.dispose()
+    print(f"Arranque preparado en {(time.perf_counter() - inicio) * 1000:.0f} ms "
+          f"({leidos >> 20} MB de la base en caché)")
+
+def produccion(args):
+    from app.models.database import SQLALCHEMY_DATABASE_URL
+
+    workers = args.workers or workers_recomendados(SQLALCHEMY_DATABASE_URL)
+    loop = "uvloop" if _disponible("uvloop") else "asyncio"
+    http = "httptools" if _disponible("httptools") else "h11"
+    print(f"PoliMarket API (producción): {workers} workers, loop={loop}, http={http}, "
+          f"backlog={args.backlog}, keep-alive={args.keep_alive}s, gracia={args.gracia}s")
+
+    preparar_arranque()
+    servir(
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.gracia,
+        limit_concurrency=args.max_concurrencia,
+        proxy_headers=True,
+        access_log=args.access_log,
+        log_level="info",
+    )
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Servidor de la API de PoliMarket")
+    parser.add_argument("--prod", action="store_true", help="Modo producción (varios workers, sin reload)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, help="Por defecto, según núcleos y base de datos")
+    parser.add_argument("--backlog", type=int, default=4096,
+                        help="Cola de conexiones pendientes (limitada por net.core.somaxconn)")
+    parser.add_argument("--keep-alive", type=int, default=75,
+                        help="Segundos de keep-alive; mayor que el idle timeout del balanceador")
+    parser.add_argument("--gracia", type=int, default=30,
+                        help="Segundos para terminar las peticiones en curso al detenerse")
+    parser.add_argument("--max-concurrencia", type=int,
+                        help="Peticiones simultáneas por worker antes de responder 503")
+    parser.add_argument("--access-log", action="store_true", help="Registrar cada petición (más lento)")
+    args = parser.parse_args()
+
+    if args.prod:
+        produccion(args)
+    else:
+        servir(host=args.host, port=args.port, reload=True)
@@ -0,0 +1,48 @@
+"""La analítica columnar (NumPy) da los mismos agregados que un GROUP BY en SQL sobre la base sembrada."""
+from datetime import date
+import pytest
+from sqlalchemy import func, select
+from app.components.analitica_manager import AnaliticaManager, CacheColumnar
+from app.models.entities import DetalleVenta, Venta
+
+def _group_by_sql(db, desde=None, hasta=None):
+    """{vendedor: [(producto, unidades, total)]} ordenado por total descendente"""
+    consulta = (
+        select(func.coalesce(Venta.vendedor_id, 0), DetalleVenta.producto_id, func.sum(DetalleVenta.cantidad),
+               func.sum(DetalleVenta.cantidad * DetalleVenta.precio_unitario))
+        .join(Venta, Venta.id == DetalleVenta.venta_id)
+        .group_by(func.coalesce(Venta.vendedor_id, 0), DetalleVenta.producto_id)
+    )
+    if desde is not None:
+        consulta = consulta.where(Venta.fecha >= desde, Venta.fecha <= hasta)
+    resultado = {}
+    for vendedor_id, producto_id, unidades, total in db.execute(consulta):
+        resultado.setdefault(vendedor_id, []).append((producto_id, unidades, float(total)))
+    for filas in resultado.values():
+        filas.sort(key=lambda fila: (-fila[2], fila[0]))
+    return resultado
+
+def _comparar(obtenido, esperado, n):
+    assert obtenido.keys() == esperado.keys()
+    for vendedor_id, filas in esperado.items():
+        top = obtenido[vendedor_id]
+        assert len(top) == min(n, len(filas))
+        por_producto = {producto_id: (unidades, total) for producto_id, unidades, total in filas}
+        for fila, (_, _, total_esperado) in zip(top, filas):
+            unidades, total = por_producto[fila["producto_id"]]
+            assert fila["unidades"] == unidades
+            assert fila["total"] == pytest.approx(total)
+            # Mismo orden por ingreso (los empates pueden salir en otro orden de producto)
+            assert fila["total"] == pytest.approx(total_esperado)
+
+@pytest.mark.parametrize("n", [3, 10 ** 6], ids=["top_3", "todos"])
+def test_top_productos_igual_a_group_by_sql(db, n):
+    analitica = AnaliticaManager(db, cache=CacheColumnar())
+    _comparar(analitica.top_productos_por_vendedor(n), _group_by_sql(db), n)
+
+def test_top_productos_por_rango_de_fechas(db):
+    desde, hasta = date(2024, 3, 1), date(2024, 5, 31)
+    esperado = _group_by_sql(db, desde, hasta)
+    assert esperado
+    analitica = AnaliticaManager(db, cache=CacheColumnar())
+    _comparar(analitica.top_productos_por_vendedor(5, desde, hasta), esperado, 5)
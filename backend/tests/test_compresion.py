@@ -0,0 +1,53 @@
+"""Respuestas grandes comprimidas a la vez en el threadpool salen íntegras con cada codificación."""
+import asyncio
+import gzip
+import random
+import pytest
+from starlette.responses import Response
+from app.api import compresion
+from app.api.compresion import CompresionMiddleware
+
+def _descomprimir(codificacion: str, cuerpo: bytes) -> bytes:
+    if codificacion == "zstd":
+        return compresion.zstandard.ZstdDecompressor().decompress(cuerpo)
+    if codificacion == "br":
+        return compresion.brotli.decompress(cuerpo)
+    return gzip.decompress(cuerpo)
+
+def _cuerpo(indice: int) -> bytes:
+    # Contenido distinto por respuesta y por encima de UMBRAL_HILO_BYTES para que se comprima en otro hilo
+    aleatorio = random.Random(indice)
+    filas = ",".join('{"id":%d,"valor":%d}' % (i, aleatorio.randrange(10 ** 9)) for i in range(20000))
+    cuerpo = ("[" + filas + "]").encode()
+    assert len(cuerpo) > compresion.UMBRAL_HILO_BYTES
+    return cuerpo
+
+async def _aplicacion(scope, receive, send):
+    indice = int(scope["path"].strip("/"))
+    await Response(_cuerpo(indice), media_type="application/json")(scope, receive, send)
+
+async def _pedir(app, indice: int, codificacion: str):
+    mensajes = []
+
+    async def recibir():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def enviar(mensaje):
+        mensajes.append(mensaje)
+
+    scope = {"type": "http", "method": "GET", "path": "/%d" % indice, "query_string": b"",
+             "headers": [(b"accept-encoding", codificacion.encode())]}
+    await app(scope, recibir, enviar)
+    encabezados = dict(mensajes[0]["headers"])
+    assert encabezados[b"content-encoding"] == codificacion.encode()
+    return b"".join(m.get("body", b"") for m in mensajes[1:])
+
+@pytest.mark.parametrize("codificacion", compresion.PREFERENCIA)
+def test_compresion_concurrente_en_el_threadpool(codificacion):
+    app = CompresionMiddleware(_aplicacion)
+
+    async def todas():
+        return await asyncio.gather(*(_pedir(app, i, codificacion) for i in range(16)))
+
+    for indice, comprimido in enumerate(asyncio.run(todas())):
+        assert _descomprimir(codificacion, comprimido) == _cuerpo(indice)
@@ -0,0 +1,35 @@
+"""Una venta confirmada nunca se convierte en 409/503: su entrega se confirma con ella y la programación es accesoria."""
+from datetime import date
+from sqlalchemy import func, select
+from app.components.programacion_manager import ProgramacionManager
+from app.components.transacciones import ConflictoConcurrencia
+from app.components.venta_manager import VentaManager
+from app.models.entities import Entrega, Inventario, Venta
+from app.models.schemas import VentaCreate
+
+def _venta(db) -> VentaCreate:
+    inventario = db.execute(
+        select(Inventario).where(Inventario.cantidad_disponible > 0).order_by(Inventario.producto_id)
+    ).scalars().first()
+    return VentaCreate(vendedor_id=1, cliente_id=1, fecha=date(2024, 6, 1), estado="PENDIENTE",
+                       detalles=[{"producto_id": inventario.producto_id, "cantidad": 1}])
+
+def test_venta_y_entrega_se_confirman_juntas(db):
+    venta = VentaManager(db).crear_venta(_venta(db))
+    assert venta is not None
+    entrega = db.execute(select(Entrega).where(Entrega.venta_id == venta.id)).scalar_one()
+    assert entrega.estado == "PENDIENTE"
+
+def test_conflicto_al_programar_no_anula_la_venta(db, monkeypatch):
+    def falla(self, entrega):
+        raise ConflictoConcurrencia("programar_entregas", 5, "bloqueo")
+
+    monkeypatch.setattr(ProgramacionManager, "programar_entrega_nueva", falla)
+    ventas_antes = db.execute(select(func.count(Venta.id))).scalar()
+
+    venta = VentaManager(db).crear_venta(_venta(db))
+
+    assert venta is not None
+    assert db.execute(select(func.count(Venta.id))).scalar() == ventas_antes + 1
+    entrega = db.execute(select(Entrega).where(Entrega.venta_id == venta.id)).scalar_one()
+    assert entrega.transportista is None
@@ -0,0 +1,47 @@
+"""El detalle y el total de ventas y compras emiten un número fijo de consultas, sin importar cuántas líneas tengan."""
+from sqlalchemy import func, select
+from app.components.proveedor_manager import CompraManager
+from app.components.venta_manager import VentaManager
+from app.models.entities import DetalleCompra, DetalleVenta
+
+def _con_menos_y_mas_lineas(db, columna):
+    """Ids del registro con menos líneas (1) y del que tiene más, elegidos a propósito"""
+    lineas = func.count().label("lineas")
+    filas = db.execute(select(columna, lineas).group_by(columna).order_by(lineas, columna)).all()
+    menos, mas = filas[0], filas[-1]
+    assert menos.lineas == 1 and mas.lineas > 1
+    return [(menos[0], menos.lineas), (mas[0], mas.lineas)]
+
+def test_consultar_venta_detalle_dos_consultas(db, consultas):
+    for venta_id, lineas in _con_menos_y_mas_lineas(db, DetalleVenta.venta_id):
+        db.expunge_all()
+        consultas.clear()
+        venta = VentaManager(db).consultar_venta_detalle(venta_id)
+        assert len(venta.detalles) == lineas
+        assert venta.cliente is not None
+        assert all(d.producto is not None for d in venta.detalles)
+        assert len(consultas) == 2, consultas
+
+def test_consultar_compra_detalle_dos_consultas(db, consultas):
+    for compra_id, lineas in _con_menos_y_mas_lineas(db, DetalleCompra.compra_id):
+        db.expunge_all()
+        consultas.clear()
+        compra = CompraManager(db).consultar_compra_detalle(compra_id)
+        assert len(compra.detalles) == lineas
+        assert compra.proveedor is not None
+        assert all(d.producto is not None for d in compra.detalles)
+        assert len(consultas) == 2, consultas
+
+def test_calcular_total_venta_una_consulta(db, consultas):
+    for venta_id, _ in _con_menos_y_mas_lineas(db, DetalleVenta.venta_id):
+        consultas.clear()
+        total = VentaManager(db).calcular_total_venta(venta_id)
+        assert total > 0
+        assert len(consultas) == 1, consultas
+
+def test_calcular_total_compra_una_consulta(db, consultas):
+    for compra_id, _ in _con_menos_y_mas_lineas(db, DetalleCompra.compra_id):
+        consultas.clear()
+        total = CompraManager(db).calcular_total_compra(compra_id)
+        assert total > 0
+        assert len(consultas) == 1, consultas
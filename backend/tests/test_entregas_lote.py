@@ -0,0 +1,76 @@
+"""Cambios de estado de entregas en lote: validación de transiciones, cadenas en un lote y conflictos concurrentes."""
+import json
+import pytest
+from sqlalchemy import create_engine, event, select, update
+from app.components.entrega_manager import EntregaManager
+from app.components.evento_manager import ENTREGA_ESTADO
+from app.models.entities import Entrega, Evento
+
+def _ids_en_estado(db, estado: str, cantidad: int):
+    ids = db.execute(
+        select(Entrega.id).where(Entrega.estado == estado).order_by(Entrega.id).limit(cantidad)
+    ).scalars().all()
+    assert len(ids) == cantidad
+    return ids
+
+def _estado(db, entrega_id: int) -> str:
+    return db.execute(select(Entrega.estado).where(Entrega.id == entrega_id)).scalar_one()
+
+def _eventos_estado(db, entrega_id: int):
+    datos = db.execute(
+        select(Evento.datos).where(Evento.tipo == ENTREGA_ESTADO, Evento.entidad_id == entrega_id).order_by(Evento.id)
+    ).scalars()
+    return [(d["estado_anterior"], d["estado"]) for d in map(json.loads, datos)]
+
+def test_transiciones_invalidas_no_se_aplican(db):
+    entregada, = _ids_en_estado(db, "ENTREGADO", 1)
+    pendiente, = _ids_en_estado(db, "PENDIENTE", 1)
+
+    resultados = EntregaManager(db).actualizar_estados_entregas([
+        (entregada, "PENDIENTE"), (pendiente, "PENDIENTE"), (10 ** 9, "ENTREGADO"),
+    ])
+
+    assert [r["resultado"] for r in resultados] == ["TRANSICION_INVALIDA", "SIN_CAMBIO", "NO_ENCONTRADA"]
+    assert resultados[0]["estado_actual"] == "ENTREGADO"
+    assert _estado(db, entregada) == "ENTREGADO"
+    assert _eventos_estado(db, entregada) == []
+
+def test_transiciones_encadenadas_en_un_lote(db):
+    entrega_id, = _ids_en_estado(db, "PENDIENTE", 1)
+
+    resultados = EntregaManager(db).actualizar_estados_entregas([
+        (entrega_id, "EN_TRANSITO"), (entrega_id, "ENTREGADO"), (entrega_id, "PENDIENTE"),
+    ])
+
+    assert [r["resultado"] for r in resultados] == ["ACTUALIZADA", "ACTUALIZADA", "TRANSICION_INVALIDA"]
+    assert [r.get("estado_anterior") for r in resultados[:2]] == ["PENDIENTE", "EN_TRANSITO"]
+    assert _estado(db, entrega_id) == "ENTREGADO"
+    assert _eventos_estado(db, entrega_id) == [("PENDIENTE", "EN_TRANSITO"), ("EN_TRANSITO", "ENTREGADO")]
+
+@pytest.mark.parametrize("estado_concurrente", ["EN_TRANSITO", "CANCELADO"], ids=["mismo_destino", "otro_destino"])
+def test_cambio_concurrente_se_informa_como_conflicto(engine_prueba, db, estado_concurrente):
+    disputada, libre = _ids_en_estado(db, "PENDIENTE", 2)
+    otra_conexion = create_engine(engine_prueba.url)
+    pendiente = [True]
+
+    # Otra transacción cambia la entrega entre la lectura del lote y su UPDATE
+    def cambio_concurrente(conn, cursor, statement, parameters, context, executemany):
+        if pendiente and statement.startswith("UPDATE entregas"):
+            pendiente.clear()
+            with otra_conexion.begin() as otra:
+                otra.execute(update(Entrega).where(Entrega.id == disputada).values(estado=estado_concurrente))
+
+    event.listen(engine_prueba, "before_cursor_execute", cambio_concurrente)
+    try:
+        resultados = EntregaManager(db).actualizar_estados_entregas([
+            (disputada, "EN_TRANSITO"), (libre, "EN_TRANSITO"),
+        ])
+    finally:
+        event.remove(engine_prueba, "before_cursor_execute", cambio_concurrente)
+        otra_conexion.dispose()
+
+    assert [r["resultado"] for r in resultados] == ["CONFLICTO", "ACTUALIZADA"]
+    assert _estado(db, disputada) == estado_concurrente
+    assert _estado(db, libre) == "EN_TRANSITO"
+    assert _eventos_estado(db, disputada) == []
+    assert _eventos_estado(db, libre) == [("PENDIENTE", "EN_TRANSITO")]
@@ -0,0 +1,71 @@
+"""Commit agrupado: una unidad que falla se deshace sola, sin arrastrar a las demás del mismo lote."""
+import threading
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from app.components.escritor_grupal import EscritorGrupal
+from app.models.entities import Inventario
+
+def _stock(db, producto_id: int) -> int:
+    db.expire_all()
+    return db.execute(
+        select(Inventario.cantidad_disponible).where(Inventario.producto_id == producto_id)
+    ).scalar_one()
+
+def _sumar(producto_id: int, cantidad: int, sesiones: list):
+    def unidad(db):
+        sesiones.append(db)
+        inventario = db.execute(select(Inventario).where(Inventario.producto_id == producto_id)).scalar_one()
+        inventario.cantidad_disponible += cantidad
+        return inventario.cantidad_disponible
+    return unidad
+
+def _falla_en_python(producto_id: int, sesiones: list):
+    def unidad(db):
+        _sumar(producto_id, 100, sesiones)(db)
+        db.flush()  # El cambio ya llegó a la base: debe deshacerlo el SAVEPOINT
+        raise ValueError("unidad inválida")
+    return unidad
+
+def _falla_en_la_base(producto_id: int, sesiones: list):
+    def unidad(db):
+        _sumar(producto_id, 100, sesiones)(db)
+        db.add(Inventario(producto_id=producto_id, cantidad_disponible=1))  # producto_id es único
+        db.flush()
+    return unidad
+
+@pytest.mark.parametrize("fallida, error", [(_falla_en_python, ValueError), (_falla_en_la_base, IntegrityError)],
+                         ids=["error_de_aplicacion", "error_de_integridad"])
+def test_unidad_fallida_no_deshace_el_lote(engine_prueba, db, fallida, error):
+    inicial_buena, inicial_mala = _stock(db, 1), _stock(db, 2)
+    # Lote de dos: el hilo espera hasta que lleguen ambas unidades (o 10 s)
+    escritor = EscritorGrupal(sessionmaker(bind=engine_prueba), max_lote=2, max_espera_ms=10_000)
+    escritor.iniciar()
+    sesiones_buena, sesiones_mala = [], []
+    resultados = {}
+
+    def enviar(nombre, unidad):
+        try:
+            resultados[nombre] = escritor.enviar(nombre, unidad)
+        except Exception as e:
+            resultados[nombre] = e
+
+    hilos = [
+        threading.Thread(target=enviar, args=("buena", _sumar(1, 5, sesiones_buena))),
+        threading.Thread(target=enviar, args=("mala", fallida(2, sesiones_mala))),
+    ]
+    try:
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(timeout=30)
+    finally:
+        escritor.detener()
+
+    # Las dos unidades corrieron en la misma transacción del escritor
+    assert sesiones_buena[-1] is sesiones_mala[-1]
+    assert resultados["buena"] == inicial_buena + 5
+    assert isinstance(resultados["mala"], error)
+    assert _stock(db, 1) == inicial_buena + 5
+    assert _stock(db, 2) == inicial_mala
@@ -0,0 +1,45 @@
+"""Outbox de eventos: /eventos lee la base de la prueba y la retención purga por antigüedad y por cantidad."""
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, text
+from app.models.entities import Evento
+from app.models.respaldos import GestorRespaldos
+
+def test_eventos_usa_la_base_de_la_prueba(cliente, db):
+    respuesta = cliente.post("/inventario/stock/1", params={"cantidad": 5})
+    assert respuesta.status_code == 200
+
+    eventos = cliente.get("/eventos", params={"after": 0, "espera": 0}).json()["data"]["eventos"]
+
+    ids = [e["id"] for e in eventos]
+    assert ids == list(db.execute(select(Evento.id).order_by(Evento.id)).scalars())
+    assert eventos[-1]["tipo"] == "inventario_actualizado"
+    assert (eventos[-1]["datos"]["producto_id"], eventos[-1]["datos"]["cantidad"]) == (1, 5)
+
+def _sembrar_eventos(db, cantidad: int, antiguedad: timedelta):
+    creado = datetime.utcnow() - antiguedad
+    db.add_all(Evento(tipo="prueba", entidad_id=i, datos="{}", creado=creado) for i in range(cantidad))
+    db.commit()
+
+def test_purga_por_antiguedad(engine_prueba, db, tmp_path):
+    _sembrar_eventos(db, 30, timedelta(days=10))
+    _sembrar_eventos(db, 20, timedelta(minutes=1))
+    gestor = GestorRespaldos(engine_prueba.url.database, str(tmp_path), retencion_eventos_s=7 * 86400)
+
+    assert gestor.purgar_eventos(lote=7) == 30
+
+    restantes = db.execute(select(Evento.creado)).scalars().all()
+    assert len(restantes) == 20
+    assert min(restantes) > datetime.utcnow() - timedelta(days=1)
+
+def test_purga_por_cantidad_conserva_los_ultimos(engine_prueba, db, tmp_path):
+    _sembrar_eventos(db, 50, timedelta(minutes=1))
+    ultimo = db.execute(select(func.max(Evento.id))).scalar()
+    gestor = GestorRespaldos(engine_prueba.url.database, str(tmp_path), max_eventos=10)
+
+    assert gestor.purgar_eventos() == 40
+
+    ids = db.execute(select(Evento.id).order_by(Evento.id)).scalars().all()
+    assert ids == list(range(ultimo - 9, ultimo + 1))
+    # AUTOINCREMENT: tras la purga los ids siguen creciendo, no se reutilizan
+    _sembrar_eventos(db, 1, timedelta(0))
+    assert db.execute(text("SELECT max(id) FROM eventos")).scalar() == ultimo + 1
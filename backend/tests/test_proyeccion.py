@@ -0,0 +1,103 @@
+"""?include= y ?fields= en las ventas: forma de la respuesta, consultas fijas por relación y errores de validación."""
+import pytest
+from sqlalchemy import func, select
+from app.api.ventas import CAMPOS_VENTA, RELACIONES_VENTA
+from app.models.entities import DetalleVenta, Entrega, Venta
+
+def _vendedores_con_menos_y_mas_ventas(db):
+    ventas = func.count().label("ventas")
+    filas = db.execute(
+        select(Venta.vendedor_id, ventas).group_by(Venta.vendedor_id).order_by(ventas, Venta.vendedor_id)
+    ).all()
+    menos, mas = filas[0], filas[-1]
+    assert menos.ventas < mas.ventas
+    return [(menos.vendedor_id, menos.ventas), (mas.vendedor_id, mas.ventas)]
+
+@pytest.mark.parametrize("include", ["", "cliente", "cliente,entrega", "cliente,entrega,detalles"])
+def test_listado_por_vendedor_consultas_fijas(cliente, db, consultas, include):
+    incluidas = [r for r in include.split(",") if r]
+    for vendedor_id, cantidad in _vendedores_con_menos_y_mas_ventas(db):
+        consultas.clear()
+        respuesta = cliente.get(f"/ventas/vendedor/{vendedor_id}", params={"include": include})
+        assert respuesta.status_code == 200
+        ventas = respuesta.json()["data"]["ventas"]
+        assert len(ventas) == cantidad
+        # Una consulta para las ventas y una IN por relación, con 1 o con cientos de ventas
+        assert len(consultas) == 1 + len(incluidas), consultas
+        assert all(set(v) == set(CAMPOS_VENTA) | set(incluidas) for v in ventas)
+
+def test_include_en_bloques_de_ids(cliente, db, consultas, monkeypatch):
+    import app.components.venta_manager as venta_manager
+    monkeypatch.setattr(venta_manager, "TAMANO_LOTE_IN", 50)
+    vendedor_id, cantidad = _vendedores_con_menos_y_mas_ventas(db)[1]
+    assert cantidad > 50
+
+    consultas.clear()
+    respuesta = cliente.get(f"/ventas/vendedor/{vendedor_id}", params={"include": "entrega,detalles"})
+
+    assert len(respuesta.json()["data"]["ventas"]) == cantidad
+    # Una IN por bloque de ventas y relación, no una por venta
+    assert len(consultas) == 1 + 2 * -(-cantidad // 50), consultas
+
+def test_include_embebe_las_relaciones_de_cada_venta(cliente, db):
+    vendedor_id = _vendedores_con_menos_y_mas_ventas(db)[1][0]
+    ventas = cliente.get(f"/ventas/vendedor/{vendedor_id}",
+                         params={"include": "cliente,entrega,detalles"}).json()["data"]["ventas"]
+
+    lineas = dict(db.execute(select(DetalleVenta.venta_id, func.count()).group_by(DetalleVenta.venta_id)).all())
+    entregas = dict(db.execute(select(Entrega.venta_id, Entrega.id)).all())
+    for venta in ventas:
+        assert venta["cliente"]["id"] == venta["cliente_id"]
+        assert set(venta["cliente"]) == set(RELACIONES_VENTA["cliente"])
+        assert len(venta["detalles"]) == lineas.get(venta["id"], 0)
+        assert all(set(d) == set(RELACIONES_VENTA["detalles"]) for d in venta["detalles"])
+        if venta["id"] in entregas:
+            assert venta["entrega"]["id"] == entregas[venta["id"]]
+        else:
+            assert venta["entrega"] is None
+
+def test_fields_recorta_la_raiz_y_las_relaciones(cliente, db, consultas):
+    venta_id = db.execute(select(func.min(DetalleVenta.venta_id))).scalar()
+    consultas.clear()
+    respuesta = cliente.get(f"/ventas/{venta_id}", params={
+        "include": "cliente,detalles", "fields": "id,total,cliente.nombre,detalles.producto_id"})
+
+    assert respuesta.status_code == 200
+    assert len(consultas) == 3, consultas
+    venta = respuesta.json()["data"]
+    assert set(venta) == {"id", "total", "cliente", "detalles"}
+    assert set(venta["cliente"]) == {"nombre"}
+    assert venta["detalles"] and all(set(d) == {"producto_id"} for d in venta["detalles"])
+
+def test_fields_solo_de_relaciones_conserva_la_raiz(cliente, db):
+    venta_id = db.execute(select(func.min(Venta.id))).scalar()
+    venta = cliente.get(f"/ventas/{venta_id}", params={"include": "cliente", "fields": "cliente.email"}).json()["data"]
+    assert set(venta) == set(CAMPOS_VENTA) | {"cliente"}
+    assert set(venta["cliente"]) == {"email"}
+
+@pytest.mark.parametrize("params, invalido", [
+    ({"include": "cliente,vendedor"}, "vendedor"),
+    ({"fields": "id,costo"}, "costo"),
+    ({"fields": "cliente.nombre"}, "cliente.nombre"),  # relación no incluida
+    ({"include": "entrega", "fields": "entrega.precio"}, "entrega.precio"),
+])
+def test_nombres_desconocidos_dan_400(cliente, db, consultas, params, invalido):
+    venta_id = db.execute(select(func.min(Venta.id))).scalar()
+    for ruta in (f"/ventas/{venta_id}", "/ventas/vendedor/1"):
+        consultas.clear()
+        respuesta = cliente.get(ruta, params=params)
+        assert respuesta.status_code == 400
+        assert invalido in respuesta.json()["detail"]
+        # Se valida antes de leer la base
+        assert consultas == []
+
+def test_fields_en_entregas(cliente):
+    respuesta = cliente.get("/entregas/pendientes", params={"fields": "id,estado"})
+    assert respuesta.status_code == 200
+    entregas = respuesta.json()["data"]["entregas"]
+    assert entregas and all(set(e) == {"id", "estado"} for e in entregas)
+    assert cliente.get("/entregas/pendientes", params={"fields": "id,total"}).status_code == 400
+
+def test_id_no_numerico_da_422(cliente):
+    assert cliente.get("/ventas/abc", params={"include": "cliente"}).status_code == 422
+    assert cliente.get("/ventas/vendedor/abc", params={"fields": "id"}).status_code == 422
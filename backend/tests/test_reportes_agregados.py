@@ -0,0 +1,69 @@
+"""Los agregados diarios que mantiene crear_venta coinciden con los que recalcula reconstruir_agregados."""
+from datetime import date
+from sqlalchemy import select
+from app.components.reporte_manager import SIN_CATEGORIA, ReporteManager
+from app.components.venta_manager import VentaManager
+from app.models.entities import (
+    Inventario, Producto, VentaDiariaCategoria, VentaDiariaProducto, VentaDiariaVendedor
+)
+from app.models.schemas import VentaCreate
+
+TABLAS = {
+    VentaDiariaVendedor: VentaDiariaVendedor.vendedor_id,
+    VentaDiariaCategoria: VentaDiariaCategoria.categoria,
+    VentaDiariaProducto: VentaDiariaProducto.producto_id,
+}
+
+def _agregados(db):
+    """{tabla: {(fecha, dimensión): (ventas, unidades, total)}}"""
+    db.expire_all()
+    return {
+        tabla.__tablename__: {
+            (fila.fecha, fila.dimension): (fila.numero_ventas, fila.unidades, round(float(fila.total), 2))
+            for fila in db.execute(select(
+                tabla.fecha, dimension.label("dimension"), tabla.numero_ventas, tabla.unidades, tabla.total
+            ))
+        }
+        for tabla, dimension in TABLAS.items()
+    }
+
+def _producto_sin_categoria(db) -> int:
+    producto = Producto(nombre="Sin categoría", precio=12.5, categoria=None)
+    db.add(producto)
+    db.flush()
+    db.add(Inventario(producto_id=producto.id, cantidad_disponible=100))
+    db.commit()
+    return producto.id
+
+def _vender(db, vendedor_id: int, fecha: date, lineas: list):
+    venta = VentaManager(db).crear_venta(VentaCreate(
+        vendedor_id=vendedor_id, cliente_id=1, fecha=fecha, estado="PENDIENTE",
+        detalles=[{"producto_id": producto_id, "cantidad": cantidad} for producto_id, cantidad in lineas]
+    ))
+    assert venta is not None
+
+def test_agregados_incrementales_igual_a_reconstruidos(db):
+    sin_categoria = _producto_sin_categoria(db)
+    dia_sembrado, dia_nuevo = date(2024, 6, 1), date(2026, 1, 15)
+    _vender(db, 1, dia_sembrado, [(1, 2), (2, 1)])
+    _vender(db, 1, dia_nuevo, [(3, 4)])
+    # Mismo vendedor, día y producto: el upsert suma sobre la fila que creó la venta anterior
+    _vender(db, 1, dia_nuevo, [(3, 1), (sin_categoria, 2)])
+    # Un producto repetido en una venta cuenta una sola venta con la suma de unidades
+    _vender(db, 2, dia_nuevo, [(4, 1), (4, 3), (sin_categoria, 1)])
+
+    incrementales = _agregados(db)
+    assert incrementales["ventas_diarias_vendedor"][(dia_nuevo, 1)][:2] == (2, 7)
+    assert incrementales["ventas_diarias_categoria"][(dia_nuevo, SIN_CATEGORIA)][:2] == (2, 3)
+    assert incrementales["ventas_diarias_producto"][(dia_nuevo, 4)][:2] == (1, 4)
+
+    assert ReporteManager(db).reconstruir_agregados()
+    assert _agregados(db) == incrementales
+
+def test_reconstruir_un_rango_conserva_el_resto(db):
+    dia = date(2026, 2, 1)
+    _vender(db, 3, dia, [(5, 2), (6, 1)])
+    incrementales = _agregados(db)
+
+    assert ReporteManager(db).reconstruir_agregados(dia, dia)
+    assert _agregados(db) == incrementales
@@ -0,0 +1,69 @@
+"""Apagar el servidor (run.py) con un cliente SSE conectado cierra el stream de inmediato en lugar de esperar la gracia."""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN = os.path.join(BACKEND, "run.py")
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="usa SIGTERM")
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _esperar_servidor(puerto: int, proceso: subprocess.Popen):
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        assert proceso.poll() is None, "el servidor terminó al arrancar"
+        try:
+            with socket.create_connection(("127.0.0.1", puerto), timeout=1) as conexion:
+                conexion.sendall(b"GET /health HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+                if conexion.recv(64).startswith(b"HTTP/1.1 200"):
+                    return
+        except OSError:
+            time.sleep(0.1)
+    raise AssertionError("el servidor no respondió a /health")
+
+def test_importar_la_aplicacion_no_cambia_uvicorn():
+    from uvicorn.server import Server
+    handle_exit = Server.handle_exit
+    import app.main  # noqa: F401
+    assert Server.handle_exit is handle_exit
+
+@pytest.mark.parametrize("workers", [1, 2], ids=["un_worker", "dos_workers"])
+def test_apagado_con_suscriptor_sse(engine_prueba, tmp_path, workers):
+    puerto = _puerto_libre()
+    comando = [sys.executable, RUN, "--prod", "--host", "127.0.0.1", "--port", str(puerto),
+               "--workers", str(workers), "--gracia", "30"]
+    # cwd con la copia de la base de la prueba: el engine de la aplicación abre ./polimarket.db
+    proceso = subprocess.Popen(comando, cwd=str(tmp_path), env=dict(os.environ, PYTHONPATH=BACKEND),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _esperar_servidor(puerto, proceso)
+        suscriptor = socket.create_connection(("127.0.0.1", puerto), timeout=10)
+        suscriptor.sendall(b"GET /eventos/stream HTTP/1.1\r\nHost: x\r\nAccept: text/event-stream\r\n\r\n")
+        recibido = b""
+        while b"retry: 3000" not in recibido:
+            bloque = suscriptor.recv(4096)
+            assert bloque, "el stream se cerró antes de empezar"
+            recibido += bloque
+
+        inicio = time.monotonic()
+        proceso.send_signal(signal.SIGTERM)
+        # El stream termina (fin del chunked y cierre de la conexión) sin esperar la gracia
+        while suscriptor.recv(4096):
+            pass
+        suscriptor.close()
+        proceso.wait(timeout=10)
+        assert time.monotonic() - inicio < 5
+        assert proceso.returncode == 0
+    finally:
+        if proceso.poll() is None:
+            proceso.kill()
+            proceso.wait()
@@ -0,0 +1,119 @@
+"""Concurrencia optimista: un conflicto de versión se reintenta y, si persiste, llega al cliente como 409."""
+import pytest
+from sqlalchemy import create_engine, event, select, update
+from sqlalchemy.orm import Session
+from app.components import transacciones
+from app.components.inventario_manager import InventarioManager
+from app.components.transacciones import ConflictoConcurrencia, ejecutar_transaccion
+from app.models.entities import Inventario
+
+PRODUCTO = 1
+
+@pytest.fixture(autouse=True)
+def sin_backoff(monkeypatch):
+    monkeypatch.setattr(transacciones, "espera_backoff", lambda intento: 0)
+
+@pytest.fixture
+def escrituras_concurrentes(engine_prueba):
+    """Antes de cada flush sobre la base de la prueba, otra conexión modifica la misma fila y confirma.
+
+    Se fija cuántas veces con `pendientes[0]`. En ese momento la sesión ya
+    leyó la fila pero aún no escribió nada, así que la otra conexión toma el
+    lock de escritura sin esperar y la versión leída queda vieja.
+    """
+    otra = create_engine(engine_prueba.url)
+    pendientes = [0]
+
+    def adelantarse(sesion, contexto_flush, instancias):
+        if pendientes[0] and sesion.get_bind() is engine_prueba:
+            pendientes[0] -= 1
+            with otra.begin() as conexion:
+                conexion.execute(
+                    update(Inventario).where(Inventario.producto_id == PRODUCTO)
+                    .values(cantidad_disponible=Inventario.cantidad_disponible + 1, version=Inventario.version + 1)
+                )
+
+    event.listen(Session, "before_flush", adelantarse)
+    yield pendientes
+    event.remove(Session, "before_flush", adelantarse)
+    otra.dispose()
+
+def _stock(db) -> int:
+    db.expire_all()
+    return db.execute(select(Inventario.cantidad_disponible).where(Inventario.producto_id == PRODUCTO)).scalar_one()
+
+def _sumar_stock(db, cantidad: int, intentos: list):
+    def intento():
+        intentos.append(1)
+        inventario = db.execute(select(Inventario).where(Inventario.producto_id == PRODUCTO)).scalar_one()
+        inventario.cantidad_disponible += cantidad
+        db.commit()
+        return inventario.cantidad_disponible
+    return intento
+
+def test_conflicto_de_version_se_reintenta(db, escrituras_concurrentes):
+    inicial = _stock(db)
+    escrituras_concurrentes[0] = 2
+    intentos = []
+
+    final = ejecutar_transaccion(db, "prueba", _sumar_stock(db, 10, intentos), max_intentos=5)
+
+    # Los dos primeros intentos chocan con la otra conexión; el tercero relee y aplica sobre su cambio
+    assert len(intentos) == 3
+    assert final == _stock(db) == inicial + 2 + 10
+
+def test_reintentos_agotados_lanzan_conflicto(db, escrituras_concurrentes):
+    inicial = _stock(db)
+    escrituras_concurrentes[0] = 3
+    intentos = []
+
+    with pytest.raises(ConflictoConcurrencia) as error:
+        ejecutar_transaccion(db, "prueba", _sumar_stock(db, 10, intentos), max_intentos=3)
+
+    assert (error.value.motivo, error.value.intentos, len(intentos)) == ("version", 3, 3)
+    # Ningún intento dejó su cambio: solo quedan los de la otra conexión
+    assert _stock(db) == inicial + 3
+
+def test_base_bloqueada_se_clasifica_como_bloqueo(engine_prueba, db):
+    sin_espera = create_engine(engine_prueba.url, connect_args={"timeout": 0})
+    bloqueo = engine_prueba.raw_connection()
+    try:
+        bloqueo.execute("BEGIN IMMEDIATE")
+        sesion = Session(bind=sin_espera)
+        with pytest.raises(ConflictoConcurrencia) as error:
+            ejecutar_transaccion(sesion, "prueba", _sumar_stock(sesion, 10, []), max_intentos=2)
+        sesion.close()
+    finally:
+        bloqueo.rollback()
+        bloqueo.close()
+        sin_espera.dispose()
+    assert error.value.motivo == "bloqueo"
+
+def test_conflicto_persistente_responde_409(cliente, db, escrituras_concurrentes):
+    inicial = _stock(db)
+    escrituras_concurrentes[0] = transacciones.MAX_INTENTOS_TRANSACCION
+
+    respuesta = cliente.post(f"/inventario/stock/{PRODUCTO}", params={"cantidad": 5})
+
+    assert respuesta.status_code == 409
+    assert "version" in respuesta.json()["detail"]
+    assert _stock(db) == inicial + transacciones.MAX_INTENTOS_TRANSACCION
+
+def test_conflicto_resuelto_en_un_reintento_responde_200(cliente, db, escrituras_concurrentes):
+    inicial = _stock(db)
+    escrituras_concurrentes[0] = 1
+
+    respuesta = cliente.post(f"/inventario/stock/{PRODUCTO}", params={"cantidad": 5})
+
+    assert respuesta.status_code == 200
+    assert _stock(db) == inicial + 1 + 5
+
+def test_bloqueo_persistente_responde_503(cliente, monkeypatch):
+    def bloqueada(self, producto_id, cantidad):
+        raise ConflictoConcurrencia("actualizar_stock", 5, "bloqueo")
+
+    monkeypatch.setattr(InventarioManager, "actualizar_stock", bloqueada)
+    respuesta = cliente.post(f"/inventario/stock/{PRODUCTO}", params={"cantidad": 5})
+
+    assert respuesta.status_code == 503
+    assert respuesta.headers["retry-after"] == "1"
@@ -0,0 +1,61 @@
+"""Los contadores de versiones_tabla (ETag de los listados) nunca retroceden, ni al restaurar una instantánea."""
+from sqlalchemy import bindparam, select, update
+from app.models.entities import Producto
+from app.models.instantaneas import crear_instantanea, restaurar_en_engine
+from app.models.versiones import asegurar_versiones, leer_version
+
+def _renombrar_producto(db, nombre: str):
+    producto = db.execute(select(Producto).order_by(Producto.id)).scalars().first()
+    producto.nombre = nombre
+    db.commit()
+
+def test_restaurar_instantanea_no_repite_versiones(engine_prueba, db, tmp_path):
+    asegurar_versiones(engine_prueba)
+    _renombrar_producto(db, "Antes de la instantánea")
+    instantanea = str(tmp_path / "instantanea.db")
+    crear_instantanea(engine_prueba.url.database, instantanea)
+    version_instantanea, _ = leer_version(db, "productos")
+
+    _renombrar_producto(db, "Después de la instantánea")
+    version_servida, _ = leer_version(db, "productos")
+    assert version_servida > version_instantanea
+    db.close()
+
+    restaurar_en_engine(instantanea, engine_prueba)
+
+    version_restaurada, _ = leer_version(db, "productos")
+    assert version_restaurada > version_servida
+    # El siguiente cambio tampoco vuelve a una versión ya servida
+    _renombrar_producto(db, "Otro contenido")
+    assert leer_version(db, "productos")[0] > version_restaurada
+
+def test_version_no_retrocede_si_el_contador_quedo_atras(engine_prueba, db):
+    asegurar_versiones(engine_prueba)
+    db.connection().exec_driver_sql("UPDATE versiones_tabla SET version = 5 WHERE tabla = 'productos'")
+    db.commit()
+
+    _renombrar_producto(db, "Cambio tras un contador viejo")
+
+    # 6 ya pudo haberse servido antes con otro contenido; la versión salta a la hora actual en ms
+    assert leer_version(db, "productos")[0] > 6
+
+def test_update_de_core_cambia_el_etag(cliente, engine_prueba, db):
+    asegurar_versiones(engine_prueba)
+    etag = cliente.get("/inventario/productos").headers["etag"]
+    assert cliente.get("/inventario/productos", headers={"If-None-Match": etag}).status_code == 304
+
+    # UPDATE por conjuntos desde la Session, sin pasar por el flush del ORM
+    db.execute(update(Producto).values(precio=Producto.precio + 1).execution_options(synchronize_session=False))
+    db.commit()
+    respuesta = cliente.get("/inventario/productos", headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    etag_sesion = respuesta.headers["etag"]
+
+    # executemany directo sobre una conexión del Engine
+    tabla = Producto.__table__
+    with engine_prueba.begin() as conexion:
+        conexion.execute(update(tabla).where(tabla.c.id == bindparam("b_id")).values(nombre=bindparam("b_nombre")),
+                         [{"b_id": 1, "b_nombre": "Uno"}, {"b_id": 2, "b_nombre": "Dos"}])
+    respuesta = cliente.get("/inventario/productos", headers={"If-None-Match": etag_sesion})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["etag"] != etag_sesion
@@ -1,5 +1,8 @@
+import argparse
+import time
 from sqlalchemy import text
 from app.models.database import SessionLocal, engine
+from app.models.instantaneas import crear_instantanea, restaurar_en_engine
 
 def truncate_database():
     """Elimina todas las tablas y las recrea desde cero"""
@@ -29,6 +32,29 @@ def truncate_database():
     finally:
         db.close()
 
+def guardar_instantanea(ruta: str):
+    """Guarda una instantánea de la base actual (por ejemplo, recién sembrada)"""
+    crear_instantanea(engine.url.database, ruta)
+    print(f"Instantánea guardada en {ruta}")
+
+def restaurar_instantanea(ruta: str):
+    """Reemplaza el contenido de la base por la instantánea, aun con el servidor en ejecución"""
+    inicio = time.perf_counter()
+    restaurar_en_engine(ruta, engine)
+    print(f"Base de datos restaurada desde {ruta} en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
 if __name__ == "__main__":
-    truncate_database()
-    print("Ejecuta 'python init_data.py' para recrear las tablas con datos de ejemplo") 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Elimina las tablas o restaura/guarda una instantánea")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--guardar", metavar="ARCHIVO", help="Guardar una instantánea de la base actual")
+    grupo.add_argument("--restaurar", metavar="ARCHIVO", help="Restaurar la base desde una instantánea")
+    args = parser.parse_args()
+
+    if args.guardar:
+        guardar_instantanea(args.guardar)
+    elif args.restaurar:
+        restaurar_instantanea(args.restaurar)
+    else:
+        truncate_database()
+        print("Ejecuta 'python init_data.py' para recrear las tablas con datos de ejemplo")
+        print("o 'python truncate_db.py --restaurar <instantanea>' para volver a un estado guardado") 
\ No newline at end of file
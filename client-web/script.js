@@ -281,7 +281,7 @@ async function consultarInventario() {
             const info = `
                 <strong>Información del Inventario:</strong><br>
                 Producto ID: ${result.data.producto_id}<br>
-                Cantidad Disponible: ${result.data.cantidad_disponible}<br>
+                Cantidad Disponible: <span data-stock-producto-id="${result.data.producto_id}">${result.data.cantidad_disponible}</span><br>
                 Cantidad Mínima: ${result.data.cantidad_minima}<br>
                 Ubicación: ${result.data.ubicacion || 'N/A'}
             `;
@@ -292,6 +292,18 @@ async function consultarInventario() {
     }
 }
 
+// Fila de la tabla de productos bajo stock
+function filaBajoStock(p) {
+    return `
+        <tr data-producto-id="${p.producto_id}">
+            <td>${p.producto_id}</td>
+            <td class="cantidad">${p.cantidad_disponible}</td>
+            <td>${p.cantidad_minima}</td>
+            <td class="estado">${p.cantidad_disponible <= p.cantidad_minima ? 'CRÍTICO' : 'BAJO'}</td>
+        </tr>
+    `;
+}
+
 // Consultar productos bajo stock
 async function consultarProductosBajoStock() {
     try {
@@ -299,7 +311,7 @@ async function consultarProductosBajoStock() {
         
         if (result.success && result.data.productos_bajo_stock) {
             const table = `
-                <table class="data-table">
+                <table class="data-table" id="tablaBajoStock">
                     <thead>
                         <tr>
                             <th>Producto ID</th>
@@ -309,14 +321,7 @@ async function consultarProductosBajoStock() {
                         </tr>
                     </thead>
                     <tbody>
-                        ${result.data.productos_bajo_stock.map(p => `
-                            <tr>
-                                <td>${p.producto_id}</td>
-                                <td>${p.cantidad_disponible}</td>
-                                <td>${p.cantidad_minima}</td>
-                                <td>${p.cantidad_disponible <= p.cantidad_minima ? 'CRÍTICO' : 'BAJO'}</td>
-                            </tr>
-                        `).join('')}
+                        ${result.data.productos_bajo_stock.map(filaBajoStock).join('')}
                     </tbody>
                 </table>
             `;
@@ -329,6 +334,19 @@ async function consultarProductosBajoStock() {
 
 // ===== RF05: ENTREGAS =====
 
+// Fila de la tabla de entregas pendientes
+function filaEntregaPendiente(e) {
+    return `
+        <tr data-entrega-id="${e.id}">
+            <td>${e.id}</td>
+            <td>${e.venta_id}</td>
+            <td>${e.fecha_entrega}</td>
+            <td>${e.direccion}</td>
+            <td class="estado">${e.estado}</td>
+        </tr>
+    `;
+}
+
 // Listar entregas pendientes
 async function listarEntregasPendientes() {
     try {
@@ -336,7 +354,7 @@ async function listarEntregasPendientes() {
         
         if (result.success && result.data.entregas) {
             const table = `
-                <table class="data-table">
+                <table class="data-table" id="tablaEntregasPendientes">
                     <thead>
                         <tr>
                             <th>ID</th>
@@ -347,15 +365,7 @@ async function listarEntregasPendientes() {
                         </tr>
                     </thead>
                     <tbody>
-                        ${result.data.entregas.map(e => `
-                            <tr>
-                                <td>${e.id}</td>
-                                <td>${e.venta_id}</td>
-                                <td>${e.fecha_entrega}</td>
-                                <td>${e.direccion}</td>
-                                <td>${e.estado}</td>
-                            </tr>
-                        `).join('')}
+                        ${result.data.entregas.map(filaEntregaPendiente).join('')}
                     </tbody>
                 </table>
             `;
@@ -391,11 +401,11 @@ async function consultarEntregasPorFecha() {
                     </thead>
                     <tbody>
                         ${result.data.entregas.map(e => `
-                            <tr>
+                            <tr data-entrega-id="${e.id}">
                                 <td>${e.id}</td>
                                 <td>${e.venta_id}</td>
                                 <td>${e.fecha_entrega}</td>
-                                <td>${e.estado}</td>
+                                <td class="estado">${e.estado}</td>
                             </tr>
                         `).join('')}
                     </tbody>
@@ -571,6 +581,63 @@ async function consultarComprasPorProveedor() {
     }
 }
 
+// ===== CAMBIOS EN VIVO (SSE) =====
+
+// Aplica un cambio de stock a las vistas abiertas sin volver a pedir la lista
+function aplicarCambioStock(cambio) {
+    document.querySelectorAll(`[data-stock-producto-id="${cambio.producto_id}"]`)
+        .forEach(celda => { celda.textContent = cambio.cantidad_disponible; });
+
+    const tabla = document.getElementById('tablaBajoStock');
+    if (!tabla) {
+        return;
+    }
+    const fila = tabla.querySelector(`tr[data-producto-id="${cambio.producto_id}"]`);
+    if (!cambio.bajo_stock) {
+        if (fila) fila.remove();
+    } else if (fila) {
+        fila.outerHTML = filaBajoStock(cambio);
+    } else {
+        tabla.querySelector('tbody').insertAdjacentHTML('beforeend', filaBajoStock(cambio));
+    }
+}
+
+// Aplica un cambio de estado (o una entrega nueva) a las tablas de entregas abiertas
+function aplicarCambioEntrega(cambio) {
+    document.querySelectorAll(`#entregasFechaResult tr[data-entrega-id="${cambio.entrega_id}"] .estado`)
+        .forEach(celda => { celda.textContent = cambio.estado; });
+
+    const tabla = document.getElementById('tablaEntregasPendientes');
+    if (!tabla) {
+        return;
+    }
+    const fila = tabla.querySelector(`tr[data-entrega-id="${cambio.entrega_id}"]`);
+    if (cambio.estado !== 'PENDIENTE') {
+        if (fila) fila.remove();
+    } else if (fila) {
+        fila.querySelector('.estado').textContent = cambio.estado;
+    } else if (cambio.venta_id) {
+        tabla.querySelector('tbody').insertAdjacentHTML('beforeend', filaEntregaPendiente({
+            id: cambio.entrega_id, ...cambio
+        }));
+    }
+}
+
+// Conecta al canal de cambios; EventSource reconecta solo y reenvía Last-Event-ID
+function conectarCambios() {
+    if (!window.EventSource) {
+        return;
+    }
+    const fuente = new EventSource(`${API_BASE_URL}/eventos/stream`);
+    fuente.addEventListener('stock', e => aplicarCambioStock(JSON.parse(e.data)));
+    fuente.addEventListener('entrega', e => aplicarCambioEntrega(JSON.parse(e.data)));
+    // El servidor descartó cambios de esta conexión (cliente atrasado): recargar las listas abiertas
+    fuente.addEventListener('resync', () => {
+        if (document.getElementById('tablaBajoStock')) consultarProductosBajoStock();
+        if (document.getElementById('tablaEntregasPendientes')) listarEntregasPendientes();
+    });
+}
+
 // Verificar conexión al cargar la página
 document.addEventListener('DOMContentLoaded', function() {
     // Establecer fecha actual como valor por defecto
@@ -582,6 +649,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(result => {
             if (result && result.status === 'healthy') {
                 console.log('✅ Conectado al servidor PoliMarket');
+                conectarCambios();
             }
         })
         .catch(error => {